@@ -1,8 +1,8 @@
 # src/humanizer/cli/analyze_cmd.py
 import click
-import asyncio
 from uuid import UUID
 from humanizer.core.content.analyzer import ConversationAnalyzer
+from humanizer.db.session import run_async
 
 @click.group(name='analyze')
 def analyze_cmd():
@@ -22,4 +22,4 @@ def analyze_conversation(conversation_id: str):
         click.echo(f"Similarity: {sim:.3f}")
         click.echo(f"Content: {msg[:500]}...")  # Show first 500 chars
 
-    asyncio.run(run())
+    run_async(run())
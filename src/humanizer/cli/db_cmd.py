@@ -1,9 +1,14 @@
 # src/humanizer/cli/db_cmd.py
 import click
-import asyncio
+from typing import Dict, Optional
 from sqlalchemy import text
 from humanizer.db import ensure_database
-from humanizer.db.session import init_db, get_session
+from humanizer.db.session import init_db, get_session, run_async
+from humanizer.db.models import Base
+from humanizer.db.models.content import TEXT_SEARCH_CONFIG
+from humanizer.db.triggers import EMBEDDING_TRIGGER_MODES, embedding_trigger_statements
+from humanizer.db.storage import FULL_COLUMN, SHORT_COLUMN, column_targets, convert_embedding_storage
+from humanizer.config import get_settings
 from humanizer.utils.logging import get_logger
 
 logger = get_logger(__name__)
@@ -24,7 +29,7 @@ def init(force: bool) -> None:
         await init_db(force=force)
         logger.info("Database initialization completed")
 
-    asyncio.run(run())
+    run_async(run())
 
 @db.command()
 @click.option('--admin-pass', prompt=True, hide_input=True,
@@ -42,7 +47,7 @@ def setup(admin_pass: str, app_pass: str, readonly_pass: str) -> None:
             app_password=app_pass,
             readonly_password=readonly_pass
         )
-    asyncio.run(run())
+    run_async(run())
 
 @db.command()
 def verify() -> None:
@@ -58,48 +63,114 @@ def verify() -> None:
             click.echo("pgvector extension: OK")
         else:
             click.echo("pgvector extension: FAILED")
-    asyncio.run(run())
+    run_async(run())
 
 @db.command()
 def migrate():
     """Run database migrations"""
     async def run():
         async with get_session() as session:
-            # Create the function first
+            # Source ids used by incremental imports, backfilled from meta_info
             await session.execute(text("""
-                CREATE OR REPLACE FUNCTION normalize_vector()
-                RETURNS trigger AS $$
-                BEGIN
-                    IF NEW.embedding IS NOT NULL THEN
-                        NEW.embedding = l2_normalize(NEW.embedding);
-                    END IF;
-                    RETURN NEW;
-                END;
-                $$ LANGUAGE plpgsql;
+                ALTER TABLE content ADD COLUMN IF NOT EXISTS original_id VARCHAR;
+            """))
+            await session.execute(text("""
+                ALTER TABLE content ADD COLUMN IF NOT EXISTS content_hash VARCHAR;
+            """))
+            await session.execute(text("""
+                ALTER TABLE messages ADD COLUMN IF NOT EXISTS original_id VARCHAR;
+            """))
+            await session.execute(text("""
+                UPDATE content SET original_id = meta_info->>'original_id'
+                WHERE original_id IS NULL AND meta_info->>'original_id' IS NOT NULL;
+            """))
+            await session.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_content_original_id ON content (original_id);
             """))
 
-            # Then drop the trigger if it exists
+            # Generated tsvector columns and GIN indexes for full-text search
+            await session.execute(text(f"""
+                ALTER TABLE messages ADD COLUMN IF NOT EXISTS search_vector tsvector
+                GENERATED ALWAYS AS (to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(content, ''))) STORED;
+            """))
+            await session.execute(text(f"""
+                ALTER TABLE content ADD COLUMN IF NOT EXISTS title_vector tsvector
+                GENERATED ALWAYS AS (to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(title, ''))) STORED;
+            """))
+            await session.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_messages_search_vector ON messages USING gin (search_vector);
+            """))
             await session.execute(text("""
-                DROP TRIGGER IF EXISTS normalize_embedding ON messages;
+                CREATE INDEX IF NOT EXISTS ix_content_title_vector ON content USING gin (title_vector);
             """))
 
-            # Finally create the trigger
+            # Full-length model vectors and their short Matryoshka prefix; existing rows are
+            # filled in by 'db convert-embeddings'
+            for column, (sql_type, _) in column_targets().items():
+                if column in (FULL_COLUMN, SHORT_COLUMN):
+                    await session.execute(text(
+                        f"ALTER TABLE messages ADD COLUMN IF NOT EXISTS {column} {sql_type};"
+                    ))
+
+            # Failure and lease bookkeeping now lives in embedding_jobs
             await session.execute(text("""
-                CREATE TRIGGER normalize_embedding
-                    BEFORE INSERT OR UPDATE ON messages
-                    FOR EACH ROW
-                    EXECUTE FUNCTION normalize_vector();
+                DROP TABLE IF EXISTS embedding_failures, embedding_leases;
             """))
 
+            # Tables added since the database was created (embedding jobs, conversation
+            # centroids, import checkpoints); existing tables are left alone
+            await session.run_sync(lambda sync_session: Base.metadata.create_all(sync_session.connection()))
+
+            # Embeddings are normalized before they are written; replace the old
+            # per-row normalization trigger with the configured (validation-only) mode
+            for statement in embedding_trigger_statements(get_settings().embedding_trigger_mode):
+                await session.execute(text(statement))
+
             await session.commit()
             click.echo("Migration completed successfully")
 
     try:
-        asyncio.run(run())
+        run_async(run())
     except Exception as e:
         click.echo(f"Migration failed: {str(e)}", err=True)
         raise
 
+@db.command(name='embedding-trigger')
+@click.argument('mode', type=click.Choice(list(EMBEDDING_TRIGGER_MODES)))
+def embedding_trigger(mode: str) -> None:
+    """Turn the embedding validation trigger on (validate) or off"""
+    async def run() -> None:
+        async with get_session() as session:
+            for statement in embedding_trigger_statements(mode):
+                await session.execute(text(statement))
+        click.echo(f"Embedding trigger mode: {mode}")
+    run_async(run())
+
+def _convert_embeddings(batch_size: int, lock_timeout: str) -> None:
+    """Run convert_embedding_storage with progress output"""
+    async def run() -> None:
+        written: Dict[str, int] = {}
+        skipped: Dict[str, int] = {}
+        async for column, scanned, count in convert_embedding_storage(batch_size=batch_size, lock_timeout=lock_timeout):
+            written[column], skipped[column] = count, scanned - count
+            click.echo(f"{column}: {count:,} rows written")
+        for column, (sql_type, _) in column_targets().items():
+            click.echo(f"messages.{column} is {sql_type}")
+        for column, count in skipped.items():
+            if count:
+                click.echo(f"{count:,} messages have vectors too short for {column}; "
+                           f"re-embed them with 'humanizer embeddings enqueue'")
+        if written:
+            click.echo("Rebuild ANN indexes on rebuilt columns with 'humanizer db index create'")
+    run_async(run())
+
+@db.command(name='convert-embeddings')
+@click.option('--batch-size', default=5000, help='Rows converted per transaction')
+@click.option('--lock-timeout', default='10s', help='Give up a column swap if the table stays locked this long')
+def convert_embeddings(batch_size: int, lock_timeout: str) -> None:
+    """Bring stored vectors in line with the embedding storage and dimension settings (no model calls)"""
+    _convert_embeddings(batch_size, lock_timeout)
+
 @db.command()
 def verify_schema():
     """Verify database schema"""
@@ -119,82 +190,14 @@ def verify_schema():
                 click.echo(f"{col[0]}: {col[1]}" +
                           (f" (max length: {col[2]})" if col[2] else ""))
 
-    asyncio.run(run())
+    run_async(run())
 
 @db.command()
-def fix_dimensions():
-    """Fix vector dimensions and triggers in database"""
-    async def run():
-        from humanizer.config import get_settings
-        settings = get_settings()
-
-        async with get_session() as session:
-            try:
-                # Drop trigger first
-                await session.execute(text(
-                    "DROP TRIGGER IF EXISTS normalize_embedding ON messages;"
-                ))
-                await session.commit()
-
-                # Drop function
-                await session.execute(text(
-                    "DROP FUNCTION IF EXISTS normalize_vector();"
-                ))
-                await session.commit()
-
-                # Drop embedding column
-                await session.execute(text(
-                    "ALTER TABLE messages DROP COLUMN IF EXISTS embedding;"
-                ))
-                await session.commit()
-
-                # Add embedding column with correct dimensions
-                await session.execute(text(
-                    f"ALTER TABLE messages ADD COLUMN embedding vector({settings.embedding_dimensions});"
-                ))
-                await session.commit()
-
-                # Ensure model column exists
-                await session.execute(text(
-                    "ALTER TABLE messages ADD COLUMN IF NOT EXISTS embedding_model VARCHAR;"
-                ))
-                await session.commit()
-
-                # Create normalization function
-                await session.execute(text("""
-                    CREATE OR REPLACE FUNCTION normalize_vector()
-                    RETURNS trigger AS $$
-                    BEGIN
-                        IF NEW.embedding IS NOT NULL THEN
-                            NEW.embedding = l2_normalize(NEW.embedding);
-                        END IF;
-                        RETURN NEW;
-                    END;
-                    $$ LANGUAGE plpgsql;
-                """))
-                await session.commit()
-
-                # Create trigger
-                await session.execute(text("""
-                    CREATE TRIGGER normalize_embedding
-                        BEFORE INSERT OR UPDATE ON messages
-                        FOR EACH ROW
-                        EXECUTE FUNCTION normalize_vector();
-                """))
-                await session.commit()
-
-                click.echo(f"Vector column updated to {settings.embedding_dimensions} dimensions with normalization")
-
-            except Exception as e:
-                click.echo(f"Error during operation: {str(e)}")
-                await session.rollback()
-                raise
-
-    try:
-        asyncio.run(run())
-    except Exception as e:
-        click.echo(f"Error updating schema: {str(e)}", err=True)
-        raise
+@click.option('--batch-size', default=5000, help='Rows re-sliced per transaction')
+@click.option('--lock-timeout', default='10s', help='Give up a column swap if the table stays locked this long')
+def fix_dimensions(batch_size: int, lock_timeout: str):
+    """Re-slice stored vectors to embedding_dimensions in SQL, keeping them (same as convert-embeddings)"""
+    _convert_embeddings(batch_size, lock_timeout)
 
 @db.command()
 def verify_setup():
@@ -226,4 +229,112 @@ def verify_setup():
             for trigger in triggers:
                 click.echo(f"✓ {trigger[0]}")
 
-    asyncio.run(run())
+    run_async(run())
+
+@db.group(name='index')
+def index() -> None:
+    """Manage ANN vector and trigram indexes"""
+    pass
+
+@index.command(name='create')
+@click.option('--method', type=click.Choice(['hnsw', 'ivfflat']), default='hnsw', help='Index type')
+@click.option('--m', default=16, help='HNSW: max connections per layer')
+@click.option('--ef-construction', default=64, help='HNSW: candidate list size while building')
+@click.option('--lists', default=100, help='IVFFlat: number of inverted lists (about rows/1000)')
+@click.option('--table', type=click.Choice(['messages', 'conversation_embeddings']), default='messages', help='Table whose embedding column is indexed')
+@click.option('--maintenance-work-mem', help='Memory for the build, e.g. 2GB')
+@click.option('--binary', is_flag=True, help='Index binary-quantized message embeddings (Hamming distance) for binary search')
+@click.option('--prefix', is_flag=True, help='Index the short Matryoshka prefixes (embedding_short) for prefix search')
+def index_create(method: str, m: int, ef_construction: int, lists: int, table: str,
+                 maintenance_work_mem: Optional[str], binary: bool, prefix: bool) -> None:
+    """Build a vector index concurrently"""
+    from humanizer.db.indexes import create_binary_index, create_vector_index
+    async def run() -> None:
+        if binary:
+            if table != 'messages':
+                raise click.UsageError("--binary indexes messages only")
+            name = await create_binary_index(
+                get_settings().embedding_dimensions,
+                method=method,
+                m=m,
+                ef_construction=ef_construction,
+                lists=lists,
+                maintenance_work_mem=maintenance_work_mem
+            )
+            click.echo(f"Index {name} is ready")
+            return
+        if prefix and table != 'messages':
+            raise click.UsageError("--prefix indexes messages only")
+        name = await create_vector_index(
+            method=method,
+            m=m,
+            ef_construction=ef_construction,
+            lists=lists,
+            table=table,
+            column=SHORT_COLUMN if prefix else 'embedding',
+            maintenance_work_mem=maintenance_work_mem
+        )
+        click.echo(f"Index {name} is ready")
+    run_async(run())
+
+@index.command(name='rebuild')
+@click.option('--method', type=click.Choice(['hnsw', 'ivfflat']), default='hnsw', help='Index type')
+@click.option('--table', type=click.Choice(['messages', 'conversation_embeddings']), default='messages', help='Table whose embedding column is indexed')
+@click.option('--binary', is_flag=True, help='The index on binary-quantized message embeddings')
+@click.option('--prefix', is_flag=True, help='The index on the short Matryoshka prefixes')
+def index_rebuild(method: str, table: str, binary: bool, prefix: bool) -> None:
+    """Rebuild a vector index concurrently"""
+    from humanizer.db.indexes import BINARY_INDEX_COLUMN, rebuild_vector_index
+    async def run() -> None:
+        column = BINARY_INDEX_COLUMN if binary else SHORT_COLUMN if prefix else 'embedding'
+        name = await rebuild_vector_index(method=method, table=table, column=column)
+        click.echo(f"Index {name} rebuilt")
+    run_async(run())
+
+@index.command(name='drop')
+@click.option('--method', type=click.Choice(['hnsw', 'ivfflat']), default='hnsw', help='Index type')
+@click.option('--table', type=click.Choice(['messages', 'conversation_embeddings']), default='messages', help='Table whose embedding column is indexed')
+@click.option('--binary', is_flag=True, help='The index on binary-quantized message embeddings')
+@click.option('--prefix', is_flag=True, help='The index on the short Matryoshka prefixes')
+def index_drop(method: str, table: str, binary: bool, prefix: bool) -> None:
+    """Drop a vector index concurrently"""
+    from humanizer.db.indexes import BINARY_INDEX_COLUMN, drop_vector_index
+    async def run() -> None:
+        column = BINARY_INDEX_COLUMN if binary else SHORT_COLUMN if prefix else 'embedding'
+        name = await drop_vector_index(method=method, table=table, column=column)
+        click.echo(f"Index {name} dropped")
+    run_async(run())
+
+@index.command(name='trigram')
+@click.option('--drop', is_flag=True, help='Drop the index instead of building it')
+@click.option('--maintenance-work-mem', help='Memory for the build, e.g. 2GB')
+def index_trigram(drop: bool, maintenance_work_mem: Optional[str]) -> None:
+    """Build (or drop) the pg_trgm index used by substring and fuzzy text search"""
+    from humanizer.db.indexes import create_trigram_index, drop_trigram_index
+    async def run() -> None:
+        if drop:
+            name = await drop_trigram_index()
+            click.echo(f"Index {name} dropped")
+            return
+        name = await create_trigram_index(maintenance_work_mem=maintenance_work_mem)
+        click.echo(f"Index {name} is ready")
+    run_async(run())
+
+@index.command(name='status')
+@click.option('--table', type=click.Choice(['messages', 'conversation_embeddings']), default='messages', help='Table whose embedding column is indexed')
+def index_status(table: str) -> None:
+    """Show vector and text search indexes, their size and build progress"""
+    from humanizer.db.indexes import VECTOR_INDEX_METHODS, vector_index_status
+    async def run() -> None:
+        indexes = await vector_index_status(table=table, methods=VECTOR_INDEX_METHODS + ('gin',))
+        if not indexes:
+            click.echo(f"No vector or text search indexes on {table} (searches use a sequential scan)")
+            return
+        for idx in indexes:
+            state = "valid" if idx['valid'] else "INVALID (rebuild or drop it)"
+            click.echo(f"\n{idx['name']} [{idx['method']}] {idx['bytes'] / 1024 / 1024:.1f} MB, {state}")
+            click.echo(f"  {idx['definition']}")
+            if idx['build_phase']:
+                click.echo(f"  Building: {idx['build_phase']} "
+                           f"({idx['tuples_done'] or 0:,}/{idx['tuples_total'] or 0:,} tuples)")
+    run_async(run())
@@ -1,11 +1,10 @@
 # src/humanizer/cli/embedding_cmd.py
-import asyncio
 import click
 from typing import Optional
 from humanizer.core.content.processor import ContentProcessor
 from humanizer.core.embedding.service import EmbeddingService
 from humanizer.config import get_settings
-from humanizer.db.session import get_session
+from humanizer.db.session import get_session, run_async
 from humanizer.utils.logging import get_logger
 from sqlalchemy import text
 
@@ -20,26 +19,150 @@ def embeddings() -> None:
 @click.option('--batch-size', default=50, help='Batch size for processing')
 @click.option('--force', is_flag=True, help='Force update of existing embeddings')
 @click.option('--model', help='Override default embedding model')
-def update(batch_size: int, force: bool, model: Optional[str] = None) -> None:
+@click.option('--concurrency', type=int, help='Embedding requests kept in flight')
+@click.option('--adaptive/--no-adaptive', default=None, help='Adapt concurrency to server latency and errors (AIMD)')
+@click.option('--retry-failed', is_flag=True, help='Give failed jobs a fresh set of attempts')
+def update(batch_size: int, force: bool, model: Optional[str] = None,
+           concurrency: Optional[int] = None, adaptive: Optional[bool] = None,
+           retry_failed: bool = False) -> None:
     """Update embeddings for messages"""
     async def run_update() -> None:
-        processor = ContentProcessor()
+        processor = ContentProcessor(concurrency=concurrency, adaptive=adaptive)
         if model:
             processor.embedding_service.embedding_model = model
+            processor.follow_active_model = False
+        if retry_failed:
+            retried = await processor.retry_failed_jobs()
+            click.echo(f"Requeued {retried:,} failed jobs")
 
-        total = await processor.count_pending_embeddings(force=force)
+        await processor.enqueue_jobs(force=force)
+        total = await processor.count_pending_embeddings()
         if total == 0:
             click.echo("No messages need embedding updates")
             return
 
         with click.progressbar(length=total, label='Updating embeddings') as bar:
-            async for processed in processor.update_embeddings(
-                batch_size=batch_size,
-                force=force
-            ):
+            async for processed in processor.run_worker(batch_size=batch_size):
                 bar.update(processed)
 
-    asyncio.run(run_update())
+        stats = processor.stats
+        click.echo(f"Embedded {stats['embedded']:,} messages, {stats['failed']:,} failed, "
+                   f"{stats['skipped']:,} empty")
+
+        cache = processor.embedding_service.cache
+        if cache is not None:
+            stats = cache.stats
+            click.echo(f"Embedding cache: {stats['hits']:,} hits, {stats['misses']:,} misses "
+                       f"({stats['hit_rate']*100:.1f}% hit rate)")
+
+    run_async(run_update())
+
+@embeddings.command()
+@click.option('--batch-size', default=50, help='Messages claimed per batch')
+@click.option('--lease', 'lease_seconds', type=float, help='Seconds a claim lasts before other workers may take it over')
+@click.option('--poll', type=float, help='Keep running, checking for new work every POLL seconds')
+@click.option('--worker-id', help='Name of this worker in the lease table')
+@click.option('--model', help='Override default embedding model')
+@click.option('--concurrency', type=int, help='Embedding requests kept in flight')
+@click.option('--adaptive/--no-adaptive', default=None, help='Adapt concurrency to server latency and errors (AIMD)')
+def worker(batch_size: int, lease_seconds: Optional[float] = None, poll: Optional[float] = None,
+           worker_id: Optional[str] = None, model: Optional[str] = None,
+           concurrency: Optional[int] = None, adaptive: Optional[bool] = None) -> None:
+    """Work through queued embedding jobs; run one per core or machine against the same database"""
+    async def run() -> None:
+        processor = ContentProcessor(concurrency=concurrency, adaptive=adaptive)
+        if model:
+            processor.embedding_service.embedding_model = model
+            processor.follow_active_model = False
+
+        async for claimed in processor.run_worker(
+            batch_size=batch_size,
+            lease_seconds=lease_seconds,
+            worker_id=worker_id,
+            poll=poll
+        ):
+            stats = processor.stats
+            click.echo(f"[{processor.worker_id}] claimed {claimed:,}; "
+                       f"{stats['embedded']:,} embedded, {stats['failed']:,} failed so far")
+
+        stats = processor.stats
+        click.echo(f"Worker done: embedded {stats['embedded']:,} messages, {stats['failed']:,} failed, "
+                   f"{stats['skipped']:,} empty")
+
+    run_async(run())
+
+@embeddings.command()
+@click.option('--force', is_flag=True, help='Queue every message again, including embedded ones')
+def enqueue(force: bool) -> None:
+    """Queue embedding jobs for messages that need them"""
+    async def run() -> None:
+        processor = ContentProcessor()
+        queued = await processor.enqueue_jobs(force=force)
+        click.echo(f"Queued {queued:,} embedding jobs")
+
+    run_async(run())
+
+@embeddings.command()
+@click.argument('conversation_id', type=click.UUID)
+@click.option('--priority', type=int, default=10, help='Priority for the conversation (higher runs first)')
+def prioritize(conversation_id, priority: int) -> None:
+    """Embed a conversation's queued messages ahead of others"""
+    async def run() -> None:
+        processor = ContentProcessor()
+        updated = await processor.prioritize(conversation_id, priority)
+        click.echo(f"Set priority {priority} on {updated:,} jobs")
+
+    run_async(run())
+
+@embeddings.command()
+@click.option('--rebuild', is_flag=True, help='Recompute every conversation centroid from its messages')
+def centroids(rebuild: bool) -> None:
+    """Show or rebuild the conversation centroids used for similar-conversation search"""
+    from sqlalchemy import func, select
+    from humanizer.db.models import ConversationEmbedding
+    from humanizer.core.embedding.centroids import refresh_conversation_embeddings
+    async def run() -> None:
+        async with get_session() as session:
+            if rebuild:
+                written = await refresh_conversation_embeddings(session)
+                click.echo(f"Rebuilt {written:,} conversation centroids")
+            count, messages = (await session.execute(
+                select(func.count(), func.coalesce(func.sum(ConversationEmbedding.message_count), 0))
+            )).one()
+            click.echo(f"Conversations with centroids: {count:,} ({messages:,} embedded messages)")
+
+    run_async(run())
+
+@embeddings.command()
+@click.option('--batch-size', default=5000, help='Messages checked per transaction')
+def normalize(batch_size: int) -> None:
+    """Rescale stored embeddings to unit length and rebuild conversation centroids"""
+    async def run() -> None:
+        processor = ContentProcessor()
+        scanned = fixed = 0
+        async for batch_scanned, batch_fixed in processor.renormalize_embeddings(batch_size):
+            scanned += batch_scanned
+            fixed += batch_fixed
+            click.echo(f"Checked {scanned:,} embeddings, rescaled {fixed:,}")
+        click.echo(f"Done: rescaled {fixed:,} of {scanned:,} embeddings")
+
+    run_async(run())
+
+@embeddings.command()
+@click.option('--clear', is_flag=True, help='Remove every cached embedding')
+def cache(clear: bool) -> None:
+    """Show or clear the on-disk embedding cache"""
+    from humanizer.core.embedding.cache import get_embedding_cache
+    embedding_cache = get_embedding_cache()
+    if embedding_cache is None:
+        click.echo("Embedding cache is disabled")
+        return
+    if clear:
+        embedding_cache.clear()
+        click.echo("Embedding cache cleared")
+    stats = embedding_cache.stats
+    click.echo(f"Path: {embedding_cache.path}")
+    click.echo(f"Size: {stats['bytes'] / 1024 / 1024:.1f} MB of {stats['max_bytes'] / 1024 / 1024:.0f} MB")
 
 @embeddings.command()
 def status():
@@ -48,16 +171,127 @@ def status():
         processor = ContentProcessor()
         stats = await processor.get_embedding_stats()
 
-        click.echo("\nEmbedding Status")
+        states = stats['states']
+        total = sum(states.values())
+
+        click.echo("\nEmbedding Queue")
         click.echo("=" * 40)
-        click.echo(f"Total Messages: {stats['total']:,}")
-        click.echo(f"With Embeddings: {stats['embedded']:,}")
-        click.echo(f"Pending: {stats['pending']:,}")
-        if stats['total'] > 0:
-            click.echo(f"Progress: {stats['embedded']/stats['total']*100:.1f}%")
-        click.echo(f"\nCurrent Model: {processor.embedding_service.embedding_model}")
+        click.echo(f"Pending: {states['pending']:,} ({stats['ready']:,} ready, {stats['retrying']:,} retrying)")
+        click.echo(f"In Flight: {states['in_flight']:,} ({stats['expired_leases']:,} with expired leases)")
+        click.echo(f"Done: {states['done']:,}")
+        click.echo(f"Failed: {states['failed']:,}")
+        if total > 0:
+            click.echo(f"Progress: {states['done']/total*100:.1f}%")
+        click.echo(f"Throughput: {stats['per_minute_5m']:,.1f}/min (5 min), {stats['per_minute_1h']:,.1f}/min (1 hour)")
+
+        if stats['failures']:
+            click.echo("\nFailures")
+            click.echo("-" * 40)
+            for failure in stats['failures']:
+                click.echo(f"{failure['kind']}: {failure['jobs']:,}")
+                if failure['example']:
+                    click.echo(f"  e.g. {failure['example'][:100]}")
+
+        from humanizer.core.embedding.migration import active_embedding_model
+        async with get_session() as session:
+            click.echo(f"\nCurrent Model: {await active_embedding_model(session)}")
+
+    run_async(run())
+
+@embeddings.group()
+def migrate() -> None:
+    """Move to another embedding model without disturbing search"""
+    pass
+
+@migrate.command(name='start')
+@click.argument('model')
+def migrate_start(model: str) -> None:
+    """Register MODEL for a background backfill"""
+    from humanizer.core.embedding.migration import ModelMigration
+    async def run() -> None:
+        active = await ModelMigration(model).start()
+        click.echo(f"{model} registered; search keeps using {active} until the cutover")
+    run_async(run())
+
+@migrate.command(name='backfill')
+@click.argument('model')
+@click.option('--batch-size', default=100, help='Messages embedded per batch')
+@click.option('--concurrency', type=int, help='Embedding requests kept in flight')
+@click.option('--adaptive/--no-adaptive', default=None, help='Adapt concurrency to server latency and errors (AIMD)')
+def migrate_backfill(model: str, batch_size: int, concurrency: Optional[int], adaptive: Optional[bool]) -> None:
+    """Embed every message with MODEL into the shadow store (resumable)"""
+    from humanizer.core.embedding.migration import ModelMigration
+    async def run() -> None:
+        migration = ModelMigration(model, concurrency=concurrency, adaptive=adaptive)
+        total = await migration.count_missing()
+        if total == 0:
+            click.echo(f"Every message already has a {model} vector")
+            return
+        embedded = failed = 0
+        with click.progressbar(length=total, label=f'Backfilling {model}') as bar:
+            async for batch_embedded, batch_failed in migration.backfill(batch_size=batch_size):
+                embedded += batch_embedded
+                failed += batch_failed
+                bar.update(batch_embedded + batch_failed)
+        click.echo(f"Embedded {embedded:,} messages, {failed:,} failed (run again to retry them)")
+    run_async(run())
+
+@migrate.command(name='cutover')
+@click.argument('model')
+@click.option('--batch-size', default=5000, help='Rows staged per transaction')
+@click.option('--lock-timeout', default='10s', help='Give up the swap if the table stays locked this long')
+@click.option('--allow-missing', is_flag=True, help='Cut over even if some messages have no vector yet (they are re-queued)')
+@click.option('--maintenance-work-mem', help='Memory for the index builds, e.g. 2GB')
+def migrate_cutover(model: str, batch_size: int, lock_timeout: str, allow_missing: bool,
+                    maintenance_work_mem: Optional[str]) -> None:
+    """Make MODEL's vectors live in one short transaction"""
+    from humanizer.core.embedding.migration import ModelMigration
+    async def run() -> None:
+        async for stage, count in ModelMigration(model).cutover(
+            batch_size=batch_size,
+            lock_timeout=lock_timeout,
+            allow_missing=allow_missing,
+            maintenance_work_mem=maintenance_work_mem
+        ):
+            if stage == 'staged':
+                click.echo(f"Staged {count:,} vectors")
+            elif stage == 'indexed':
+                click.echo(f"Built {count} shadow indexes")
+            else:
+                click.echo(f"{model} is live; recomputed {count:,} conversation centroids")
+        queued = await ContentProcessor().enqueue_jobs()
+        if queued:
+            click.echo(f"Queued {queued:,} messages without a {model} vector")
+        click.echo("Previous vectors are kept until 'humanizer embeddings migrate cleanup'")
+    run_async(run())
+
+@migrate.command(name='status')
+def migrate_status() -> None:
+    """Show embedding models and backfill progress"""
+    from humanizer.core.embedding.migration import migration_status
+    async def run() -> None:
+        status = await migration_status()
+        click.echo(f"Active model: {status['active']}")
+        for model in status['models']:
+            line = f"{model['model']}: {model['state']}"
+            if model['state'] == 'backfill':
+                line += f", {model['vectors']:,}/{status['messages']:,} messages embedded"
+            click.echo(line)
+        if status['leftover_columns']:
+            click.echo(f"Left over columns: {', '.join(status['leftover_columns'])}")
+    run_async(run())
 
-    asyncio.run(run())
+@migrate.command(name='cleanup')
+@click.option('--batch-size', default=10000, help='Staged vectors deleted per transaction')
+def migrate_cleanup(batch_size: int) -> None:
+    """Drop retired vectors and staged vectors that are live now"""
+    from humanizer.core.embedding.migration import cleanup_migrations
+    async def run() -> None:
+        deleted = 0
+        async for deleted in cleanup_migrations(batch_size=batch_size):
+            click.echo(f"Deleted {deleted:,} staged vectors")
+        click.echo(f"Cleanup done ({deleted:,} staged vectors deleted)")
+    run_async(run())
 
 @embeddings.command()
 def setup():
@@ -80,26 +314,29 @@ def setup():
 
             # Verify database setup
             async with get_session() as session:
-                # Check if vector normalization is set up
+                # Embeddings are normalized before they are written; the trigger only validates
                 result = await session.execute(text("""
                     SELECT EXISTS (
                         SELECT 1
                         FROM pg_trigger
-                        WHERE tgname = 'normalize_embedding'
+                        WHERE tgname = 'validate_embedding'
                     );
                 """))
                 has_trigger = result.scalar()
 
+                click.echo(f"\nEmbedding trigger mode: {settings.embedding_trigger_mode}")
                 if has_trigger:
-                    click.echo("\n✓ Vector normalization trigger is set up")
+                    click.echo("✓ Unit-norm validation trigger is installed")
+                elif settings.embedding_trigger_mode == 'validate':
+                    click.echo("⚠ Unit-norm validation trigger is missing")
+                    click.echo("Run 'humanizer db migrate' to install it")
                 else:
-                    click.echo("\n⚠ Vector normalization trigger is missing")
-                    click.echo("Run 'humanizer db migrate' to set up triggers")
+                    click.echo("✓ No embedding trigger installed (vectors are normalized by the processor)")
 
         except Exception as e:
             click.echo(f"\nError: {str(e)}")
 
-    asyncio.run(run())
+    run_async(run())
 
 @embeddings.command()
 def verify_model() -> None:
@@ -120,7 +357,7 @@ def verify_model() -> None:
         except Exception as e:
             click.echo(f"✗ Model verification failed: {e}")
 
-    asyncio.run(run())
+    run_async(run())
 
 @embeddings.command()
 def test():
@@ -143,4 +380,4 @@ def test():
         except Exception as e:
             click.echo(f"Error: {str(e)}")
 
-    asyncio.run(run())
+    run_async(run())
@@ -1,11 +1,10 @@
 # src/humanizer/cli/export_markdown_cmd.py
 import click
-import asyncio
 import json
 from uuid import UUID
 from typing import List
 from sqlalchemy import select
-from humanizer.db.session import get_session
+from humanizer.db.session import get_session, run_async
 from humanizer.db.models import Message, Content
 
 @click.group(name='export')
@@ -56,7 +55,7 @@ def export_markdown(uuids: List[str], show_tools: bool, show_json: bool):
                     else:
                         click.echo(f"UUID {uid} not found as message or conversation.", err=True)
 
-    asyncio.run(run())
+    run_async(run())
 
 async def print_message_markdown(message: Message, conversation: Content, show_tools: bool, show_json: bool):
     # Extract role
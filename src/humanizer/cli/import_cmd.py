@@ -1,10 +1,10 @@
 # src/humanizer/cli/import_cmd.py
-import asyncio
 import click
 from pathlib import Path
 from humanizer.core.content.importer import ConversationImporter
 from humanizer.db import ensure_database
 from humanizer.utils.logging import get_logger
+from humanizer.db.session import run_async
 
 logger = get_logger(__name__)
 
@@ -12,7 +12,15 @@ logger = get_logger(__name__)
 @click.argument('file_path', type=click.Path(exists=True))
 @click.option('--verbose', is_flag=True, help='Show detailed import information')
 @click.option('--batch-size', default=100, help='Number of conversations per batch')
-def import_conversations(file_path: str, verbose: bool, batch_size: int):
+@click.option('--bulk', is_flag=True, help='Use COPY-based bulk ingest (batch-size conversations per transaction)')
+@click.option('--writers', default=2, help='Concurrent database writers for bulk ingest')
+@click.option('--queue-size', default=4, help='Parsed batches buffered ahead of the writers')
+@click.option('--parse-workers', default=1, help='Processes used to parse a conversations.json in parallel')
+@click.option('--incremental', is_flag=True, help='Skip unchanged conversations and add only new messages (implies --bulk)')
+@click.option('--resume', is_flag=True, help='Continue an interrupted import of the same archive (implies --bulk)')
+def import_conversations(file_path: str, verbose: bool, batch_size: int, bulk: bool,
+                         writers: int, queue_size: int, parse_workers: int, incremental: bool,
+                         resume: bool):
     """Import conversations from OpenAI archive"""
     async def run():
         try:
@@ -21,7 +29,16 @@ def import_conversations(file_path: str, verbose: bool, batch_size: int):
 
             # Import conversations
             importer = ConversationImporter()
-            imported_ids = await importer.import_file(Path(file_path))
+            imported_ids = await importer.import_file(
+                Path(file_path),
+                batch_size=batch_size,
+                bulk=bulk,
+                writers=writers,
+                queue_size=queue_size,
+                parse_workers=parse_workers,
+                incremental=incremental,
+                resume=resume
+            )
 
             if verbose:
                 click.echo(f"\nImported {len(imported_ids)} conversations:")
@@ -30,11 +47,25 @@ def import_conversations(file_path: str, verbose: bool, batch_size: int):
             else:
                 click.echo(f"Successfully imported {len(imported_ids)} conversations")
 
+            stats = importer.stats
+            if resume and stats['resumed_from']:
+                click.echo(f"Resumed after {int(stats['resumed_from']):,} archive entries")
+            if incremental:
+                click.echo(
+                    f"Unchanged: {int(stats['skipped']):,}, updated: {int(stats['updated']):,}"
+                )
+            if stats['elapsed'] > 0:
+                rows = stats['conversations'] + stats['messages']
+                click.echo(
+                    f"Wrote {int(stats['messages']):,} messages in {stats['elapsed']:.1f}s "
+                    f"({rows / stats['elapsed']:,.0f} rows/sec)"
+                )
+
         except Exception as e:
             logger.error(f"Import failed: {str(e)}")
             raise
 
-    asyncio.run(run())
+    run_async(run())
 
 if __name__ == '__main__':
     import_conversations()
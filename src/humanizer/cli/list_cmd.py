@@ -1,8 +1,7 @@
 # src/humanizer/cli/list_cmd.py
 import click
-import asyncio
 from sqlalchemy import select, func
-from humanizer.db.session import get_session
+from humanizer.db.session import get_session, run_async
 from humanizer.db.models import Content, Message
 from humanizer.utils.logging import get_logger
 from tabulate import tabulate  # Add tabulate to your dependencies
@@ -99,4 +98,4 @@ def list_conversations(sort: str, limit: int, format: str):
                 click.echo(json.dumps(data, indent=2))
 
     # Run the async function
-    asyncio.run(run())
+    run_async(run())
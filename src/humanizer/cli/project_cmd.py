@@ -1,12 +1,11 @@
 # src/humanizer/cli/project_cmd.py
 import click
-import asyncio
 from pathlib import Path
 
 from sqlalchemy import func, select
 from humanizer.utils.project_manager import ProjectManager, ChangeType
 from humanizer.utils.logging import get_logger
-from humanizer.db.session import get_session
+from humanizer.db.session import get_session, run_async
 from humanizer.db.models import Content, Message
 
 logger = get_logger(__name__)
@@ -93,7 +92,7 @@ def status():
             else:
                 click.echo("Embedding Progress: N/A (no messages)")
 
-    asyncio.run(run())
+    run_async(run())
 
 if __name__ == '__main__':
     project()
@@ -1,7 +1,9 @@
 # src/humanizer/cli/search_cmd.py
 import click
-import asyncio
-from humanizer.core.search.vector import VectorSearch
+from typing import Optional
+from humanizer.core.search.vector import COARSE_MODES, VectorSearch
+from humanizer.db.indexes import RECALL_PROFILES
+from humanizer.db.session import run_async
 from humanizer.utils.logging import get_logger
 from tabulate import tabulate
 
@@ -19,7 +21,13 @@ def search():
 @click.option('--role', help='Filter by role (user/assistant)')
 @click.option('--uuids-only', is_flag=True, help='Output only UUIDs of results')  # Added this line
 @click.option('--format', type=click.Choice(['text', 'json', 'table']), default='table')
-def semantic(query: str, limit: int, min_similarity: float, role: str, uuids_only: bool, format: str):
+@click.option('--cache-stats', is_flag=True, help='Print query embedding cache statistics')
+@click.option('--recall', type=click.Choice(list(RECALL_PROFILES)), help='ANN recall/latency profile')
+@click.option('--coarse', type=click.Choice(list(COARSE_MODES)),
+              help='Two-stage search: binary-quantized or short-prefix candidates, reranked by exact distance')
+@click.option('--oversample', type=int, help='Coarse candidates per result to rerank (default from settings, 10)')
+def semantic(query: str, limit: int, min_similarity: float, role: str, uuids_only: bool, format: str,
+             cache_stats: bool, recall: Optional[str], coarse: Optional[str], oversample: Optional[int]):
     """Semantic search using vector similarity"""
     async def run():
         searcher = VectorSearch()
@@ -27,9 +35,20 @@ def semantic(query: str, limit: int, min_similarity: float, role: str, uuids_onl
             query,
             limit=limit,
             min_similarity=min_similarity,
-            role=role
+            role=role,
+            recall=recall,
+            coarse=coarse,
+            oversample=oversample
         )
 
+        if cache_stats:
+            stats = searcher.cache_stats()
+            click.echo(
+                f"Query cache: {stats['hits']} memory hits, {stats['persistent_hits']} disk hits, "
+                f"{stats['misses']} misses ({stats['size']}/{stats['max_size']} entries)",
+                err=True
+            )
+
         if uuids_only:
             # Just print UUIDs line by line
             for r in results:
@@ -60,7 +79,132 @@ def semantic(query: str, limit: int, min_similarity: float, role: str, uuids_onl
                 click.echo(f"Conversation: {r['conversation_id']}")
                 click.echo("-" * 80)
 
-    asyncio.run(run())
+    run_async(run())
+
+@search.command(name='coarse-recall')
+@click.argument('queries', nargs=-1)
+@click.option('--coarse', type=click.Choice(list(COARSE_MODES)), default='binary', help='First stage to measure')
+@click.option('--sample', default=20, help='Random stored embeddings to use as queries when none are given')
+@click.option('--k', default=10, help='Results compared per query')
+@click.option('--oversample', type=int, help='Coarse candidates per result to rerank (default from settings, 10)')
+@click.option('--recall', type=click.Choice(list(RECALL_PROFILES)), help='ANN recall/latency profile for the two-stage search')
+def coarse_recall(queries, coarse: str, sample: int, k: int, oversample: Optional[int], recall: Optional[str]):
+    """Compare two-stage (binary or prefix) search with exact search (recall@k and latency)"""
+    async def run():
+        report = await VectorSearch().coarse_recall(
+            coarse=coarse,
+            queries=queries,
+            sample=sample,
+            k=k,
+            oversample=oversample,
+            recall=recall
+        )
+        if not report['queries']:
+            click.echo("No embedded messages to compare against")
+            return
+        click.echo(f"{report['coarse']} search, queries: {report['queries']}, "
+                   f"k = {report['k']}, oversample = {report['oversample']}")
+        click.echo(f"Recall@{report['k']}: {report['recall']:.3f} (worst query {report['min_recall']:.3f})")
+        click.echo(f"Exact search:     {report['exact_ms']:.1f} ms/query")
+        click.echo(f"Two-stage search: {report['coarse_ms']:.1f} ms/query")
+
+    run_async(run())
+
+@search.command()
+@click.argument('query')
+@click.option('--limit', default=10, help='Number of results')
+@click.option('--vector-weight', default=1.0, type=float, help='Weight of the vector ranking in the fusion')
+@click.option('--text-weight', default=1.0, type=float, help='Weight of the full-text ranking in the fusion')
+@click.option('--k', 'rrf_k', type=int, help='Reciprocal rank fusion constant (default from settings, 60)')
+@click.option('--candidates', type=int, help='Results taken from each ranking before fusion')
+@click.option('--role', help='Filter by role (user/assistant)')
+@click.option('--format', type=click.Choice(['json', 'table']), default='table')
+@click.option('--recall', type=click.Choice(list(RECALL_PROFILES)), help='ANN recall/latency profile')
+def hybrid(query: str, limit: int, vector_weight: float, text_weight: float, rrf_k: Optional[int],
+           candidates: Optional[int], role: Optional[str], format: str, recall: Optional[str]):
+    """Search combining vector similarity and full-text rank (reciprocal rank fusion)"""
+    async def run():
+        from humanizer.core.search.hybrid import HybridSearch
+        results = await HybridSearch().search(
+            query,
+            limit=limit,
+            vector_weight=vector_weight,
+            text_weight=text_weight,
+            k=rrf_k,
+            candidates=candidates,
+            role=role,
+            recall=recall
+        )
+
+        if format == 'json':
+            import json
+            click.echo(json.dumps(results, indent=2, default=str))
+            return
+
+        headers = ['Score', 'Similarity', 'Text Rank', 'Role', 'Content']
+        rows = [
+            (
+                f"{r['score']:.4f}",
+                f"{r['similarity']:.3f} (#{r['vector_position']})" if r['similarity'] is not None else '-',
+                f"{r['text_rank']:.3f} (#{r['text_position']})" if r['text_rank'] is not None else '-',
+                r['role'],
+                r['content'][:100] + '...'
+            )
+            for r in results
+        ]
+        click.echo(tabulate(rows, headers=headers, tablefmt='psql'))
+
+    run_async(run())
+
+@search.command()
+@click.option('--input', 'input_file', type=click.File('r'), required=True,
+              help='JSONL file of queries: a string or {"query": ..., "id": ...} per line ("-" for stdin)')
+@click.option('--output', 'output_file', type=click.File('w'), default='-', help='NDJSON output file (default stdout)')
+@click.option('--batch-size', default=64, help='Queries embedded and searched per statement')
+@click.option('--limit', default=10, help='Results per query')
+@click.option('--min-similarity', default=0.7, type=float, help='Minimum similarity score')
+@click.option('--role', help='Filter by role (user/assistant)')
+@click.option('--recall', type=click.Choice(list(RECALL_PROFILES)), help='ANN recall/latency profile')
+def batch(input_file, output_file, batch_size: int, limit: int, min_similarity: float,
+          role: Optional[str], recall: Optional[str]):
+    """Run many semantic searches, writing one NDJSON line of results per query"""
+    import json
+
+    def read_queries():
+        for line_number, line in enumerate(input_file, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {'query': item}
+            if not isinstance(item, dict) or not isinstance(item.get('query'), str):
+                raise click.ClickException(f"Line {line_number}: expected a string or an object with a 'query'")
+            item.setdefault('id', line_number)
+            yield item
+
+    async def run():
+        searcher = VectorSearch()
+        items = read_queries()
+        while True:
+            chunk = [item for _, item in zip(range(batch_size), items)]
+            if not chunk:
+                break
+            async for i, results in searcher.search_many(
+                [item['query'] for item in chunk],
+                limit=limit,
+                min_similarity=min_similarity,
+                role=role,
+                recall=recall
+            ):
+                record = {'id': chunk[i]['id'], 'query': chunk[i]['query']}
+                if results is None:
+                    record['error'] = 'Could not embed query'
+                else:
+                    record['results'] = results
+                output_file.write(json.dumps(record, default=str) + '\n')
+            output_file.flush()
+
+    run_async(run())
 
 @search.command()
 @click.argument('conversation_id')
@@ -82,40 +226,51 @@ def conversation(conversation_id: str, similar: bool, limit: int):
             click.echo(f"ID: {r['id']}")
             click.echo("-" * 80)
 
-    asyncio.run(run())
+    run_async(run())
 
 @search.command()
 @click.argument('text')
-@click.option('--case-sensitive/--no-case-sensitive', default=False)
-def text(text: str, case_sensitive: bool):
+@click.option('--mode', type=click.Choice(['fulltext', 'substring', 'fuzzy']), default='fulltext',
+              help='Ranked full-text search, literal substring match, or trigram similarity')
+@click.option('--limit', default=20, help='Number of results')
+@click.option('--after', help='Cursor printed with the previous page (fulltext mode)')
+@click.option('--role', help='Filter by role (user/assistant)')
+@click.option('--case-sensitive/--no-case-sensitive', default=False, help='Substring mode only')
+@click.option('--threshold', type=float, help='Fuzzy mode: minimum word similarity (pg_trgm default 0.6)')
+def text(text: str, mode: str, limit: int, after: Optional[str], role: Optional[str],
+         case_sensitive: bool, threshold: Optional[float]):
     """Search for text in conversation content"""
     async def run():
-        from sqlalchemy import select
-        from humanizer.db.models import Content, Message
-        from humanizer.db.session import get_session
-
-        async with get_session() as session:
-            query = (
-                select(Content.title, Message.role, Message.content)
-                .join(Message, Content.id == Message.conversation_id)
-            )
+        from humanizer.core.search.text import TextSearch
+        searcher = TextSearch()
 
-            if case_sensitive:
-                query = query.where(Message.content.like(f'%{text}%'))
-            else:
-                query = query.where(Message.content.ilike(f'%{text}%'))
-
-            results = await session.execute(query)
-            rows = results.all()
-
-            if rows:
-                headers = ['Title', 'Role', 'Matching Content']
-                table_rows = [
-                    (title, role, content[:100] + '...')
-                    for title, role, content in rows
-                ]
-                click.echo(tabulate(table_rows, headers=headers, tablefmt='psql'))
-            else:
+        if mode == 'fulltext':
+            results = await searcher.search(text, limit=limit, after=after, role=role)
+            if not results:
                 click.echo("No matches found")
+                return
+            headers = ['Rank', 'Title', 'Role', 'Snippet']
+            table_rows = [
+                (f"{r['rank']:.3f}", r['title'], r['role'], r['snippet'])
+                for r in results
+            ]
+            click.echo(tabulate(table_rows, headers=headers, tablefmt='psql'))
+            if len(results) == limit:
+                click.echo(f"\nNext page: --after {results[-1]['cursor']}")
+            return
+
+        # Substring and fuzzy matches are printed as they arrive from the server
+        if mode == 'substring':
+            results = searcher.substring(text, limit=limit, case_sensitive=case_sensitive, role=role)
+        else:
+            results = searcher.fuzzy(text, limit=limit, threshold=threshold, role=role)
+        found = 0
+        async for r in results:
+            found += 1
+            score = f"{r['similarity']:.3f} " if 'similarity' in r else ''
+            snippet = ' '.join(r['snippet'].split())
+            click.echo(f"{score}[{r['role']}] {r['title']}: {snippet}")
+        if not found:
+            click.echo("No matches found")
 
-    asyncio.run(run())
+    run_async(run())
@@ -10,10 +10,53 @@ class Settings(BaseModel):
     postgres_key: Optional[str] = Field(title="Postgres Key", default=None, description="Postgres encryption key")
     postgres_password_encrypted: Optional[str] = Field(title="Encrypted Password", default=None, description="Encrypted postgres password")
 
+    # Connection pool
+    humanizer_db_pool_size: int = Field(title="Pool Size", default=5, description="Persistent connections kept per engine")
+    humanizer_db_max_overflow: int = Field(title="Pool Overflow", default=10, description="Extra connections allowed beyond the pool size")
+    humanizer_db_pool_recycle: int = Field(title="Pool Recycle", default=1800, description="Seconds before a pooled connection is recycled (-1 disables)")
+    humanizer_db_pool_pre_ping: bool = Field(title="Pool Pre-Ping", default=True, description="Test pooled connections before use")
+
     # Application settings
     ollama_base_url: str = Field(title="Ollama URL", default="http://localhost:11434", description="Ollama API base URL")
     embedding_model: str = Field(title="Model", default="nomic-embed-text", description="Embedding model name")
     embedding_dimensions: int = Field(title="Dimensions", default=512, description="Embedding dimensions")
+    embedding_short_dimensions: int = Field(title="Short Dimensions", default=128, description="Length of the Matryoshka prefix kept for coarse search; 0 disables it")
+    embedding_storage: str = Field(title="Embedding Storage", default="vector", description="Column type of message embeddings: vector (float32) or halfvec (float16, half the size)")
+    embedding_batch_max_items: int = Field(title="Batch Items", default=32, description="Maximum texts per Ollama embed request")
+    embedding_batch_max_chars: int = Field(title="Batch Characters", default=64000, description="Maximum total characters per Ollama embed request")
+    embedding_concurrency: int = Field(title="Concurrency", default=4, description="Embedding requests kept in flight")
+    embedding_max_concurrency: int = Field(title="Max Concurrency", default=32, description="Upper bound for adaptive embedding concurrency")
+    embedding_adaptive_concurrency: bool = Field(title="Adaptive Concurrency", default=False, description="Tune embedding concurrency with AIMD on latency and errors")
+    embedding_cache_enabled: bool = Field(title="Embedding Cache", default=True, description="Cache embeddings on disk by content hash")
+    embedding_cache_path: Path = Field(
+        title="Embedding Cache Path",
+        default=Path("~/.humanizer/embedding_cache.sqlite3").expanduser(),
+        description="Location of the on-disk embedding cache"
+    )
+    embedding_cache_max_mb: int = Field(title="Embedding Cache Size", default=1024, description="Size bound of the embedding cache in megabytes")
+    embedding_trigger_mode: str = Field(title="Embedding Trigger", default="off", description="Database check on written embeddings: off, or validate (reject vectors that are not unit length)")
+    embedding_max_attempts: int = Field(title="Max Attempts", default=3, description="Attempts before an embedding job is marked failed")
+    embedding_lease_seconds: float = Field(title="Lease Duration", default=300.0, description="Seconds a worker's claim on a batch lasts before others may take it over")
+    embedding_retry_backoff: float = Field(title="Retry Backoff", default=30.0, description="Seconds before a failed job's first retry, doubling per attempt")
+    embedding_retry_backoff_max: float = Field(title="Max Retry Backoff", default=3600.0, description="Upper bound on the delay between retries of a job")
+    embedding_recent_days: int = Field(title="Recent Days", default=30, description="Conversations updated within this many days are embedded first")
+
+    # Search
+    search_recall: str = Field(title="Search Recall", default="balanced", description="ANN recall/latency profile: fast, balanced, accurate or exact")
+    search_query_cache_size: int = Field(title="Query Cache Size", default=256, description="Query embeddings kept in memory")
+    search_query_cache_ttl: float = Field(title="Query Cache TTL", default=3600.0, description="Seconds a cached query embedding stays valid in memory")
+    search_active_model_ttl: float = Field(title="Active Model TTL", default=30.0, description="Seconds search reuses its lookup of the active embedding model")
+    search_query_cache_persistent: bool = Field(title="Persistent Query Cache", default=True, description="Back the query cache with the on-disk embedding cache")
+    search_hybrid_candidates: int = Field(title="Hybrid Candidates", default=50, description="Results taken from each of the vector and full-text rankings before fusion")
+    search_coarse_oversample: int = Field(title="Coarse Oversample", default=10, description="Candidates per requested result fetched by binary or prefix search before exact reranking")
+    search_rrf_k: int = Field(title="RRF k", default=60, description="Reciprocal rank fusion constant; larger values flatten the rank weighting")
+
+    # Ollama HTTP client
+    ollama_max_connections: int = Field(title="Ollama Connections", default=16, description="Maximum concurrent connections to Ollama")
+    ollama_max_keepalive: int = Field(title="Ollama Keep-Alive", default=8, description="Idle connections kept open to Ollama")
+    ollama_keepalive_expiry: float = Field(title="Keep-Alive Expiry", default=30.0, description="Seconds an idle Ollama connection is kept")
+    ollama_connect_timeout: float = Field(title="Connect Timeout", default=5.0, description="Seconds to wait when connecting to Ollama")
+    ollama_timeout: float = Field(title="Request Timeout", default=30.0, description="Seconds to wait for an Ollama response")
 
     # Logging
     humanizer_log_level: str = Field(title="Log Level", default="INFO", description="Logging level")
@@ -1,11 +1,11 @@
 # src/humanizer/core/content/analyzer.py
 from typing import List, Tuple
-import math
 from uuid import UUID
 from sqlalchemy import select
 from humanizer.db.session import get_session
 from humanizer.db.models import Message
 from humanizer.core.embedding.service import EmbeddingService
+from humanizer.core.embedding.centroids import get_conversation_embedding
 
 class ConversationAnalyzer:
     def __init__(self):
@@ -17,53 +17,22 @@ class ConversationAnalyzer:
         weighting: str = "average"
     ) -> List[float]:
         """
-        Compute a single vector representing the entire conversation.
+        Get a single vector representing the entire conversation.
 
         Parameters:
             conversation_id: UUID of the conversation
             weighting: "average" or another scheme you might implement like TF-IDF
 
         Returns:
-            A single embedding vector as a list of floats representing the conversation.
+            The normalized mean of the conversation's message embeddings, read from
+            conversation_embeddings (a zero vector if nothing is embedded yet).
         """
         async with get_session() as session:
-            # Fetch embeddings of all messages in the conversation
-            result = await session.execute(
-                select(Message.embedding, Message.content)
-                .where(Message.conversation_id == conversation_id)
-                .where(Message.embedding.isnot(None))
-            )
-            rows = result.all()
+            embedding = await get_conversation_embedding(session, conversation_id)
 
-        if not rows:
-            # If no embeddings found, return a zero vector or raise an exception
+        if embedding is None:
             return [0.0] * self.embedding_service.embedding_dimensions
-
-        embeddings = [r[0] for r in rows]
-        contents = [r[1] for r in rows]
-
-        # Simple averaging
-        # embeddings is a list of lists: [[float], [float], ...]
-        # We assume all are normalized embeddings (or at least same dimension)
-        dim = len(embeddings[0])
-        sum_vec = [0.0] * dim
-        count = len(embeddings)
-
-        # Basic averaging approach
-        for emb in embeddings:
-            for i, val in enumerate(emb):
-                sum_vec[i] += val
-
-        # Divide by count to get the average
-        avg_vec = [v / count for v in sum_vec]
-
-        # If embeddings are normalized vectors, consider re-normalizing the final average
-        # to maintain a consistent scale:
-        norm = math.sqrt(sum(x * x for x in avg_vec))
-        if norm > 0:
-            avg_vec = [x / norm for x in avg_vec]
-
-        return avg_vec
+        return embedding
 
     async def find_most_characteristic_message(
             self,
@@ -77,35 +46,24 @@ class ConversationAnalyzer:
             Returns:
                 A tuple (message_content, similarity_score) for the most characteristic message.
             """
-            conversation_embedding = await self.get_conversation_embedding(conversation_id)
-
             async with get_session() as session:
-                # Retrieve messages and embeddings for this conversation
+                conversation_embedding = await get_conversation_embedding(session, conversation_id)
+                if conversation_embedding is None:
+                    raise ValueError("No embeddings found for this conversation.")
+
+                # Nearest message to the centroid, ranked in the database
+                distance = Message.embedding.cosine_distance(conversation_embedding)
                 result = await session.execute(
-                    select(Message.content, Message.embedding)
+                    select(Message.content, distance.label('distance'))
                     .where(Message.conversation_id == conversation_id)
                     .where(Message.embedding.isnot(None))
                     .where(Message.content.isnot(None))
+                    .order_by(distance)
+                    .limit(1)
                 )
-                messages = result.all()
+                best = result.first()
 
-            if not messages:
+            if best is None:
                 raise ValueError("No embeddings found for this conversation.")
 
-            # Compute cosine similarity
-            # cosine similarity = 1 - cosine_distance
-            # But we can compute directly: sim(u,v) = (u·v)/(||u||*||v||)
-            # Since we normalized average, and assuming messages are also normalized (due to triggers),
-            # similarity = dot product if both are normalized.
-
-            best_msg: str = messages[0][0]  # Initialize with first message content
-            best_sim: float = -1.0
-
-            for (content, emb) in messages:
-                # Dot product for similarity (assuming normalized)
-                sim = sum(a * b for a, b in zip(conversation_embedding, emb))
-                if sim > best_sim:
-                    best_sim = sim
-                    best_msg = content
-
-            return best_msg, best_sim
+            return best.content, 1 - best.distance
@@ -1,15 +1,29 @@
 # src/humanizer/core/content/importer.py
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from bisect import bisect_right
 from datetime import datetime
-from typing import List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from uuid import UUID, uuid4
 from pathlib import Path
 from humanizer.parsers.openai import OpenAIConversationParser
 from humanizer.db.models import Content, Message
-from humanizer.db.session import get_session
+from humanizer.db.session import get_session, get_raw_connection
 from humanizer.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Column order used by the COPY-based bulk ingest path
+CONTENT_COLUMNS = [
+    'id', 'original_id', 'content_hash', 'title', 'create_time', 'update_time', 'content_type', 'meta_info'
+]
+MESSAGE_COLUMNS = [
+    'id', 'conversation_id', 'original_id', 'role', 'content', 'name', 'tool_call_id', 'position', 'create_time'
+]
+
 def sanitize_text(text: str | None) -> str:
     """Sanitize text content for PostgreSQL."""
     if text is None:
@@ -20,20 +34,151 @@ def sanitize_text(text: str | None) -> str:
     text = text.encode('utf-8', 'replace').decode('utf-8')
     return text
 
+def conversation_hash(conversation: Dict[str, Any]) -> str:
+    """Stable hash of a parsed conversation's title and messages"""
+    payload = json.dumps(
+        [
+            conversation['title'],
+            [(msg['id'], msg['role'], msg['content'], msg['create_time']) for msg in conversation['messages']]
+        ],
+        ensure_ascii=False,
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8', 'replace')).hexdigest()
+
+def conversation_records(conversation: Dict[str, Any]) -> Tuple[Tuple, List[Tuple]]:
+    """Convert a parsed conversation into COPY-ready content and message records"""
+    content_id = uuid4()
+    content_record = (
+        content_id,
+        conversation['id'],
+        conversation_hash(conversation),
+        sanitize_text(conversation['title']),
+        datetime.fromtimestamp(conversation['create_time']),
+        datetime.fromtimestamp(conversation['update_time']),
+        'conversation',
+        json.dumps({
+            'original_id': conversation['id'],
+            'source': 'openai_export'
+        })
+    )
+    message_records = [
+        (
+            uuid4(),
+            content_id,
+            msg['id'],
+            sanitize_text(msg['role']),
+            sanitize_text(msg['content']),
+            sanitize_text(msg.get('name')),
+            sanitize_text(msg.get('tool_call_id')),
+            pos,
+            datetime.fromtimestamp(msg['create_time'])
+        )
+        for pos, msg in enumerate(conversation['messages'])
+    ]
+    return content_record, message_records
+
+def archive_fingerprint(path: Path, sample_bytes: int = 1024 * 1024) -> str:
+    """Cheap identity for an archive: its size plus a hash of its first and last megabyte"""
+    digest = hashlib.sha256()
+    size = path.stat().st_size
+    digest.update(str(size).encode())
+    with open(path, 'rb') as f:
+        digest.update(f.read(sample_bytes))
+        if size > sample_bytes:
+            f.seek(max(size - sample_bytes, sample_bytes))
+            digest.update(f.read(sample_bytes))
+    return digest.hexdigest()
+
+def _merge_spans(spans: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Sorted, disjoint union of [start, end) spans; touching spans are joined"""
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def _advance_position(position: int, spans: List[Tuple[int, int]]) -> int:
+    """Checkpoint position reached by following committed spans contiguous with it"""
+    for start, end in _merge_spans(spans):
+        if start > position:
+            break
+        position = max(position, end)
+    return position
+
 class ConversationImporter:
     """Handles importing OpenAI conversation archives"""
 
-    async def import_file(self, path: Path) -> List[UUID]:
-        """Import conversations from file"""
+    def __init__(self):
+        self.stats: Dict[str, float] = {
+            'conversations': 0,
+            'messages': 0,
+            'skipped': 0,
+            'updated': 0,
+            'resumed_from': 0,
+            'elapsed': 0.0
+        }
+        self.parse_workers = 1
+        self.incremental = False
+        self.fingerprint: Optional[str] = None
+        # Spans a previous run committed past the checkpoint position; a resume skips them
+        self._committed_spans: List[Tuple[int, int]] = []
+
+    def _already_committed(self, index: int) -> bool:
+        """Whether a previous run already committed the archive element at index"""
+        i = bisect_right(self._committed_spans, (index, float('inf'))) - 1
+        return i >= 0 and index < self._committed_spans[i][1]
+
+    def _conversations(self, parser: OpenAIConversationParser, start_index: int = 0) -> Iterator[Dict[str, Any]]:
+        """Iterate parsed conversations, fanning out to a process pool when parse_workers > 1"""
+        if self.parse_workers > 1:
+            return parser.parse_file_parallel(workers=self.parse_workers, start_index=start_index)
+        return parser.parse_file(start_index=start_index)
+
+    async def import_file(
+        self,
+        path: Path,
+        batch_size: int = 100,
+        bulk: bool = False,
+        writers: int = 2,
+        queue_size: int = 4,
+        parse_workers: int = 1,
+        incremental: bool = False,
+        resume: bool = False
+    ) -> List[UUID]:
+        """Import conversations from file.
+
+        With incremental=True, conversations already present (matched on original_id)
+        are skipped when unchanged; changed ones only get their new messages, so
+        existing rows and embeddings are kept. The bulk path records a checkpoint with
+        every batch; resume=True continues after the last committed conversation of a
+        previous run on the same archive. Incremental and resumed imports use the bulk path.
+        """
+        self.parse_workers = parse_workers
+        self.incremental = incremental
+        started = time.perf_counter()
+        try:
+            if bulk or incremental or resume:
+                return await self._import_bulk(path, batch_size, writers, queue_size, resume)
+            return await self._import_orm(path)
+        finally:
+            self.stats['elapsed'] = time.perf_counter() - started
+
+    async def _import_orm(self, path: Path) -> List[UUID]:
+        """Import conversations one ORM transaction at a time"""
         parser = OpenAIConversationParser(path)
         imported_ids = []
 
         try:
             async with get_session() as session:
-                for conversation in parser.parse_file():
+                for conversation in self._conversations(parser):
                     # Create content record
                     content = Content(
                         id=uuid4(),
+                        original_id=conversation['id'],
+                        content_hash=conversation_hash(conversation),
                         title=sanitize_text(conversation['title']),
                         create_time=datetime.fromtimestamp(conversation['create_time']),
                         update_time=datetime.fromtimestamp(conversation['update_time']),
@@ -50,6 +195,7 @@ class ConversationImporter:
                         message = Message(
                             id=uuid4(),
                             conversation_id=content.id,
+                            original_id=msg['id'],
                             role=sanitize_text(msg['role']),
                             content=sanitize_text(msg['content']),
                             name=sanitize_text(msg.get('name')),
@@ -64,6 +210,8 @@ class ConversationImporter:
 
                     # Commit after each conversation to avoid large transactions
                     await session.commit()
+                    self.stats['conversations'] += 1
+                    self.stats['messages'] += len(conversation['messages'])
 
                 logger.info(f"Successfully imported {len(imported_ids)} conversations")
 
@@ -72,3 +220,297 @@ class ConversationImporter:
             raise
 
         return imported_ids
+
+    async def _import_bulk(
+        self,
+        path: Path,
+        batch_size: int,
+        writers: int = 2,
+        queue_size: int = 4,
+        resume: bool = False
+    ) -> List[UUID]:
+        """Pipelined COPY ingest: parse in a worker thread, write with concurrent writer tasks.
+
+        The parser thread groups conversations into batches of batch_size and hands
+        them to a bounded queue; writers drain it, one transaction per batch. Once
+        queue_size batches are waiting the parser blocks, which caps memory no
+        matter how large the archive is.
+        """
+        writers = max(1, writers)
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        stop = threading.Event()
+        parser = OpenAIConversationParser(path)
+        imported_ids: List[UUID] = []
+        start_index = await self._start_checkpoint(path, resume)
+
+        async def offer(item: Any) -> bool:
+            try:
+                await asyncio.wait_for(queue.put(item), timeout=0.5)
+                return True
+            except asyncio.TimeoutError:
+                return False
+
+        def put(item: Any) -> None:
+            # Block the parser thread until there is room, unless the import is aborted
+            while not stop.is_set():
+                if asyncio.run_coroutine_threadsafe(offer(item), loop).result():
+                    return
+
+        def produce() -> None:
+            # Each batch covers the archive elements [span_start, next index), so
+            # contiguous committed spans advance the checkpoint position
+            content_batch: List[Tuple] = []
+            message_batch: List[Tuple] = []
+            span_start = span_end = start_index
+            for conversation in self._conversations(parser, start_index):
+                if stop.is_set():
+                    return
+                if self._already_committed(conversation['index']):
+                    continue
+                content_record, message_records = conversation_records(conversation)
+                content_batch.append(content_record)
+                message_batch.extend(message_records)
+                span_end = conversation['index'] + 1
+
+                if len(content_batch) >= batch_size:
+                    put(((span_start, span_end), content_batch, message_batch))
+                    content_batch, message_batch = [], []
+                    span_start = span_end
+
+            if content_batch:
+                put(((span_start, span_end), content_batch, message_batch))
+            for _ in range(writers):
+                put(None)
+
+        async def write() -> None:
+            while True:
+                batch = await queue.get()
+                if batch is None:
+                    return
+                span, content_batch, message_batch = batch
+                imported_ids.extend(await self._copy_batch(content_batch, message_batch, span))
+
+        producer = loop.run_in_executor(None, produce)
+        writer_tasks = [asyncio.create_task(write()) for _ in range(writers)]
+
+        try:
+            await asyncio.gather(producer, *writer_tasks)
+            await self._finish_checkpoint()
+            logger.info(f"Successfully imported {len(imported_ids)} conversations")
+        except BaseException as e:
+            logger.error(f"Import failed: {str(e)}")
+            stop.set()
+            for task in writer_tasks:
+                task.cancel()
+            await asyncio.gather(producer, *writer_tasks, return_exceptions=True)
+            raise
+
+        return imported_ids
+
+    async def _start_checkpoint(self, path: Path, resume: bool) -> int:
+        """Load (when resuming) or reset the checkpoint for this archive; returns the element to start at"""
+        self.fingerprint = archive_fingerprint(path)
+        start_index = 0
+        self._committed_spans = []
+        async with get_raw_connection() as conn:
+            async with conn.transaction():
+                row = None
+                if resume:
+                    row = await conn.fetchrow(
+                        "SELECT position, completed FROM import_checkpoints WHERE fingerprint = $1",
+                        self.fingerprint
+                    )
+                if row is not None:
+                    spans = _merge_spans([
+                        (span['span_start'], span['span_end'])
+                        for span in await conn.fetch(
+                            "SELECT span_start, span_end FROM import_spans WHERE fingerprint = $1",
+                            self.fingerprint
+                        )
+                    ])
+                    start_index = _advance_position(row['position'], spans)
+                    self._committed_spans = [span for span in spans if span[0] > start_index]
+                    if row['completed']:
+                        logger.info(f"Archive {path} was already fully imported")
+                    else:
+                        logger.info(f"Resuming import of {path} at conversation {start_index}")
+                else:
+                    await conn.execute(
+                        """
+                        INSERT INTO import_checkpoints
+                            (fingerprint, source_path, position, conversations, messages, completed, updated_at)
+                        VALUES ($1, $2, 0, 0, 0, false, now())
+                        ON CONFLICT (fingerprint) DO UPDATE SET
+                            source_path = EXCLUDED.source_path,
+                            position = 0, conversations = 0, messages = 0,
+                            completed = false, updated_at = now()
+                        """,
+                        self.fingerprint, str(path)
+                    )
+                    await conn.execute("DELETE FROM import_spans WHERE fingerprint = $1", self.fingerprint)
+        self.stats['resumed_from'] = start_index
+        return start_index
+
+    async def _save_checkpoint(
+        self,
+        conn: Any,
+        span: Tuple[int, int],
+        conversations: int,
+        messages: int
+    ) -> None:
+        """Record a batch in the checkpoint, inside the batch's own transaction.
+
+        The span is stored with the rows it covers, so a batch committed ahead of
+        an earlier one is never copied again by a resume. Locking the checkpoint
+        row orders writers here, at the end of their transactions, so each sees
+        every span committed before it when advancing the position.
+        """
+        position = await conn.fetchval(
+            "SELECT position FROM import_checkpoints WHERE fingerprint = $1 FOR UPDATE",
+            self.fingerprint
+        )
+        await conn.execute(
+            """
+            INSERT INTO import_spans (fingerprint, span_start, span_end) VALUES ($1, $2, $3)
+            ON CONFLICT (fingerprint, span_start) DO UPDATE
+                SET span_end = GREATEST(import_spans.span_end, EXCLUDED.span_end)
+            """,
+            self.fingerprint, span[0], span[1]
+        )
+        spans = await conn.fetch(
+            "SELECT span_start, span_end FROM import_spans WHERE fingerprint = $1",
+            self.fingerprint
+        )
+        position = _advance_position(position, [(row['span_start'], row['span_end']) for row in spans])
+        await conn.execute(
+            "DELETE FROM import_spans WHERE fingerprint = $1 AND span_end <= $2",
+            self.fingerprint, position
+        )
+        await conn.execute(
+            """
+            UPDATE import_checkpoints SET
+                position = $2,
+                conversations = conversations + $3,
+                messages = messages + $4,
+                updated_at = now()
+            WHERE fingerprint = $1
+            """,
+            self.fingerprint, position, conversations, messages
+        )
+
+    async def _finish_checkpoint(self) -> None:
+        """Mark the archive as fully imported"""
+        async with get_raw_connection() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    "UPDATE import_checkpoints SET completed = true, updated_at = now() WHERE fingerprint = $1",
+                    self.fingerprint
+                )
+                await conn.execute("DELETE FROM import_spans WHERE fingerprint = $1", self.fingerprint)
+
+    async def _copy_batch(
+        self,
+        content_batch: List[Tuple],
+        message_batch: List[Tuple],
+        span: Optional[Tuple[int, int]] = None
+    ) -> List[UUID]:
+        """Write one batch of content and message records in a single transaction"""
+        updates: List[Tuple] = []
+        async with get_raw_connection() as conn:
+            async with conn.transaction():
+                if self.incremental:
+                    content_batch, message_batch, updates = await self._diff_batch(
+                        conn, content_batch, message_batch
+                    )
+                if content_batch:
+                    await conn.copy_records_to_table(
+                        Content.__tablename__,
+                        records=content_batch,
+                        columns=CONTENT_COLUMNS
+                    )
+                if message_batch:
+                    await conn.copy_records_to_table(
+                        Message.__tablename__,
+                        records=message_batch,
+                        columns=MESSAGE_COLUMNS
+                    )
+                if updates:
+                    await conn.executemany(
+                        "UPDATE content SET title = $2, update_time = $3, content_hash = $4 WHERE id = $1",
+                        updates
+                    )
+                if span is not None:
+                    await self._save_checkpoint(conn, span, len(content_batch), len(message_batch))
+
+        self.stats['conversations'] += len(content_batch)
+        self.stats['messages'] += len(message_batch)
+        logger.info(
+            f"Copied {len(content_batch)} conversations, "
+            f"{len(message_batch)} messages (total {int(self.stats['conversations'])})"
+        )
+        return [record[0] for record in content_batch] + [update[0] for update in updates]
+
+    async def _diff_batch(
+        self,
+        conn: Any,
+        content_batch: List[Tuple],
+        message_batch: List[Tuple]
+    ) -> Tuple[List[Tuple], List[Tuple], List[Tuple]]:
+        """Drop unchanged conversations and already-stored messages from a batch.
+
+        Returns the content records to insert, the message records to insert and
+        (id, title, update_time, content_hash) updates for changed conversations.
+        """
+        existing = {
+            row['original_id']: row
+            for row in await conn.fetch(
+                "SELECT id, original_id, update_time, content_hash FROM content "
+                "WHERE original_id = ANY($1::varchar[])",
+                [record[1] for record in content_batch]
+            )
+        }
+
+        new_content: List[Tuple] = []
+        updates: List[Tuple] = []
+        skipped = set()
+        remap: Dict[UUID, UUID] = {}
+        for record in content_batch:
+            row = existing.get(record[1])
+            if row is None:
+                new_content.append(record)
+            elif row['update_time'] == record[5] and row['content_hash'] == record[2]:
+                skipped.add(record[0])
+            else:
+                remap[record[0]] = row['id']
+                updates.append((row['id'], record[3], record[5], record[2]))
+
+        # Messages stored before original ids were tracked are matched on position instead
+        known_ids = set()
+        known_positions = set()
+        if remap:
+            for row in await conn.fetch(
+                "SELECT conversation_id, original_id, position FROM messages "
+                "WHERE conversation_id = ANY($1::uuid[])",
+                list(remap.values())
+            ):
+                if row['original_id'] is None:
+                    known_positions.add((row['conversation_id'], row['position']))
+                else:
+                    known_ids.add((row['conversation_id'], row['original_id']))
+
+        new_messages: List[Tuple] = []
+        for record in message_batch:
+            conversation_id = record[1]
+            if conversation_id in skipped:
+                continue
+            if conversation_id in remap:
+                target = remap[conversation_id]
+                if (target, record[2]) in known_ids or (target, record[7]) in known_positions:
+                    continue
+                record = (record[0], target) + record[2:]
+            new_messages.append(record)
+
+        self.stats['skipped'] += len(skipped)
+        self.stats['updated'] += len(updates)
+        return new_content, new_messages, updates
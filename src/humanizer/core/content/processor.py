@@ -1,43 +1,161 @@
 # src/humanizer/core/content/processor.py
-from typing import AsyncIterator, List, Sequence
-from sqlalchemy import select, func, and_, true
+import asyncio
+import os
+import socket
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID, uuid4
+from sqlalchemy import select, func, text
 from sqlalchemy.ext.asyncio import AsyncSession
-from humanizer.db.models import Message
+from humanizer.config import get_settings
+from humanizer.db.models import EmbeddingJob
 from humanizer.db.session import get_session
-from humanizer.core.embedding.service import EmbeddingService
+from humanizer.db.storage import (
+    FULL_COLUMN, ROUNDING_TOLERANCE, column_targets, embedding_storage, matryoshka_sql
+)
+from humanizer.core.embedding.service import EmbeddingService, normalize_vectors, vector_literal
+from humanizer.core.embedding.centroids import refresh_conversation_embeddings
+from humanizer.core.embedding.migration import active_embedding_model
+from humanizer.core.embedding.scheduler import EmbeddingScheduler, error_kind
 from humanizer.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Recent conversations first, and within them the user's own messages
+PRIORITY_SQL = """
+    (CASE WHEN c.update_time >= (now() AT TIME ZONE 'utc') - make_interval(days => :recent_days) THEN 2 ELSE 0 END)
+    + (CASE WHEN m.role = 'user' THEN 1 ELSE 0 END)
+"""
+
+ENQUEUE_LOCK_KEY = 0x656d6265  # Advisory lock id held while queueing jobs
+
 class ContentProcessor:
-    def __init__(self):
+    def __init__(self, concurrency: Optional[int] = None, adaptive: Optional[bool] = None):
+        settings = get_settings()
         self.embedding_service = EmbeddingService()
+        self.scheduler = EmbeddingScheduler(
+            self.embedding_service,
+            concurrency=concurrency,
+            adaptive=adaptive
+        )
+        self.max_attempts = settings.embedding_max_attempts
+        self.retry_backoff = settings.embedding_retry_backoff
+        self.retry_backoff_max = settings.embedding_retry_backoff_max
+        self.recent_days = settings.embedding_recent_days
+        self.stats = {'visited': 0, 'embedded': 0, 'failed': 0, 'skipped': 0}
+        self.worker_id: Optional[str] = None
+        # Switch to the active model when a cutover happens; off when a model is forced
+        self.follow_active_model = True
+
+    async def enqueue_jobs(self, force: bool = False) -> int:
+        """Queue an embedding job for every message that needs one; returns jobs (re)queued.
 
-    async def count_pending_embeddings(self, force: bool = False) -> int:
-        """Count messages that need embedding updates"""
+        Without force, only messages lacking an embedding are queued, and finished
+        jobs whose embedding has since been cleared are reopened. With force every
+        message is queued again, except jobs a worker is holding right now.
+        """
+        if force:
+            reopen = "WHERE embedding_jobs.state <> 'in_flight'"
+            pending_only = ""
+        else:
+            reopen = "WHERE embedding_jobs.state = 'done'"
+            pending_only = "AND m.embedding IS NULL"
         async with get_session() as session:
-            query = select(func.count()).select_from(Message)
-            if not force:
-                query = query.where(Message.embedding.is_(None))
-            return await session.scalar(query) or 0
+            # Workers enqueue while idle; let one of them do it at a time
+            if not await session.scalar(
+                text("SELECT pg_try_advisory_xact_lock(:key)"), {'key': ENQUEUE_LOCK_KEY}
+            ):
+                return 0
+            result = await session.execute(
+                text(f"""
+                    INSERT INTO embedding_jobs (message_id, state, priority, attempts, next_attempt_at)
+                    SELECT m.id, 'pending', {PRIORITY_SQL}, 0, now()
+                    FROM messages m
+                    JOIN content c ON c.id = m.conversation_id
+                    WHERE btrim(m.content) <> '' {pending_only}
+                    ON CONFLICT (message_id) DO UPDATE
+                        SET state = 'pending', priority = EXCLUDED.priority, attempts = 0,
+                            next_attempt_at = now(), error_kind = NULL, last_error = NULL,
+                            completed_at = NULL, updated_at = now()
+                        {reopen}
+                """),
+                {'recent_days': self.recent_days}
+            )
+            return result.rowcount or 0
 
-    async def get_embedding_stats(self) -> dict:
-        """Get embedding statistics"""
+    async def prioritize(self, conversation_id: UUID, priority: int) -> int:
+        """Set the priority of a conversation's unfinished jobs"""
         async with get_session() as session:
-            total = await session.scalar(
-                select(func.count()).select_from(Message)
-            ) or 0
+            result = await session.execute(
+                text("""
+                    UPDATE embedding_jobs AS j
+                    SET priority = :priority, updated_at = now()
+                    FROM messages m
+                    WHERE m.id = j.message_id
+                      AND m.conversation_id = :conversation_id
+                      AND j.state IN ('pending', 'in_flight')
+                """),
+                {'priority': priority, 'conversation_id': conversation_id}
+            )
+            return result.rowcount or 0
 
-            embedded = await session.scalar(
-                select(func.count())
-                .select_from(Message)
-                .where(Message.embedding.isnot(None))
+    async def retry_failed_jobs(self) -> int:
+        """Give failed jobs a fresh set of attempts"""
+        async with get_session() as session:
+            result = await session.execute(
+                text("""
+                    UPDATE embedding_jobs
+                    SET state = 'pending', attempts = 0, next_attempt_at = now(), updated_at = now()
+                    WHERE state = 'failed'
+                """)
+            )
+            return result.rowcount or 0
+
+    async def count_pending_embeddings(self) -> int:
+        """Count jobs that a worker could claim right now"""
+        async with get_session() as session:
+            return await session.scalar(
+                text("""
+                    SELECT count(*) FROM embedding_jobs
+                    WHERE (state = 'pending' AND next_attempt_at <= now())
+                       OR (state = 'in_flight' AND lease_expires_at <= now())
+                """)
             ) or 0
 
+    async def get_embedding_stats(self) -> dict:
+        """Queue depth by state, recent throughput and a breakdown of failures"""
+        async with get_session() as session:
+            states = dict((await session.execute(
+                select(EmbeddingJob.state, func.count()).group_by(EmbeddingJob.state)
+            )).all())
+
+            row = (await session.execute(text("""
+                SELECT
+                    count(*) FILTER (WHERE state = 'pending' AND next_attempt_at <= now()) AS ready,
+                    count(*) FILTER (WHERE state = 'pending' AND attempts > 0) AS retrying,
+                    count(*) FILTER (WHERE state = 'in_flight' AND lease_expires_at <= now()) AS expired,
+                    count(*) FILTER (WHERE completed_at >= now() - interval '5 minutes') AS done_5m,
+                    count(*) FILTER (WHERE completed_at >= now() - interval '1 hour') AS done_1h
+                FROM embedding_jobs
+            """))).one()
+
+            failures = (await session.execute(text("""
+                SELECT coalesce(error_kind, 'unknown') AS kind, count(*) AS jobs, max(last_error) AS example
+                FROM embedding_jobs
+                WHERE state = 'failed'
+                GROUP BY 1
+                ORDER BY 2 DESC
+            """))).all()
+
             return {
-                'total': total,
-                'embedded': embedded,
-                'pending': total - embedded
+                'states': {state: states.get(state, 0) for state in ('pending', 'in_flight', 'done', 'failed')},
+                'ready': row.ready,
+                'retrying': row.retrying,
+                'expired_leases': row.expired,
+                'per_minute_5m': row.done_5m / 5,
+                'per_minute_1h': row.done_1h / 60,
+                'failures': [
+                    {'kind': f.kind, 'jobs': f.jobs, 'example': f.example} for f in failures
+                ]
             }
 
     async def update_embeddings(
@@ -45,47 +163,301 @@ class ContentProcessor:
         batch_size: int = 50,
         force: bool = False
     ) -> AsyncIterator[int]:
-        """Update embeddings for messages that don't have them"""
+        """Queue and drain embedding jobs in this process, yielding jobs claimed per batch"""
+        await self.enqueue_jobs(force=force)
+        async for claimed in self.run_worker(batch_size=batch_size):
+            yield claimed
+
+    async def run_worker(
+        self,
+        batch_size: int = 50,
+        lease_seconds: Optional[float] = None,
+        worker_id: Optional[str] = None,
+        poll: Optional[float] = None
+    ) -> AsyncIterator[int]:
+        """Claim, embed and store batches of jobs alongside other workers, yielding jobs claimed per batch.
+
+        Claims take rows FOR UPDATE SKIP LOCKED and lease them to this worker, so
+        concurrent workers never share a job and a crashed worker's batch is picked
+        up again once its lease expires. Stops when nothing is claimable, or keeps
+        queueing new messages and polling every `poll` seconds when given.
+        """
+        self.stats = {'visited': 0, 'embedded': 0, 'failed': 0, 'skipped': 0}
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        lease_seconds = lease_seconds or get_settings().embedding_lease_seconds
+        while True:
+            if self.follow_active_model:
+                async with get_session() as session:
+                    self.embedding_service.embedding_model = await active_embedding_model(session)
+            model = self.embedding_service.embedding_model
+            rows = await self.claim_batch(batch_size, lease_seconds)
+            if not rows:
+                if poll is None:
+                    break
+                await asyncio.sleep(poll)
+                await self.enqueue_jobs()
+                continue
+            self.stats['visited'] += len(rows)
+            await self._process_rows(rows, model)
+            yield len(rows)
+
+    async def claim_batch(self, batch_size: int, lease_seconds: float) -> List:
+        """Lease up to batch_size runnable jobs to this worker and return their (id, content)"""
         async with get_session() as session:
-            while True:
-                # Get batch of messages without embeddings and with non-empty content
-                query = select(Message).where(
-                    and_(
-                        Message.embedding.is_(None) if not force else true(),
-                        Message.content.isnot(None),
-                        Message.content != ''
+            result = await session.execute(
+                text("""
+                    WITH candidates AS (
+                        SELECT message_id
+                        FROM embedding_jobs
+                        WHERE (state = 'pending' AND next_attempt_at <= now())
+                           OR (state = 'in_flight' AND lease_expires_at <= now())
+                        ORDER BY priority DESC, next_attempt_at, message_id
+                        LIMIT :batch_size
+                        FOR UPDATE SKIP LOCKED
+                    ),
+                    claimed AS (
+                        UPDATE embedding_jobs AS j
+                        SET state = 'in_flight', worker = :worker, attempts = j.attempts + 1,
+                            lease_expires_at = now() + make_interval(secs => :lease_seconds),
+                            updated_at = now()
+                        FROM candidates c
+                        WHERE j.message_id = c.message_id
+                        RETURNING j.message_id, j.priority
                     )
-                ).limit(batch_size)
+                    SELECT m.id, m.content
+                    FROM messages m
+                    JOIN claimed c ON c.message_id = m.id
+                    ORDER BY c.priority DESC, m.id
+                """),
+                {
+                    'batch_size': batch_size,
+                    'worker': self.worker_id,
+                    'lease_seconds': float(lease_seconds)
+                }
+            )
+            return result.all()
 
-                result = await session.execute(query)
-                messages = result.scalars().all()
+    async def renormalize_embeddings(self, batch_size: int = 5000) -> AsyncIterator[Tuple[int, int]]:
+        """Rescale stored embeddings that are not unit length, in primary-key batches.
 
-                if not messages:
-                    break
+        Yields (rows scanned, rows rewritten) per batch; each batch commits on its
+        own. Conversation centroids are rebuilt afterwards.
+        """
+        # halfvec components can't get closer to unit length than their rounding allows
+        tolerance = ROUNDING_TOLERANCE[embedding_storage()]
+        last_id = None
+        while True:
+            async with get_session() as session:
+                row = (await session.execute(
+                    text(f"""
+                        WITH batch AS (
+                            SELECT id FROM messages
+                            WHERE embedding IS NOT NULL {'AND id > :last_id' if last_id else ''}
+                            ORDER BY id
+                            LIMIT :batch_size
+                        ),
+                        fixed AS (
+                            UPDATE messages AS m
+                            SET embedding = l2_normalize(m.embedding)
+                            FROM batch b
+                            WHERE m.id = b.id AND abs(vector_norm(CAST(m.embedding AS vector)) - 1) > :tolerance
+                            RETURNING m.id
+                        )
+                        SELECT (SELECT count(*) FROM batch) AS scanned,
+                               (SELECT count(*) FROM fixed) AS fixed,
+                               (SELECT id FROM batch ORDER BY id DESC LIMIT 1) AS last_id
+                    """),
+                    {'last_id': last_id, 'batch_size': batch_size, 'tolerance': tolerance}
+                    if last_id else {'batch_size': batch_size, 'tolerance': tolerance}
+                )).one()
+            if not row.scanned:
+                break
+            last_id = row.last_id
+            yield row.scanned, row.fixed
+
+        async with get_session() as session:
+            await refresh_conversation_embeddings(session)
+
+    async def _process_rows(self, rows: Sequence, model: str) -> None:
+        """Embed claimed (id, content) rows and settle their jobs"""
+        pending = []
+        failed: Dict[UUID, Tuple[str, str]] = {}
+        for row in rows:
+            if not row.content or not row.content.strip():
+                logger.debug(f"Skipping empty message {row.id}")
+                failed[row.id] = ('empty', 'Message has no text to embed')
+                continue
+            pending.append(row)
+        empty = len(failed)
+
+        # Known texts come straight from the embedding cache
+        texts = [row.content for row in pending]
+        embeddings = self.embedding_service.cached_embeddings(texts)
+        misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if misses:
+            miss_texts = [texts[i] for i in misses]
+            created = await self.scheduler.embed(miss_texts)
+            self.embedding_service.cache_embeddings(miss_texts, created)
+            for i, embedding in zip(misses, created):
+                embeddings[i] = embedding
 
-                # Process each message individually for better error handling
-                processed = 0
-                for msg in messages:
-                    try:
-                        if not str(msg.content) or not str(msg.content).strip():
-                            logger.debug(f"Skipping empty message {msg.id}")
-                            continue
-
-                        embedding = await self.embedding_service.create_embedding(str(msg.content))
-                        msg.embedding = embedding
-                        msg.embedding_model = self.embedding_service.embedding_model
-                        processed += 1
-
-                    except Exception as e:
-                        logger.error(f"Error processing message {msg.id}: {str(e)}")
-                        continue
-
-                if processed > 0:
-                    try:
-                        await session.commit()
-                        yield processed
-                    except Exception as e:
-                        logger.error(f"Error committing batch: {str(e)}")
-                        await session.rollback()
-                else:
-                    yield 0
+        done = []
+        for row, embedding in zip(pending, embeddings):
+            if embedding is not None:
+                done.append((row.id, embedding))
+                continue
+            # Looked up rather than popped: duplicate texts in a batch share one failure
+            error = self.embedding_service.failures.get(row.content)
+            logger.error(f"Error processing message {row.id}")
+            failed[row.id] = (error_kind(error), str(error) if error else 'Embedding request failed')
+        self.embedding_service.failures.clear()
+
+        # Store unit vectors; the whole batch is normalized at once rather than per row in the database.
+        # These are full-length model vectors; the searchable prefixes are cut from them on write.
+        vectors = normalize_vectors([embedding for _, embedding in done])
+        done = [(message_id, vector) for (message_id, _), vector in zip(done, vectors)]
+
+        try:
+            async with get_session() as session:
+                stored = await self._store_embeddings(session, done, model)
+                await self._fail_jobs(session, failed)
+            if stored:
+                self.stats['embedded'] += len(done)
+            self.stats['failed'] += len(failed) - empty
+            self.stats['skipped'] += empty
+        except Exception as e:
+            logger.error(f"Error committing batch: {str(e)}")
+            self.stats['failed'] += len(rows)
+            try:
+                async with get_session() as session:
+                    await self._fail_jobs(session, {row.id: ('database', str(e)) for row in rows})
+            except Exception as e:
+                # The claims stay leased and are picked up again once they expire
+                logger.error(f"Error recording batch failure: {str(e)}")
+
+    async def _store_embeddings(self, session: AsyncSession, done: List[Tuple[UUID, List[float]]], model: str) -> bool:
+        """Write a batch's embeddings with one set-based UPDATE, fold them into the
+        conversation centroids and close their jobs.
+
+        Returns False, with the jobs queued again, when a cutover made another
+        model active after the batch was embedded with `model`.
+        """
+        if not done:
+            return True
+        ids = [message_id for message_id, _ in done]
+        if self.follow_active_model:
+            # Take the lock the UPDATE below needs before reading the active model.
+            # A cutover's swap needs ACCESS EXCLUSIVE on messages, so it has either
+            # committed already, and its model is read here, or waits for this commit.
+            await session.execute(text("LOCK TABLE messages IN ROW EXCLUSIVE MODE"))
+            active = await active_embedding_model(session)
+            if active != model:
+                logger.info(f"{active} became the active model; requeueing {len(ids)} {model} embeddings")
+                await self._requeue_jobs(session, ids)
+                return False
+        # previous sees the rows as they were before this statement, so a
+        # re-embedded message swaps its old vector for the new one in the sum.
+        # Centroids are summed in float32 whatever the message embedding storage.
+        targets = column_targets()
+        prefixes = ''.join(
+            f", {column} = {matryoshka_sql('i.embedding', dimensions, sql_type)}"
+            for column, (sql_type, dimensions) in targets.items()
+            if column != FULL_COLUMN
+        )
+        await session.execute(
+            text(f"""
+                WITH incoming AS (
+                    SELECT v.id, CAST(v.embedding AS vector) AS embedding
+                    FROM unnest(CAST(:ids AS uuid[]), CAST(:embeddings AS text[])) AS v(id, embedding)
+                ),
+                previous AS (
+                    SELECT m.id, m.embedding
+                    FROM messages m
+                    JOIN incoming i ON i.id = m.id
+                ),
+                updated AS (
+                    UPDATE messages AS m
+                    SET {FULL_COLUMN} = CAST(i.embedding AS {targets[FULL_COLUMN][0]}){prefixes},
+                        embedding_model = :model
+                    FROM incoming i
+                    WHERE m.id = i.id
+                    RETURNING m.id, m.conversation_id, m.embedding
+                ),
+                deltas AS (
+                    SELECT u.conversation_id,
+                           sum(CAST(u.embedding AS vector))
+                             - coalesce(sum(CAST(p.embedding AS vector)), CAST(array_fill(0, ARRAY[:dims]) AS vector))
+                               AS embedding_sum,
+                           count(*) - count(p.embedding) AS message_count
+                    FROM updated u
+                    JOIN previous p ON p.id = u.id
+                    GROUP BY u.conversation_id
+                )
+                INSERT INTO conversation_embeddings AS ce (conversation_id, embedding_sum, message_count, embedding)
+                SELECT conversation_id, embedding_sum, message_count, l2_normalize(embedding_sum)
+                FROM deltas
+                ORDER BY conversation_id
+                ON CONFLICT (conversation_id) DO UPDATE
+                    SET embedding_sum = ce.embedding_sum + EXCLUDED.embedding_sum,
+                        message_count = ce.message_count + EXCLUDED.message_count,
+                        embedding = l2_normalize(ce.embedding_sum + EXCLUDED.embedding_sum),
+                        updated_at = now()
+            """),
+            {
+                'model': model,
+                'ids': ids,
+                'embeddings': [vector_literal(embedding) for _, embedding in done],
+                'dims': self.embedding_service.embedding_dimensions
+            }
+        )
+        await session.execute(
+            text("""
+                UPDATE embedding_jobs
+                SET state = 'done', completed_at = now(), updated_at = now(),
+                    worker = NULL, lease_expires_at = NULL, error_kind = NULL, last_error = NULL
+                WHERE message_id = ANY(CAST(:ids AS uuid[]))
+            """),
+            {'ids': ids}
+        )
+        return True
+
+    async def _requeue_jobs(self, session: AsyncSession, ids: List[UUID]) -> None:
+        """Put claimed jobs back to run again right away, without spending an attempt"""
+        await session.execute(
+            text("""
+                UPDATE embedding_jobs
+                SET state = 'pending', attempts = greatest(attempts - 1, 0), next_attempt_at = now(),
+                    worker = NULL, lease_expires_at = NULL, updated_at = now()
+                WHERE message_id = ANY(CAST(:ids AS uuid[]))
+            """),
+            {'ids': ids}
+        )
+
+    async def _fail_jobs(self, session: AsyncSession, failed: Dict[UUID, Tuple[str, str]]) -> None:
+        """Send failed jobs back to pending with exponential backoff, or mark them failed"""
+        if not failed:
+            return
+        await session.execute(
+            text("""
+                UPDATE embedding_jobs AS j
+                SET state = CASE
+                        WHEN j.attempts >= :max_attempts OR f.kind = 'empty' THEN 'failed'
+                        ELSE 'pending'
+                    END,
+                    next_attempt_at = now() + make_interval(
+                        secs => least(:backoff * power(2, greatest(j.attempts - 1, 0)), :backoff_max)
+                    ),
+                    error_kind = f.kind, last_error = f.error,
+                    worker = NULL, lease_expires_at = NULL, updated_at = now()
+                FROM unnest(CAST(:ids AS uuid[]), CAST(:kinds AS text[]), CAST(:errors AS text[])) AS f(id, kind, error)
+                WHERE j.message_id = f.id
+            """),
+            {
+                'max_attempts': self.max_attempts,
+                'backoff': float(self.retry_backoff),
+                'backoff_max': float(self.retry_backoff_max),
+                'ids': list(failed),
+                'kinds': [kind for kind, _ in failed.values()],
+                'errors': [error[:1000] for _, error in failed.values()]
+            }
+        )
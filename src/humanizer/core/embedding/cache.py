@@ -0,0 +1,191 @@
+# src/humanizer/core/embedding/cache.py
+import hashlib
+import math
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from humanizer.config import get_settings
+from humanizer.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a text for cache keys"""
+    return unicodedata.normalize('NFC', text).strip()
+
+def cache_key(model: str, dimensions: int, prefix: str, text: str) -> bytes:
+    """Content address of an embedding: sha256 over model, dimensions, task prefix and normalized text"""
+    digest = hashlib.sha256()
+    for part in (model, str(dimensions), prefix, normalize_text(text)):
+        digest.update(part.encode('utf-8', 'replace'))
+        digest.update(b'\x00')
+    return digest.digest()
+
+def encode_vector(vector: List[float]) -> bytes:
+    """Pack a vector as little-endian float32"""
+    packed = array('f', vector)
+    if packed.itemsize != 4:
+        raise ValueError("Platform float is not 32-bit")
+    return packed.tobytes()
+
+def decode_vector(data: bytes) -> List[float]:
+    """Unpack a float32 vector"""
+    return array('f', data).tolist()
+
+class EmbeddingCache:
+    """Size-bounded, least-recently-used embedding store in a local SQLite file.
+
+    Several worker processes can share the file. The size bound is checked
+    against the file itself rather than a per-process count. A cache that is
+    locked or broken only costs lookups, so errors are logged and a read comes
+    back as all misses.
+    """
+
+    def __init__(self, path: Path, max_bytes: int, busy_timeout: float = 5.0):
+        self.path = Path(path).expanduser()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # Wait this long for another process's write lock before giving up
+        self._conn = sqlite3.connect(str(self.path), timeout=busy_timeout, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key BLOB PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+    def _bytes_used(self) -> int:
+        """Bytes of the file in use, as every process sharing it sees them"""
+        page_count = self._conn.execute("PRAGMA page_count").fetchone()[0]
+        free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+        page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        return (page_count - free_pages) * page_size
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, List[float]]:
+        """Look up many keys at once, refreshing the recency of hits"""
+        found: Dict[bytes, List[float]] = {}
+        with self._lock:
+            try:
+                # Stay well under SQLite's bound-parameter limit
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    placeholders = ','.join('?' * len(chunk))
+                    for key, vector in self._conn.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                    ):
+                        found[key] = decode_vector(vector)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache read failed, treating as misses: {str(e)}")
+                found = {}
+            if found:
+                try:
+                    now = time.time()
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                        [(now, key) for key in found]
+                    )
+                    self._conn.commit()
+                except sqlite3.Error as e:
+                    # Only recency is lost; the hits themselves are good
+                    self._conn.rollback()
+                    logger.warning(f"Embedding cache recency update failed: {str(e)}")
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: Iterable[Tuple[bytes, List[float]]]) -> None:
+        """Store embeddings, evicting least recently used entries past the size bound"""
+        rows = [(key, encode_vector(vector), time.time()) for key, vector in items]
+        if not rows:
+            return
+        with self._lock:
+            try:
+                # Same key means same content address, so an existing entry is already correct
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                    rows
+                )
+                if self._bytes_used() > self.max_bytes:
+                    self._evict()
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self._conn.rollback()
+                logger.warning(f"Embedding cache write failed, {len(rows)} embeddings not cached: {str(e)}")
+
+    def _evict(self) -> None:
+        """Drop the oldest entries until the cache is back under 90% of its bound"""
+        target = int(self.max_bytes * 0.9)
+        while True:
+            used = self._bytes_used()
+            rows = self._conn.execute("SELECT count(*) FROM embeddings").fetchone()[0]
+            if used <= target or not rows:
+                break
+            # About as many of the oldest rows as hold the excess
+            victims = min(rows, max(1, math.ceil(rows * (used - target) / used)))
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                (victims,)
+            )
+            self.evictions += victims
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters for this process and the current cache size"""
+        lookups = self.hits + self.misses
+        with self._lock:
+            try:
+                size = self._bytes_used()
+            except sqlite3.Error:
+                size = 0
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'bytes': size,
+            'max_bytes': self.max_bytes
+        }
+
+    def clear(self) -> None:
+        """Remove every cached embedding"""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+_cache: Optional[EmbeddingCache] = None
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Get the process-wide embedding cache, or None when disabled in settings"""
+    global _cache
+    settings = get_settings()
+    if not settings.embedding_cache_enabled:
+        return None
+    if _cache is None:
+        try:
+            _cache = EmbeddingCache(
+                settings.embedding_cache_path,
+                max_bytes=settings.embedding_cache_max_mb * 1024 * 1024
+            )
+        except sqlite3.Error as e:
+            # Embedding works without the cache; try to open it again next time
+            logger.warning(f"Embedding cache unavailable: {str(e)}")
+            return None
+        logger.debug(f"Opened embedding cache at {_cache.path}")
+    return _cache
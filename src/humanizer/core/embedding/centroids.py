@@ -0,0 +1,64 @@
+# src/humanizer/core/embedding/centroids.py
+from typing import List, Optional, Sequence
+from uuid import UUID
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from humanizer.db.models import ConversationEmbedding
+
+async def refresh_conversation_embeddings(
+    session: AsyncSession,
+    conversation_ids: Optional[Sequence[UUID]] = None
+) -> int:
+    """Recompute conversation centroids from message embeddings; returns centroids written.
+
+    Without conversation_ids every conversation is rebuilt, and centroids of
+    conversations that no longer have embedded messages are removed.
+    """
+    scope = stale_scope = ""
+    params = {}
+    if conversation_ids is not None:
+        scope = "AND conversation_id = ANY(CAST(:ids AS uuid[]))"
+        stale_scope = "AND ce.conversation_id = ANY(CAST(:ids AS uuid[]))"
+        params['ids'] = list(conversation_ids)
+
+    result = await session.execute(
+        text(f"""
+            INSERT INTO conversation_embeddings AS ce (conversation_id, embedding_sum, message_count, embedding)
+            SELECT conversation_id, sum(CAST(embedding AS vector)), count(*), l2_normalize(sum(CAST(embedding AS vector)))
+            FROM messages
+            WHERE embedding IS NOT NULL {scope}
+            GROUP BY conversation_id
+            ORDER BY conversation_id
+            ON CONFLICT (conversation_id) DO UPDATE
+                SET embedding_sum = EXCLUDED.embedding_sum,
+                    message_count = EXCLUDED.message_count,
+                    embedding = EXCLUDED.embedding,
+                    updated_at = now()
+        """),
+        params
+    )
+    await session.execute(
+        text(f"""
+            DELETE FROM conversation_embeddings ce
+            WHERE NOT EXISTS (
+                SELECT 1 FROM messages m
+                WHERE m.conversation_id = ce.conversation_id AND m.embedding IS NOT NULL
+            ) {stale_scope}
+        """),
+        params
+    )
+    return result.rowcount or 0
+
+async def get_conversation_embedding(session: AsyncSession, conversation_id: UUID) -> Optional[List[float]]:
+    """Stored centroid of a conversation, computing it on first use"""
+    embedding = await session.scalar(
+        select(ConversationEmbedding.embedding)
+        .where(ConversationEmbedding.conversation_id == conversation_id)
+    )
+    if embedding is None:
+        await refresh_conversation_embeddings(session, [conversation_id])
+        embedding = await session.scalar(
+            select(ConversationEmbedding.embedding)
+            .where(ConversationEmbedding.conversation_id == conversation_id)
+        )
+    return list(embedding) if embedding is not None else None
@@ -0,0 +1,329 @@
+# src/humanizer/core/embedding/migration.py
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from humanizer.config import get_settings
+from humanizer.db.models import EmbeddingModel
+from humanizer.db.session import get_session
+from humanizer.db.indexes import create_shadow_indexes
+from humanizer.db.storage import FULL_COLUMN, column_targets, matryoshka_sql
+from humanizer.db.triggers import embedding_trigger_statements
+from humanizer.core.embedding.service import EmbeddingService, normalize_vectors, vector_literal
+from humanizer.core.embedding.scheduler import EmbeddingScheduler
+from humanizer.core.embedding.centroids import refresh_conversation_embeddings
+from humanizer.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Suffixes of the message columns (and their indexes) staged for a cutover and
+# of the ones it replaced, which are kept until cleanup
+STAGED_SUFFIX = '_next'
+RETIRED_SUFFIX = '_retired'
+
+async def active_embedding_model(session: AsyncSession) -> str:
+    """Model whose vectors are live in messages; the embedding_model setting until a cutover has run.
+
+    Databases not yet upgraded by 'db migrate' have no embedding_models table;
+    they are checked for first, as a failed query would abort the caller's transaction.
+    """
+    if await session.scalar(text("SELECT to_regclass('embedding_models')")) is None:
+        return get_settings().embedding_model
+    model = await session.scalar(select(EmbeddingModel.model).where(EmbeddingModel.state == 'active'))
+    return model or get_settings().embedding_model
+
+def _swapped_columns() -> List[str]:
+    """Message columns that change hands at a cutover"""
+    return list(column_targets()) + ['embedding_model']
+
+class ModelMigration:
+    """Move the corpus to another embedding model while search keeps serving the current one.
+
+    start registers the model; backfill embeds every message with it into
+    model_embeddings, leaving messages alone; cutover stages those vectors
+    and their ANN indexes next to the live columns and swaps them in one short
+    transaction; cleanup drops what the cutover replaced.
+    """
+
+    def __init__(self, model: str, concurrency: Optional[int] = None, adaptive: Optional[bool] = None):
+        self.model = model
+        self.embedding_service = EmbeddingService()
+        self.embedding_service.embedding_model = model
+        self.scheduler = EmbeddingScheduler(self.embedding_service, concurrency=concurrency, adaptive=adaptive)
+
+    async def start(self) -> str:
+        """Register the model for backfill; returns the active model it will replace"""
+        async with get_session() as session:
+            active = await active_embedding_model(session)
+            if active == self.model:
+                raise ValueError(f"{self.model} is already the active embedding model")
+            # Record the model serving search now, so the cutover has something to retire
+            await session.execute(
+                text("""
+                    INSERT INTO embedding_models (model, state, activated_at)
+                    VALUES (:active, 'active', now())
+                    ON CONFLICT (model) DO NOTHING
+                """),
+                {'active': active}
+            )
+            await session.execute(
+                text("""
+                    INSERT INTO embedding_models (model, state)
+                    VALUES (:model, 'backfill')
+                    ON CONFLICT (model) DO UPDATE SET state = 'backfill'
+                """),
+                {'model': self.model}
+            )
+        return active
+
+    async def _require_state(self, session: AsyncSession, state: str) -> None:
+        current = await session.scalar(select(EmbeddingModel.state).where(EmbeddingModel.model == self.model))
+        if current != state:
+            raise ValueError(f"{self.model} is {current or 'not registered'}, expected {state}")
+
+    async def count_missing(self) -> int:
+        """Messages with text that have no vector for the model yet"""
+        async with get_session() as session:
+            return await session.scalar(
+                text("""
+                    SELECT count(*) FROM messages m
+                    WHERE btrim(m.content) <> ''
+                      AND NOT EXISTS (
+                          SELECT 1 FROM model_embeddings e WHERE e.model = :model AND e.message_id = m.id
+                      )
+                """),
+                {'model': self.model}
+            )
+
+    async def backfill(self, batch_size: int = 100) -> AsyncIterator[Tuple[int, int]]:
+        """Embed messages that have no vector for the model, yielding (embedded, failed) per batch.
+
+        Only model_embeddings is written, so the live vectors and their indexes
+        are untouched. Failed messages are retried by the next run.
+        """
+        async with get_session() as session:
+            await self._require_state(session, 'backfill')
+        full_type = column_targets()[FULL_COLUMN][0]
+
+        last_id = None
+        while True:
+            async with get_session() as session:
+                rows = (await session.execute(
+                    text(f"""
+                        SELECT m.id, m.content FROM messages m
+                        WHERE btrim(m.content) <> '' {'AND m.id > :last_id' if last_id else ''}
+                          AND NOT EXISTS (
+                              SELECT 1 FROM model_embeddings e WHERE e.model = :model AND e.message_id = m.id
+                          )
+                        ORDER BY m.id
+                        LIMIT :batch_size
+                    """),
+                    {'model': self.model, 'batch_size': batch_size, 'last_id': last_id}
+                    if last_id else {'model': self.model, 'batch_size': batch_size}
+                )).all()
+            if not rows:
+                return
+            last_id = rows[-1].id
+
+            texts = [row.content for row in rows]
+            embeddings = self.embedding_service.cached_embeddings(texts)
+            misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+            if misses:
+                miss_texts = [texts[i] for i in misses]
+                created = await self.scheduler.embed(miss_texts)
+                self.embedding_service.cache_embeddings(miss_texts, created)
+                for i, embedding in zip(misses, created):
+                    embeddings[i] = embedding
+            self.embedding_service.failures.clear()
+
+            done = [(row.id, embedding) for row, embedding in zip(rows, embeddings) if embedding is not None]
+            vectors = normalize_vectors([embedding for _, embedding in done])
+            if done:
+                async with get_session() as session:
+                    await session.execute(
+                        text(f"""
+                            INSERT INTO model_embeddings (model, message_id, embedding)
+                            SELECT :model, v.id, CAST(v.embedding AS {full_type})
+                            FROM unnest(CAST(:ids AS uuid[]), CAST(:embeddings AS text[])) AS v(id, embedding)
+                            ON CONFLICT (model, message_id) DO UPDATE
+                                SET embedding = EXCLUDED.embedding, created_at = now()
+                        """),
+                        {
+                            'model': self.model,
+                            'ids': [message_id for message_id, _ in done],
+                            'embeddings': [vector_literal(vector) for vector in vectors]
+                        }
+                    )
+            yield len(done), len(rows) - len(done)
+
+    async def cutover(
+        self,
+        batch_size: int = 5000,
+        lock_timeout: str = '10s',
+        allow_missing: bool = False,
+        maintenance_work_mem: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, int]]:
+        """Make the model's vectors live at once, yielding (stage, rows or indexes done).
+
+        Its vectors are sliced into _next shadow columns of messages in committed
+        batches and the live ANN indexes are rebuilt on them concurrently; then
+        one short transaction renames the live columns to _retired, the shadows
+        into their place and activates the model. Search sees either model's
+        vectors, never a mix: embedding workers re-check the active model under
+        a lock the swap conflicts with, and requeue batches embedded with the
+        old one. Stop backfilling before a cutover: vectors it adds
+        later are not staged. Messages without a vector (allow_missing) end up
+        unembedded and are re-queued by `embeddings enqueue`.
+        """
+        async with get_session() as session:
+            await self._require_state(session, 'backfill')
+        missing = await self.count_missing()
+        if missing and not allow_missing:
+            raise ValueError(f"{missing:,} messages have no {self.model} vector yet; finish the backfill first")
+
+        targets = column_targets()
+        columns = _swapped_columns()
+
+        # Fresh shadow columns; left-overs of an interrupted cutover go with their indexes.
+        # These ALTERs need ACCESS EXCLUSIVE too, so don't queue behind long queries either.
+        async with get_session() as session:
+            await session.execute(text("SELECT set_config('lock_timeout', :timeout, true)"), {'timeout': lock_timeout})
+            for column in columns:
+                sql_type = targets[column][0] if column in targets else 'varchar'
+                await session.execute(text(f"ALTER TABLE messages DROP COLUMN IF EXISTS {column}{STAGED_SUFFIX}"))
+                await session.execute(text(f"ALTER TABLE messages ADD COLUMN {column}{STAGED_SUFFIX} {sql_type}"))
+
+        assignments = ', '.join(
+            [f"{FULL_COLUMN}{STAGED_SUFFIX} = CAST(b.embedding AS {targets[FULL_COLUMN][0]})"]
+            + [
+                f"{column}{STAGED_SUFFIX} = {matryoshka_sql('b.embedding', dimensions, sql_type)}"
+                for column, (sql_type, dimensions) in targets.items()
+                if column != FULL_COLUMN
+            ]
+            + [f"embedding_model{STAGED_SUFFIX} = :model"]
+        )
+        staged = 0
+        last_id = None
+        while True:
+            async with get_session() as session:
+                row = (await session.execute(
+                    text(f"""
+                        WITH batch AS (
+                            SELECT message_id, embedding FROM model_embeddings
+                            WHERE model = :model {'AND message_id > :last_id' if last_id else ''}
+                            ORDER BY message_id
+                            LIMIT :batch_size
+                        ),
+                        staged AS (
+                            UPDATE messages AS m
+                            SET {assignments}
+                            FROM batch b
+                            WHERE m.id = b.message_id
+                            RETURNING m.id
+                        )
+                        SELECT (SELECT count(*) FROM staged) AS staged,
+                               (SELECT message_id FROM batch ORDER BY message_id DESC LIMIT 1) AS last_id
+                    """),
+                    {'model': self.model, 'batch_size': batch_size, 'last_id': last_id}
+                    if last_id else {'model': self.model, 'batch_size': batch_size}
+                )).one()
+            if row.last_id is None:
+                break
+            last_id = row.last_id
+            staged += row.staged
+            yield 'staged', staged
+
+        indexes = await create_shadow_indexes(list(targets), STAGED_SUFFIX, maintenance_work_mem)
+        yield 'indexed', len(indexes)
+
+        async with get_session() as session:
+            await session.execute(text("SELECT set_config('lock_timeout', :timeout, true)"), {'timeout': lock_timeout})
+            # Triggers are bound to columns, not names; take them off while the columns move
+            for statement in embedding_trigger_statements('off'):
+                await session.execute(text(statement))
+            for column in columns:
+                await session.execute(text(f"ALTER TABLE messages DROP COLUMN IF EXISTS {column}{RETIRED_SUFFIX}"))
+                await session.execute(text(f"ALTER TABLE messages RENAME COLUMN {column} TO {column}{RETIRED_SUFFIX}"))
+                await session.execute(text(f"ALTER TABLE messages RENAME COLUMN {column}{STAGED_SUFFIX} TO {column}"))
+            for live, shadow in indexes.items():
+                await session.execute(text(f"ALTER INDEX {live} RENAME TO {f'{live}{RETIRED_SUFFIX}'[:63]}"))
+                await session.execute(text(f"ALTER INDEX {shadow} RENAME TO {live}"))
+            for statement in embedding_trigger_statements(get_settings().embedding_trigger_mode):
+                await session.execute(text(statement))
+            await session.execute(text("UPDATE embedding_models SET state = 'retired' WHERE state = 'active'"))
+            await session.execute(
+                text("UPDATE embedding_models SET state = 'active', activated_at = now() WHERE model = :model"),
+                {'model': self.model}
+            )
+        logger.info(f"{self.model} is now the active embedding model")
+
+        # Centroids follow in their own transaction rather than holding the swap's lock
+        async with get_session() as session:
+            written = await refresh_conversation_embeddings(session)
+        yield 'centroids', written
+
+async def migration_status() -> Dict[str, Any]:
+    """Registered models with their state and staged vectors, and the messages a backfill has to cover"""
+    async with get_session() as session:
+        messages = await session.scalar(text("SELECT count(*) FROM messages WHERE btrim(content) <> ''"))
+        rows = (await session.execute(text("""
+            SELECT em.model, em.state, em.created_at, em.activated_at,
+                   (SELECT count(*) FROM model_embeddings e WHERE e.model = em.model) AS vectors
+            FROM embedding_models em
+            ORDER BY em.created_at
+        """))).all()
+        retired = (await session.execute(
+            text("""
+                SELECT a.attname FROM pg_attribute a
+                WHERE a.attrelid = CAST('messages' AS regclass) AND NOT a.attisdropped
+                  AND (right(a.attname, length(:retired)) = :retired OR right(a.attname, length(:staged)) = :staged)
+                ORDER BY a.attname
+            """),
+            {'retired': RETIRED_SUFFIX, 'staged': STAGED_SUFFIX}
+        )).scalars().all()
+        active = await active_embedding_model(session)
+    return {
+        'active': active,
+        'messages': messages,
+        'models': [dict(row._mapping) for row in rows],
+        'leftover_columns': list(retired)
+    }
+
+async def cleanup_migrations(batch_size: int = 10000) -> AsyncIterator[int]:
+    """Drop what past cutovers left behind, yielding staged vectors deleted so far.
+
+    The _retired (and any abandoned _next) message columns are dropped, which
+    only touches the catalog; their space is reused as rows are rewritten.
+    Staged vectors of models that are no longer backfilling are deleted in
+    batches.
+    """
+    status = await migration_status()
+    async with get_session() as session:
+        for column in status['leftover_columns']:
+            await session.execute(text(f"ALTER TABLE messages DROP COLUMN IF EXISTS {column}"))
+
+    deleted = 0
+    while True:
+        async with get_session() as session:
+            result = await session.execute(
+                text("""
+                    DELETE FROM model_embeddings e
+                    USING (
+                        SELECT me.model, me.message_id
+                        FROM model_embeddings me
+                        JOIN embedding_models em ON em.model = me.model
+                        WHERE em.state <> 'backfill'
+                        LIMIT :batch_size
+                    ) d
+                    WHERE e.model = d.model AND e.message_id = d.message_id
+                """),
+                {'batch_size': batch_size}
+            )
+        if not result.rowcount:
+            return
+        deleted += result.rowcount
+        yield deleted
+
+__all__ = [
+    'STAGED_SUFFIX', 'RETIRED_SUFFIX', 'active_embedding_model', 'ModelMigration',
+    'migration_status', 'cleanup_migrations'
+]
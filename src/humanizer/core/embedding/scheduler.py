@@ -0,0 +1,174 @@
+# src/humanizer/core/embedding/scheduler.py
+import asyncio
+import math
+import time
+from typing import List, Optional
+import httpx
+from humanizer.config import get_settings
+from humanizer.core.embedding.service import EmbeddingService
+from humanizer.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+def is_overload_error(error: BaseException) -> bool:
+    """True for failures that signal an overloaded server rather than a bad input"""
+    cause = error.__cause__ or error
+    if isinstance(cause, httpx.TimeoutException):
+        return True
+    if isinstance(cause, httpx.HTTPStatusError):
+        return cause.response.status_code >= 500
+    return False
+
+def error_kind(error: Optional[BaseException]) -> str:
+    """Coarse failure category for reporting: overload, http, model or unknown"""
+    if error is None:
+        return 'unknown'
+    if is_overload_error(error):
+        return 'overload'
+    if isinstance(error.__cause__ or error, httpx.HTTPError):
+        return 'http'
+    return 'model'
+
+class ConcurrencyLimiter:
+    """Semaphore whose limit can change at runtime, with optional AIMD control.
+
+    In adaptive mode the limit grows by one after a full window of requests whose
+    per-item latency stays within latency_tolerance of the best seen, and halves
+    on timeouts, 5xx responses or latency above twice the best.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        minimum: int = 1,
+        maximum: int = 64,
+        adaptive: bool = False,
+        latency_tolerance: float = 1.5
+    ):
+        self.limit = max(minimum, min(limit, maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.adaptive = adaptive
+        self.latency_tolerance = latency_tolerance
+        self.in_flight = 0
+        self.best_latency: Optional[float] = None
+        self._window = 0
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def record_success(self, latency_per_item: float) -> None:
+        """Feed back the latency of a completed request"""
+        if not self.adaptive:
+            return
+        if self.best_latency is None or latency_per_item < self.best_latency:
+            self.best_latency = latency_per_item
+
+        if latency_per_item > self.best_latency * 2:
+            self.record_overload()
+        elif latency_per_item <= self.best_latency * self.latency_tolerance:
+            self._window += 1
+            if self._window >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self._window = 0
+                logger.debug(f"Embedding concurrency raised to {self.limit}")
+
+    def record_overload(self) -> None:
+        """Back off multiplicatively, at most once per cooldown so a burst of failures counts once"""
+        if not self.adaptive:
+            return
+        now = time.monotonic()
+        cooldown = max(1.0, (self.best_latency or 0.0) * self.limit)
+        if now - self._last_decrease < cooldown:
+            return
+        self._last_decrease = now
+        self._window = 0
+        self.limit = max(self.minimum, self.limit // 2)
+        logger.info(f"Embedding concurrency reduced to {self.limit}")
+
+class EmbeddingScheduler:
+    """Runs batched embedding requests concurrently under a (possibly adaptive) in-flight limit"""
+
+    def __init__(
+        self,
+        service: EmbeddingService,
+        concurrency: Optional[int] = None,
+        adaptive: Optional[bool] = None,
+        max_retries: int = 3
+    ):
+        settings = get_settings()
+        self.service = service
+        self.max_retries = max_retries
+        self.limiter = ConcurrencyLimiter(
+            concurrency or settings.embedding_concurrency,
+            maximum=settings.embedding_max_concurrency,
+            adaptive=settings.embedding_adaptive_concurrency if adaptive is None else adaptive
+        )
+
+    async def _run_request(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Send one request, retrying overload failures and isolating bad inputs otherwise.
+
+        When overload retries run out the whole request fails with the overload
+        recorded for each text, so its jobs back off and run later instead of
+        being split into more requests to a server that is already struggling.
+        """
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            started = time.perf_counter()
+            try:
+                embeddings = await self.service._embed_request(texts)
+            except Exception as e:
+                if not is_overload_error(e):
+                    break
+                self.limiter.record_overload()
+                if attempt < self.max_retries:
+                    logger.warning(f"Embedding server overloaded ({str(e)}), retrying")
+                    await asyncio.sleep(0.5 * 2 ** attempt)
+                    continue
+                logger.warning(f"Embedding server still overloaded ({str(e)}), deferring {len(texts)} texts")
+                for text in texts:
+                    self.service.failures[text] = e
+                return [None] * len(texts)
+            else:
+                self.limiter.record_success((time.perf_counter() - started) / len(texts))
+                return list(embeddings)
+            finally:
+                await self.limiter.release()
+
+        await self.limiter.acquire()
+        try:
+            return await self.service._embed_isolating(texts)
+        finally:
+            await self.limiter.release()
+
+    async def embed(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed texts concurrently; results align with texts (None for empty or failed inputs).
+
+        Why inputs failed is left in service.failures until the next call.
+        """
+        self.service.failures.clear()
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        indexes = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not indexes:
+            return results
+
+        # Size requests so there are enough of them to fill the in-flight limit
+        per_request = max(1, math.ceil(len(indexes) / self.limiter.limit))
+        chunks = self.service._request_chunks(indexes, texts, max_items=per_request)
+
+        async def run(chunk: List[int]) -> None:
+            embeddings = await self._run_request([texts[i] for i in chunk])
+            for i, embedding in zip(chunk, embeddings):
+                results[i] = embedding
+
+        await asyncio.gather(*(run(chunk) for chunk in chunks))
+        return results
@@ -1,71 +1,285 @@
 # src/humanizer/core/embedding/service.py
-from typing import List
+from typing import Dict, List, Optional, Sequence
 import httpx
+import numpy as np
 from humanizer.config import get_settings
+from humanizer.core.embedding.cache import cache_key, get_embedding_cache
+from humanizer.db.session import on_shutdown
 from humanizer.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Task prefix for proper instruction
+DOCUMENT_PREFIX = "search_document: "
+
+def vector_literal(embedding: Sequence[float]) -> str:
+    """Text form of a vector for casting to ::vector in SQL"""
+    return '[' + ','.join(repr(float(x)) for x in embedding) + ']'
+
+def normalize_vectors(vectors: Sequence[Sequence[float]]) -> List[List[float]]:
+    """L2-normalize a batch of vectors in one vectorized pass; zero vectors are left as they are"""
+    if not vectors:
+        return []
+    matrix = np.asarray(vectors, dtype=np.float64)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix.tolist()
+
+def truncate_vectors(vectors: Sequence[Sequence[float]], dimensions: int) -> List[List[float]]:
+    """Normalized Matryoshka prefixes of full-length vectors"""
+    return normalize_vectors([vector[:dimensions] for vector in vectors])
+
+# Keep-alive client shared by every EmbeddingService in the process
+_shared_client: Optional[httpx.AsyncClient] = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get (lazily creating) the pooled HTTP client used for Ollama calls"""
+    global _shared_client
+    if _shared_client is None or _shared_client.is_closed:
+        settings = get_settings()
+        _shared_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.ollama_max_connections,
+                max_keepalive_connections=settings.ollama_max_keepalive,
+                keepalive_expiry=settings.ollama_keepalive_expiry
+            ),
+            timeout=httpx.Timeout(settings.ollama_timeout, connect=settings.ollama_connect_timeout)
+        )
+    return _shared_client
+
+@on_shutdown
+async def close_http_client() -> None:
+    """Close the shared Ollama client and its pooled connections"""
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
+
 class EmbeddingService:
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
+        self._client = client
         self.settings = get_settings()
         self.embedding_model = self.settings.embedding_model
         self.embedding_dimensions = self.settings.embedding_dimensions
+        self.batch_max_items = self.settings.embedding_batch_max_items
+        self.batch_max_chars = self.settings.embedding_batch_max_chars
+        self.cache = get_embedding_cache()
+        # Why each text that could not be embedded on its own failed, for job bookkeeping;
+        # callers clear it once they have read a batch's failures
+        self.failures: Dict[str, Exception] = {}
         logger.info(f"Initializing EmbeddingService with model={self.embedding_model}, dims={self.embedding_dimensions}")
 
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """HTTP client for Ollama: the one passed in, or the process-wide pooled client"""
+        if self._client is not None:
+            return self._client
+        return get_http_client()
+
+    async def aclose(self) -> None:
+        """Close the HTTP client handed to this service, if any.
+
+        The process-wide pooled client is shared with every other service and
+        search, so it is left open; close_http_client closes it at shutdown.
+        """
+        if self._client is not None:
+            await self._client.aclose()
+
+    async def __aenter__(self) -> "EmbeddingService":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def _fit_dimensions(self, embedding: List[float]) -> List[float]:
+        """Validate a model vector; it is kept at full length so Matryoshka
+        prefixes of any size can be cut from it later"""
+        if not embedding:
+            raise ValueError("No embedding returned from API")
+
+        if len(embedding) < self.embedding_dimensions:
+            logger.error(f"Model returned {len(embedding)} dimensions, expected {self.embedding_dimensions}")
+            raise ValueError("Insufficient dimensions from model")
+
+        return embedding
+
+    def _cache_keys(self, texts: List[str]) -> List[bytes]:
+        # Full-length vectors are cached; 0 marks them as untruncated
+        return [
+            cache_key(self.embedding_model, 0, DOCUMENT_PREFIX, text)
+            for text in texts
+        ]
+
+    def cached_embeddings(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Bulk cache lookup; results align with texts, None for misses"""
+        if self.cache is None or not texts:
+            return [None] * len(texts)
+        keys = self._cache_keys(texts)
+        found = self.cache.get_many(keys)
+        return [found.get(key) for key in keys]
+
+    def cache_embeddings(self, texts: List[str], embeddings: List[Optional[List[float]]]) -> None:
+        """Store freshly created embeddings in the cache"""
+        if self.cache is None:
+            return
+        self.cache.put_many(
+            (key, embedding)
+            for key, embedding in zip(self._cache_keys(texts), embeddings)
+            if embedding is not None
+        )
+
     async def create_embedding(self, text: str) -> List[float]:
-        """Create embedding vector for text using Ollama."""
+        """Create embedding vector for text using Ollama, truncated to embedding_dimensions."""
+        embedding = self.cached_embeddings([text])[0]
+        if embedding is None:
+            embedding = await self._create_embedding(text)
+            self.cache_embeddings([text], [embedding])
+        return truncate_vectors([embedding], self.embedding_dimensions)[0]
+
+    async def _create_embedding(self, text: str) -> List[float]:
+        """Call Ollama's single-text embeddings endpoint."""
         try:
-            # Add task prefix for proper instruction
-            prefixed_text = f"search_document: {text}"
+            prefixed_text = f"{DOCUMENT_PREFIX}{text}"
 
             logger.debug(f"Creating embedding for text length {len(prefixed_text)}")
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.settings.ollama_base_url}/api/embeddings",
-                    json={
-                        "model": self.embedding_model,
-                        "prompt": prefixed_text,
-                        "options": {
-                            "num_ctx": 8192  # Support longer context
-                        }
-                    },
-                    timeout=30.0
-                )
-                response.raise_for_status()
-                data = response.json()
+            response = await self.client.post(
+                f"{self.settings.ollama_base_url}/api/embeddings",
+                json={
+                    "model": self.embedding_model,
+                    "prompt": prefixed_text,
+                    "options": {
+                        "num_ctx": 8192  # Support longer context
+                    }
+                }
+            )
+            response.raise_for_status()
+            data = response.json()
 
-                if 'error' in data:
-                    raise ValueError(f"Ollama API error: {data['error']}")
+            if 'error' in data:
+                raise ValueError(f"Ollama API error: {data['error']}")
 
-                embedding = data.get("embedding", [])
-                if not embedding:
-                    logger.error(f"No embedding in response. Full response: {data}")
-                    raise ValueError("No embedding returned from API")
+            embedding = data.get("embedding", [])
+            if not embedding:
+                logger.error(f"No embedding in response. Full response: {data}")
 
-                # Handle Matryoshka dimensionality
-                if len(embedding) > self.embedding_dimensions:
-                    embedding = embedding[:self.embedding_dimensions]
-                elif len(embedding) < self.embedding_dimensions:
-                    logger.error(f"Model returned {len(embedding)} dimensions, expected {self.embedding_dimensions}")
-                    raise ValueError("Insufficient dimensions from model")
-
-                return embedding
+            return self._fit_dimensions(embedding)
 
         except httpx.HTTPError as e:
             logger.error(f"HTTP error while calling Ollama API: {str(e)}")
-            raise ValueError(f"HTTP error: {str(e)}")
+            raise ValueError(f"HTTP error: {str(e)}") from e
         except Exception as e:
             logger.error(f"Failed to create embedding: {str(e)}")
             raise
 
+    async def _embed_request(self, texts: List[str]) -> List[List[float]]:
+        """Embed several texts with one call to Ollama's /api/embed endpoint."""
+        try:
+            response = await self.client.post(
+                f"{self.settings.ollama_base_url}/api/embed",
+                json={
+                    "model": self.embedding_model,
+                    "input": [f"{DOCUMENT_PREFIX}{text}" for text in texts],
+                    "options": {
+                        "num_ctx": 8192  # Support longer context
+                    }
+                },
+                timeout=httpx.Timeout(
+                    self.settings.ollama_timeout + 2.0 * len(texts),
+                    connect=self.settings.ollama_connect_timeout
+                )
+            )
+            response.raise_for_status()
+            data = response.json()
+        except httpx.HTTPError as e:
+            logger.error(f"HTTP error while calling Ollama API: {str(e)}")
+            raise ValueError(f"HTTP error: {str(e)}") from e
+
+        if 'error' in data:
+            raise ValueError(f"Ollama API error: {data['error']}")
+
+        embeddings = data.get("embeddings") or []
+        if len(embeddings) != len(texts):
+            raise ValueError(f"Ollama returned {len(embeddings)} embeddings for {len(texts)} inputs")
+
+        return [self._fit_dimensions(embedding) for embedding in embeddings]
+
+    async def _embed_isolating(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed a request's worth of texts, splitting failed requests in half to isolate bad inputs."""
+        try:
+            return await self._embed_request(texts)
+        except Exception as e:
+            if len(texts) == 1:
+                logger.error(f"Failed to create embedding: {str(e)}")
+                self.failures[texts[0]] = e
+                return [None]
+            logger.warning(f"Batch of {len(texts)} failed ({str(e)}), splitting")
+            middle = len(texts) // 2
+            return (
+                await self._embed_isolating(texts[:middle])
+                + await self._embed_isolating(texts[middle:])
+            )
+
+    def _request_chunks(
+        self,
+        indexes: List[int],
+        texts: List[str],
+        max_items: Optional[int] = None
+    ) -> List[List[int]]:
+        """Group text indexes into requests bounded by max items and max total characters"""
+        max_items = min(max_items or self.batch_max_items, self.batch_max_items)
+        chunks: List[List[int]] = []
+        chunk_chars = 0
+        for i in indexes:
+            size = len(texts[i])
+            if chunks and len(chunks[-1]) < max_items and chunk_chars + size <= self.batch_max_chars:
+                chunks[-1].append(i)
+                chunk_chars += size
+            else:
+                chunks.append([i])
+                chunk_chars = size
+        return chunks
+
+    async def embed_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Create full-length embeddings for many texts using batched requests.
+
+        Results are aligned with texts; empty texts and inputs that failed on their
+        own map to None, with the reason in failures until the next call. Use
+        truncate_vectors for embedding_dimensions vectors.
+        """
+        # Only this call's failures are kept, so a long-lived service doesn't accumulate them
+        self.failures.clear()
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        indexes = [i for i, text in enumerate(texts) if text and text.strip()]
+
+        cached = self.cached_embeddings([texts[i] for i in indexes])
+        misses = []
+        for i, embedding in zip(indexes, cached):
+            if embedding is None:
+                misses.append(i)
+            else:
+                results[i] = embedding
+
+        for chunk in self._request_chunks(misses, texts):
+            chunk_texts = [texts[i] for i in chunk]
+            embeddings = await self._embed_isolating(chunk_texts)
+            self.cache_embeddings(chunk_texts, embeddings)
+            for i, embedding in zip(chunk, embeddings):
+                results[i] = embedding
+
+        return results
+
     async def create_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
         """Create embeddings for multiple texts."""
-        embeddings = []
+        non_empty = []
         for text in texts:
             if not text.strip():  # Skip empty texts
                 logger.warning("Skipping empty text")
                 continue
-            embedding = await self.create_embedding(text)
-            embeddings.append(embedding)
-        return embeddings
+            non_empty.append(text)
+
+        embeddings = await self.embed_many(non_empty)
+        failed = sum(1 for embedding in embeddings if embedding is None)
+        if failed:
+            raise ValueError(f"Failed to embed {failed} of {len(non_empty)} texts")
+        return truncate_vectors([embedding for embedding in embeddings if embedding is not None],
+                                self.embedding_dimensions)
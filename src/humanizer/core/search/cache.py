@@ -0,0 +1,89 @@
+# src/humanizer/core/search/cache.py
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from humanizer.config import get_settings
+from humanizer.core.embedding.cache import EmbeddingCache, cache_key, get_embedding_cache
+
+# Distinguishes query entries from document embeddings in the shared disk cache
+QUERY_KEY_PREFIX = "query:"
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and case so trivially different queries share an entry"""
+    return " ".join(query.split()).casefold()
+
+class QueryEmbeddingCache:
+    """In-memory LRU of query embeddings with a TTL, optionally backed by the disk embedding cache"""
+
+    def __init__(self, max_size: int, ttl: float, backing: Optional[EmbeddingCache] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.backing = backing
+        self.hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._entries: "OrderedDict[bytes, Tuple[float, List[float]]]" = OrderedDict()
+
+    def key(self, model: str, dimensions: int, query: str) -> bytes:
+        return cache_key(model, dimensions, QUERY_KEY_PREFIX, normalize_query(query))
+
+    def get(self, key: bytes) -> Optional[List[float]]:
+        """Return a cached embedding, promoting disk hits into memory"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            stored_at, embedding = entry
+            if time.monotonic() - stored_at <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return embedding
+            del self._entries[key]
+            self.expired += 1
+
+        if self.backing is not None:
+            embedding = self.backing.get_many([key]).get(key)
+            if embedding is not None:
+                self._remember(key, embedding)
+                self.persistent_hits += 1
+                return embedding
+
+        self.misses += 1
+        return None
+
+    def put(self, key: bytes, embedding: List[float]) -> None:
+        self._remember(key, embedding)
+        if self.backing is not None:
+            self.backing.put_many([(key, embedding)])
+
+    def _remember(self, key: bytes, embedding: List[float]) -> None:
+        self._entries[key] = (time.monotonic(), embedding)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.persistent_hits + self.misses
+        return {
+            'hits': self.hits,
+            'persistent_hits': self.persistent_hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'hit_rate': (self.hits + self.persistent_hits) / lookups if lookups else 0.0,
+            'size': len(self._entries),
+            'max_size': self.max_size
+        }
+
+_query_cache: Optional[QueryEmbeddingCache] = None
+
+def get_query_cache() -> QueryEmbeddingCache:
+    """Get the process-wide query embedding cache"""
+    global _query_cache
+    if _query_cache is None:
+        settings = get_settings()
+        _query_cache = QueryEmbeddingCache(
+            max_size=settings.search_query_cache_size,
+            ttl=settings.search_query_cache_ttl,
+            backing=get_embedding_cache() if settings.search_query_cache_persistent else None
+        )
+    return _query_cache
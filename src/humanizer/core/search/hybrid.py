@@ -0,0 +1,114 @@
+# src/humanizer/core/search/hybrid.py
+from typing import Any, Dict, List, Optional
+from sqlalchemy import bindparam, text
+from humanizer.db.models.content import TEXT_SEARCH_CONFIG
+from humanizer.db.session import get_session
+from humanizer.db.indexes import apply_recall_profile
+from humanizer.db.storage import embedding_column_type
+from humanizer.core.search.vector import VectorSearch
+
+class HybridSearch:
+    """Vector plus full-text search fused with reciprocal rank fusion in one statement"""
+
+    def __init__(self, vector_search: Optional[VectorSearch] = None):
+        self.vector_search = vector_search or VectorSearch()
+        self.settings = self.vector_search.embedding_service.settings
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 10,
+        vector_weight: float = 1.0,
+        text_weight: float = 1.0,
+        k: Optional[int] = None,
+        candidates: Optional[int] = None,
+        role: Optional[str] = None,
+        recall: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Fuse the top vector and full-text candidates by weighted RRF.
+
+        Each side contributes weight / (k + rank) for the messages in its top
+        `candidates`; a message found by only one side scores from that side alone.
+        Results carry the fused score plus each side's similarity/rank and position.
+        """
+        candidates = candidates or self.settings.search_hybrid_candidates
+        query_embedding = await self.vector_search.embed_query(query)
+        role_filter = "AND m.role = :role" if role else ""
+
+        stmt = text(f"""
+            WITH q AS (
+                SELECT websearch_to_tsquery(CAST(:config AS regconfig), :query) AS query
+            ),
+            vector_hits AS (
+                SELECT id, similarity, row_number() OVER (ORDER BY distance) AS position
+                FROM (
+                    SELECT m.id, m.embedding <=> :embedding AS distance,
+                           1 - (m.embedding <=> :embedding) AS similarity
+                    FROM messages m
+                    WHERE m.embedding IS NOT NULL {role_filter}
+                    ORDER BY m.embedding <=> :embedding
+                    LIMIT :candidates
+                ) nearest
+            ),
+            text_hits AS (
+                SELECT id, text_rank, row_number() OVER (ORDER BY text_rank DESC, id) AS position
+                FROM (
+                    SELECT m.id, ts_rank_cd(m.search_vector, q.query) AS text_rank
+                    FROM messages m, q
+                    WHERE m.search_vector @@ q.query {role_filter}
+                    ORDER BY text_rank DESC, m.id
+                    LIMIT :candidates
+                ) matched
+            ),
+            fused AS (
+                SELECT coalesce(v.id, t.id) AS id,
+                       coalesce(CAST(:vector_weight AS float8) / (CAST(:k AS float8) + v.position), 0)
+                         + coalesce(CAST(:text_weight AS float8) / (CAST(:k AS float8) + t.position), 0) AS score,
+                       v.similarity, v.position AS vector_position,
+                       t.text_rank, t.position AS text_position
+                FROM vector_hits v
+                FULL OUTER JOIN text_hits t ON t.id = v.id
+                ORDER BY score DESC
+                LIMIT :limit
+            )
+            SELECT f.*, m.content, m.role, m.conversation_id, m.create_time
+            FROM fused f
+            JOIN messages m ON m.id = f.id
+            ORDER BY f.score DESC
+        """).bindparams(bindparam(
+            'embedding',
+            type_=embedding_column_type(dimensions=self.vector_search.embedding_service.embedding_dimensions)
+        ))
+
+        params: Dict[str, Any] = {
+            'config': TEXT_SEARCH_CONFIG,
+            'query': query,
+            'embedding': query_embedding,
+            'candidates': candidates,
+            'vector_weight': float(vector_weight),
+            'text_weight': float(text_weight),
+            'k': float(k if k is not None else self.settings.search_rrf_k),
+            'limit': limit
+        }
+        if role:
+            params['role'] = role
+
+        async with get_session() as session:
+            await apply_recall_profile(session, recall or self.settings.search_recall)
+            rows = (await session.execute(stmt, params)).all()
+
+        return [
+            {
+                "id": row.id,
+                "content": row.content,
+                "role": row.role,
+                "conversation_id": row.conversation_id,
+                "create_time": row.create_time,
+                "score": row.score,
+                "similarity": row.similarity,
+                "vector_position": row.vector_position,
+                "text_rank": row.text_rank,
+                "text_position": row.text_position
+            }
+            for row in rows
+        ]
@@ -0,0 +1,201 @@
+# src/humanizer/core/search/text.py
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import select, func, literal, text
+from humanizer.db.models import Content, Message
+from humanizer.db.models.content import TEXT_SEARCH_CONFIG
+from humanizer.db.session import get_session
+
+HEADLINE_OPTIONS = "StartSel=**, StopSel=**, MaxWords=35, MinWords=15, MaxFragments=2"
+
+def encode_cursor(rank: float, message_id: UUID) -> str:
+    """Opaque position after a result, for fetching the next page"""
+    return f"{rank!r}:{message_id}"
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so the value matches literally"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def decode_cursor(cursor: str) -> Tuple[float, UUID]:
+    try:
+        rank, message_id = cursor.split(':', 1)
+        return float(rank), UUID(message_id)
+    except ValueError:
+        raise ValueError(f"Invalid search cursor: {cursor}")
+
+class TextSearch:
+    """Full-text, substring and fuzzy search over message content"""
+
+    def __init__(self, config: str = TEXT_SEARCH_CONFIG):
+        self.config = config
+
+    async def search(
+        self,
+        query: str,
+        limit: int = 20,
+        after: Optional[str] = None,
+        role: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Rank messages matching a web-style query (quotes, OR, -word) with ts_rank_cd.
+
+        Title matches add weight to a conversation's matching messages. A
+        conversation matched by its title alone is ranked once, as its first
+        message, so it can't crowd the page with every message it holds.
+        Pages are keyed on (rank, id): pass the last result's cursor as `after` for
+        the next page. Only a ts_headline snippet of each message is returned.
+        """
+        params: Dict[str, Any] = {'config': self.config, 'query': query, 'limit': limit,
+                                  'options': HEADLINE_OPTIONS}
+        filters = []
+        if role:
+            filters.append("m.role = :role")
+            params['role'] = role
+        extra_filters = ''.join(f" AND {condition}" for condition in filters)
+        page = ""
+        if after:
+            params['after_rank'], params['after_id'] = decode_cursor(after)
+            page = "WHERE (r.rank, r.id) < (CAST(:after_rank AS real), CAST(:after_id AS uuid))"
+
+        async with get_session() as session:
+            result = await session.execute(
+                text(f"""
+                    WITH q AS (
+                        SELECT websearch_to_tsquery(CAST(:config AS regconfig), :query) AS query
+                    ),
+                    content_ranked AS (
+                        SELECT m.id, m.conversation_id, m.role, m.create_time, c.title,
+                               ts_rank_cd(setweight(c.title_vector, 'A') || m.search_vector, q.query) AS rank
+                        FROM messages m
+                        JOIN content c ON c.id = m.conversation_id, q
+                        WHERE m.search_vector @@ q.query {extra_filters}
+                    ),
+                    title_ranked AS (
+                        SELECT DISTINCT ON (c.id)
+                               m.id, m.conversation_id, m.role, m.create_time, c.title,
+                               ts_rank_cd(setweight(c.title_vector, 'A'), q.query) AS rank
+                        FROM content c
+                        JOIN messages m ON m.conversation_id = c.id, q
+                        WHERE c.title_vector @@ q.query {extra_filters}
+                          AND NOT EXISTS (SELECT 1 FROM content_ranked x WHERE x.conversation_id = c.id)
+                        ORDER BY c.id, m.position, m.id
+                    ),
+                    ranked AS (
+                        SELECT * FROM content_ranked
+                        UNION ALL
+                        SELECT * FROM title_ranked
+                    ),
+                    page AS (
+                        SELECT r.* FROM ranked r
+                        {page}
+                        ORDER BY r.rank DESC, r.id DESC
+                        LIMIT :limit
+                    )
+                    -- Headlines are computed for the page only
+                    SELECT p.*, ts_headline(CAST(:config AS regconfig), m.content, q.query, :options) AS snippet
+                    FROM page p
+                    JOIN messages m ON m.id = p.id, q
+                    ORDER BY p.rank DESC, p.id DESC
+                """),
+                params
+            )
+            rows = result.all()
+
+        return [
+            {
+                "id": row.id,
+                "conversation_id": row.conversation_id,
+                "title": row.title,
+                "role": row.role,
+                "rank": row.rank,
+                "snippet": row.snippet,
+                "create_time": row.create_time,
+                "cursor": encode_cursor(row.rank, row.id)
+            }
+            for row in rows
+        ]
+
+    async def substring(
+        self,
+        pattern: str,
+        limit: int = 20,
+        case_sensitive: bool = False,
+        role: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream messages containing a literal substring.
+
+        LIKE/ILIKE patterns of three or more characters are served by the trigram
+        index (see `humanizer db index trigram`). Each result carries the text
+        around the first occurrence rather than the whole message.
+        """
+        content = Message.content
+        wildcard = f"%{escape_like(pattern)}%"
+        if case_sensitive:
+            match = content.like(wildcard, escape='\\')
+            position = func.strpos(content, pattern)
+        else:
+            match = content.ilike(wildcard, escape='\\')
+            position = func.strpos(func.lower(content), pattern.lower())
+        snippet = func.substr(content, func.greatest(position - 60, 1), 200)
+
+        stmt = (
+            select(Message.id, Message.conversation_id, Message.role, Content.title, snippet.label('snippet'))
+            .join(Content, Content.id == Message.conversation_id)
+            .where(match)
+        )
+        if role:
+            stmt = stmt.where(Message.role == role)
+
+        async with get_session() as session:
+            result = await session.stream(stmt.limit(limit))
+            async for row in result:
+                yield {
+                    "id": row.id,
+                    "conversation_id": row.conversation_id,
+                    "title": row.title,
+                    "role": row.role,
+                    "snippet": row.snippet
+                }
+
+    async def fuzzy(
+        self,
+        query: str,
+        limit: int = 20,
+        threshold: Optional[float] = None,
+        role: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream messages containing text similar to the query, most similar first.
+
+        Uses pg_trgm word similarity (query <% content), which scores the best
+        matching stretch of a message rather than the whole message, and is served
+        by the trigram index. threshold overrides pg_trgm.word_similarity_threshold
+        (default 0.6) for this query.
+        """
+        score = func.word_similarity(query, Message.content)
+        stmt = (
+            select(
+                Message.id, Message.conversation_id, Message.role, Content.title,
+                func.left(Message.content, 200).label('snippet'),
+                score.label('similarity')
+            )
+            .join(Content, Content.id == Message.conversation_id)
+            .where(literal(query).op('<%')(Message.content))
+        )
+        if role:
+            stmt = stmt.where(Message.role == role)
+
+        async with get_session() as session:
+            if threshold is not None:
+                await session.execute(
+                    text("SELECT set_config('pg_trgm.word_similarity_threshold', :value, true)"),
+                    {'value': str(threshold)}
+                )
+            result = await session.stream(stmt.order_by(score.desc()).limit(limit))
+            async for row in result:
+                yield {
+                    "id": row.id,
+                    "conversation_id": row.conversation_id,
+                    "title": row.title,
+                    "role": row.role,
+                    "snippet": row.snippet,
+                    "similarity": row.similarity
+                }
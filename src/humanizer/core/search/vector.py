@@ -1,14 +1,85 @@
 # src/humanizer/core/search/vector.py
-from typing import List, Dict, Optional, Any
+import time
+from typing import AsyncIterator, List, Dict, Optional, Any, Sequence, Tuple
 from datetime import datetime
-from sqlalchemy import select, func, and_
-from humanizer.db.models import Message, Content
+from uuid import UUID
+from sqlalchemy import bindparam, cast, select, func, and_, text
+from pgvector.sqlalchemy import Vector
+from humanizer.db.models import Message, Content, ConversationEmbedding
 from humanizer.db.session import get_session
-from humanizer.core.embedding.service import EmbeddingService
+from humanizer.db.indexes import apply_recall_profile, binary_quantized, widen_ef_search
+from humanizer.db.storage import embedding_column_type, embedding_sql_type
+from humanizer.core.embedding.service import EmbeddingService, truncate_vectors, vector_literal
+from humanizer.core.embedding.scheduler import EmbeddingScheduler
+from humanizer.core.embedding.centroids import get_conversation_embedding
+from humanizer.core.embedding.migration import active_embedding_model
+from humanizer.core.search.cache import get_query_cache
+
+# Cheaper first stages for two-stage search (see VectorSearch.search_embedding)
+COARSE_MODES = ('binary', 'prefix')
 
 class VectorSearch:
     def __init__(self):
         self.embedding_service = EmbeddingService()
+        self.query_cache = get_query_cache()
+        self._model_checked_at: Optional[float] = None
+
+    async def use_active_model(self) -> str:
+        """Embed queries with the model whose vectors are live, which changes at a cutover.
+
+        The lookup is reused for search_active_model_ttl seconds, so queries
+        answered from the query cache don't each cost a database round trip.
+        """
+        now = time.monotonic()
+        ttl = self.embedding_service.settings.search_active_model_ttl
+        if self._model_checked_at is None or now - self._model_checked_at >= ttl:
+            async with get_session() as session:
+                self.embedding_service.embedding_model = await active_embedding_model(session)
+            self._model_checked_at = now
+        return self.embedding_service.embedding_model
+
+    async def embed_query(self, query: str) -> List[float]:
+        """Embed a search query, skipping the model call on a cache hit"""
+        await self.use_active_model()
+        key = self.query_cache.key(
+            self.embedding_service.embedding_model,
+            self.embedding_service.embedding_dimensions,
+            query
+        )
+        embedding = self.query_cache.get(key)
+        if embedding is None:
+            embedding = await self.embedding_service.create_embedding(query)
+            self.query_cache.put(key, embedding)
+        return embedding
+
+    async def embed_queries(self, queries: Sequence[str]) -> List[Optional[List[float]]]:
+        """Embed many queries, sending cache misses to the model in concurrent batched requests"""
+        await self.use_active_model()
+        keys = [
+            self.query_cache.key(
+                self.embedding_service.embedding_model,
+                self.embedding_service.embedding_dimensions,
+                query
+            )
+            for query in queries
+        ]
+        embeddings = [self.query_cache.get(key) for key in keys]
+        misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if misses:
+            created = await EmbeddingScheduler(self.embedding_service).embed([queries[i] for i in misses])
+            for i, embedding in zip(misses, created):
+                if embedding is not None:
+                    # The model returns full-length vectors; queries use the stored prefix length
+                    embedding = truncate_vectors([embedding], self.embedding_service.embedding_dimensions)[0]
+                    self.query_cache.put(keys[i], embedding)
+                embeddings[i] = embedding
+            # A failed query just maps to None; don't hold on to why
+            self.embedding_service.failures.clear()
+        return embeddings
+
+    def cache_stats(self) -> Dict[str, float]:
+        """Query embedding cache statistics"""
+        return self.query_cache.stats
 
     async def search(
         self,
@@ -18,44 +89,96 @@ class VectorSearch:
         role: Optional[str] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        meta_filter: Optional[Dict[str, Any]] = None
+        meta_filter: Optional[Dict[str, Any]] = None,
+        recall: Optional[str] = None,
+        coarse: Optional[str] = None,
+        oversample: Optional[int] = None
     ) -> List[Dict]:
-        """Search messages using vector similarity with optional filters"""
-        query_embedding = await self.embedding_service.create_embedding(query)
+        """Search messages using vector similarity with optional filters.
 
-        async with get_session() as session:
-            stmt = select(
-                Message,
-                Message.embedding.cosine_distance(query_embedding).label('distance')
-            ).where(
-                and_(
-                    Message.embedding.is_not(None),
-                    Message.content.is_not(None),
-                    Message.content != '',
-                    # Filter out search commands
-                    ~Message.content.ilike('search(%'),
-                    ~Message.content.ilike('search "%'),
-                    # Filter out very short messages
-                    func.length(Message.content) > 50
-                )
-            )
+        recall picks the ANN search profile (see RECALL_PROFILES); it defaults to
+        the search_recall setting. coarse picks a two-stage search (see
+        search_embedding).
+        """
+        query_embedding = await self.embed_query(query)
+        return await self.search_embedding(
+            query_embedding,
+            limit=limit,
+            min_similarity=min_similarity,
+            role=role,
+            start_date=start_date,
+            end_date=end_date,
+            meta_filter=meta_filter,
+            recall=recall,
+            coarse=coarse,
+            oversample=oversample
+        )
+
+    async def search_embedding(
+        self,
+        query_embedding: Sequence[float],
+        limit: int = 10,
+        min_similarity: float = 0.7,
+        role: Optional[str] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        meta_filter: Optional[Dict[str, Any]] = None,
+        recall: Optional[str] = None,
+        coarse: Optional[str] = None,
+        oversample: Optional[int] = None
+    ) -> List[Dict]:
+        """Search messages nearest to an already computed query embedding.
 
-            if role:
-                stmt = stmt.where(Message.role == role)
+        With coarse, the nearest limit * oversample messages by a cheaper
+        distance are reranked by exact cosine distance against the stored
+        vectors, in the same statement. 'binary' ranks candidates by Hamming
+        distance between binary-quantized vectors (see `humanizer db index create
+        --binary`), 'prefix' by cosine distance between the short Matryoshka
+        prefixes in embedding_short (`humanizer db index create --prefix`).
+        """
+        settings = self.embedding_service.settings
+        query_embedding = list(query_embedding)
+        distance = Message.embedding.cosine_distance(query_embedding)
 
-            if start_date:
-                stmt = stmt.where(Message.create_time >= start_date)
-            if end_date:
-                stmt = stmt.where(Message.create_time <= end_date)
+        conditions = [
+            Message.embedding.is_not(None),
+            Message.content.is_not(None),
+            Message.content != '',
+            # Filter out search commands
+            ~Message.content.ilike('search(%'),
+            ~Message.content.ilike('search "%'),
+            # Filter out very short messages
+            func.length(Message.content) > 50
+        ]
+        if role:
+            conditions.append(Message.role == role)
+        if start_date:
+            conditions.append(Message.create_time >= start_date)
+        if end_date:
+            conditions.append(Message.create_time <= end_date)
+        if meta_filter:
+            for k, v in meta_filter.items():
+                conditions.append(Message.meta_info[k].astext == v)
 
-            if meta_filter:
-                for k, v in meta_filter.items():
-                    stmt = stmt.where(Message.meta_info[k].astext == v)
+        async with get_session() as session:
+            await apply_recall_profile(session, recall or settings.search_recall)
 
-            stmt = stmt.where(
-                Message.embedding.cosine_distance(query_embedding) <= (1 - min_similarity)
-            )
+            stmt = select(Message, distance.label('distance'))
+            if coarse:
+                candidates = limit * (oversample or settings.search_coarse_oversample)
+                await widen_ef_search(session, candidates)
+                coarse_query = (
+                    select(Message.id)
+                    .where(and_(*conditions))
+                    .order_by(self._coarse_distance(coarse, query_embedding))
+                    .limit(candidates)
+                    .cte('candidates')
+                )
+                stmt = stmt.join(coarse_query, coarse_query.c.id == Message.id)
+            else:
+                stmt = stmt.where(and_(*conditions))
 
+            stmt = stmt.where(distance <= (1 - min_similarity))
             stmt = stmt.order_by('distance').limit(limit)
 
             results = await session.execute(stmt)
@@ -73,38 +196,196 @@ class VectorSearch:
                 for msg in messages
             ]
 
+    def _coarse_distance(self, coarse: str, query_embedding: List[float]) -> Any:
+        """Candidate ordering of a coarse search stage, written to match its index"""
+        dimensions = self.embedding_service.embedding_dimensions
+        if coarse == 'binary':
+            query_bits = binary_quantized(
+                bindparam('query_embedding', query_embedding, type_=embedding_column_type(dimensions=dimensions)),
+                dimensions
+            )
+            return binary_quantized(Message.embedding, dimensions).op('<~>')(query_bits)
+        if coarse == 'prefix':
+            short = self.embedding_service.settings.embedding_short_dimensions
+            if not short:
+                raise ValueError("Prefix search needs embedding_short_dimensions to be set")
+            query_prefix = truncate_vectors([query_embedding], short)[0]
+            return Message.embedding_short.cosine_distance(query_prefix)
+        raise ValueError(f"Unknown coarse search: {coarse}")
+
+    async def coarse_recall(
+        self,
+        coarse: str = 'binary',
+        queries: Sequence[str] = (),
+        sample: int = 20,
+        k: int = 10,
+        oversample: Optional[int] = None,
+        recall: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Measure a two-stage search against exact search: recall@k and latency.
+
+        Uses the given queries, or else the stored embeddings of `sample` random
+        messages, so no model calls are needed.
+        """
+        if queries:
+            embeddings = [embedding for embedding in await self.embed_queries(queries) if embedding is not None]
+        else:
+            dimensions = self.embedding_service.embedding_dimensions
+            async with get_session() as session:
+                rows = await session.execute(
+                    select(cast(Message.embedding, Vector(dimensions)).label('embedding'))
+                    .where(Message.embedding.is_not(None))
+                    .order_by(func.random())
+                    .limit(sample)
+                )
+                embeddings = [list(row.embedding) for row in rows]
+
+        recalls: List[float] = []
+        exact_seconds = coarse_seconds = 0.0
+        for embedding in embeddings:
+            started = time.perf_counter()
+            exact = await self.search_embedding(embedding, limit=k, min_similarity=-1.0, recall='exact')
+            exact_seconds += time.perf_counter() - started
+
+            started = time.perf_counter()
+            approximate = await self.search_embedding(
+                embedding, limit=k, min_similarity=-1.0, recall=recall, coarse=coarse, oversample=oversample
+            )
+            coarse_seconds += time.perf_counter() - started
+
+            expected = {r['id'] for r in exact}
+            if expected:
+                recalls.append(len(expected & {r['id'] for r in approximate}) / len(expected))
+
+        measured = len(embeddings) or 1
+        return {
+            "coarse": coarse,
+            "queries": len(recalls),
+            "k": k,
+            "oversample": oversample or self.embedding_service.settings.search_coarse_oversample,
+            "recall": sum(recalls) / len(recalls) if recalls else None,
+            "min_recall": min(recalls) if recalls else None,
+            "exact_ms": exact_seconds / measured * 1000,
+            "coarse_ms": coarse_seconds / measured * 1000
+        }
+
+    async def search_many(
+        self,
+        queries: Sequence[str],
+        limit: int = 10,
+        min_similarity: float = 0.7,
+        role: Optional[str] = None,
+        recall: Optional[str] = None
+    ) -> AsyncIterator[Tuple[int, Optional[List[Dict]]]]:
+        """Run one kNN search per query in a single statement, yielding (query index, results).
+
+        Queries are embedded in batches, then unnest() feeds them to a LATERAL
+        nearest-neighbour subquery so every lookup can use the ANN index. Results
+        stream back in query order; a query that could not be embedded yields None
+        in its place.
+        """
+        embeddings = await self.embed_queries(queries)
+        ready = [i for i, embedding in enumerate(embeddings) if embedding is not None]
+        position = 0
+        if ready:
+            async for i, found in self._search_embeddings(
+                [embeddings[i] for i in ready], limit, min_similarity, role, recall
+            ):
+                for failed in range(position, ready[i]):
+                    yield failed, None
+                yield ready[i], found
+                position = ready[i] + 1
+        for failed in range(position, len(queries)):
+            yield failed, None
+
+    async def _search_embeddings(
+        self,
+        embeddings: List[List[float]],
+        limit: int,
+        min_similarity: float,
+        role: Optional[str],
+        recall: Optional[str]
+    ) -> AsyncIterator[Tuple[int, List[Dict]]]:
+        """Stream (embedding index, results) for the statement behind search_many, in embedding order"""
+        role_filter = "AND m.role = :role" if role else ""
+        params: Dict[str, Any] = {
+            'embeddings': [vector_literal(embedding) for embedding in embeddings],
+            'limit': limit,
+            'max_distance': 1 - min_similarity
+        }
+        if role:
+            params['role'] = role
+        stmt = text(f"""
+            WITH queries AS (
+                SELECT CAST(e AS {embedding_sql_type(dimensions=self.embedding_service.embedding_dimensions)}) AS embedding, ord
+                FROM unnest(CAST(:embeddings AS text[])) WITH ORDINALITY AS u(e, ord)
+            )
+            SELECT q.ord, r.*
+            FROM queries q
+            CROSS JOIN LATERAL (
+                SELECT m.id, m.content, m.role, m.conversation_id, m.create_time,
+                       m.embedding <=> q.embedding AS distance
+                FROM messages m
+                WHERE m.embedding IS NOT NULL
+                  AND m.content NOT ILIKE 'search(%'
+                  AND m.content NOT ILIKE 'search "%'
+                  AND length(m.content) > 50
+                  {role_filter}
+                ORDER BY m.embedding <=> q.embedding
+                LIMIT :limit
+            ) r
+            WHERE r.distance <= :max_distance
+            ORDER BY q.ord, r.distance
+        """)
+
+        async with get_session() as session:
+            await apply_recall_profile(session, recall or self.embedding_service.settings.search_recall)
+            result = await session.stream(stmt, params)
+
+            # Rows arrive grouped by query; emit each group once it is complete, and an
+            # empty list for queries with no neighbours above min_similarity
+            next_ord = 1
+            found: List[Dict] = []
+            async for row in result:
+                while row.ord > next_ord:
+                    yield next_ord - 1, found
+                    next_ord, found = next_ord + 1, []
+                found.append({
+                    "id": row.id,
+                    "content": row.content,
+                    "role": row.role,
+                    "conversation_id": row.conversation_id,
+                    "similarity": 1 - row.distance,
+                    "create_time": row.create_time
+                })
+            while next_ord <= len(embeddings):
+                yield next_ord - 1, found
+                next_ord, found = next_ord + 1, []
+
     async def find_similar_conversations(
         self,
         conversation_id: str,
-        limit: int = 5
+        limit: int = 5,
+        recall: Optional[str] = None
     ) -> List[Dict]:
-        """Find conversations similar to the given one"""
+        """Find conversations whose centroid is nearest to the given one's (one kNN lookup)"""
         async with get_session() as session:
-            # First get the target conversation's messages
-            target_msgs = await session.execute(
-                select(Message.embedding)
-                .where(Message.conversation_id == conversation_id)
-                .where(Message.embedding.is_not(None))
-            )
-
-            # Calculate average embedding manually
-            embeddings = [msg[0] for msg in target_msgs.fetchall()]
-            if not embeddings:
+            target = await get_conversation_embedding(session, UUID(str(conversation_id)))
+            if target is None:
                 return []
 
-            avg_embedding = [sum(x)/len(embeddings) for x in zip(*embeddings)]
-
-            # Find similar conversations
+            await apply_recall_profile(session, recall or self.embedding_service.settings.search_recall)
+            distance = ConversationEmbedding.embedding.cosine_distance(target)
             stmt = (
                 select(
-                    Content,
-                    func.avg(Message.embedding.cosine_distance(avg_embedding)).label('avg_distance')
+                    Content.id,
+                    Content.title,
+                    ConversationEmbedding.message_count,
+                    distance.label('distance')
                 )
-                .join(Message, Content.id == Message.conversation_id)
-                .where(Content.id != conversation_id)
-                .where(Message.embedding.is_not(None))
-                .group_by(Content.id)
-                .order_by('avg_distance')
+                .join(Content, Content.id == ConversationEmbedding.conversation_id)
+                .where(ConversationEmbedding.conversation_id != UUID(str(conversation_id)))
+                .order_by(distance)
                 .limit(limit)
             )
 
@@ -113,9 +394,10 @@ class VectorSearch:
 
             return [
                 {
-                    "id": conv.Content.id,
-                    "title": conv.Content.title,
-                    "similarity": 1 - conv.avg_distance
+                    "id": conv.id,
+                    "title": conv.title,
+                    "message_count": conv.message_count,
+                    "similarity": 1 - conv.distance
                 }
                 for conv in conversations
             ]
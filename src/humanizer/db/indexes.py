@@ -0,0 +1,261 @@
+# src/humanizer/db/indexes.py
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import cast, func, text
+from sqlalchemy.dialects.postgresql import BIT
+from humanizer.db.session import get_raw_connection
+from humanizer.db.storage import embedding_opclass
+from humanizer.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+VECTOR_INDEX_METHODS = ('hnsw', 'ivfflat')
+
+TRIGRAM_INDEX_NAME = 'ix_messages_content_trgm'
+
+# Name part of the index on binary-quantized message embeddings (Hamming distance)
+BINARY_INDEX_COLUMN = 'embedding_binary'
+
+# hnsw.ef_search bounds: pgvector's default and its maximum
+HNSW_EF_SEARCH_DEFAULT = 40
+HNSW_EF_SEARCH_MAX = 1000
+
+# ANN search knobs per recall/latency profile; 'exact' turns index scans off
+RECALL_PROFILES: Dict[str, Dict[str, Any]] = {
+    'fast': {'hnsw.ef_search': 40, 'ivfflat.probes': 1},
+    'balanced': {'hnsw.ef_search': 100, 'ivfflat.probes': 10},
+    'accurate': {'hnsw.ef_search': 400, 'ivfflat.probes': 40},
+    'exact': {'enable_indexscan': 'off'},
+}
+
+def vector_index_name(method: str, table: str = 'messages', column: str = 'embedding') -> str:
+    return f"ix_{table}_{column}_{method}"
+
+def _index_options(method: str, m: int, ef_construction: int, lists: int) -> str:
+    if method == 'hnsw':
+        return f"WITH (m = {int(m)}, ef_construction = {int(ef_construction)})"
+    if method == 'ivfflat':
+        return f"WITH (lists = {int(lists)})"
+    raise ValueError(f"Unknown vector index method: {method}")
+
+async def _drop_invalid_index(conn: Any, name: str) -> None:
+    """Drop an index an interrupted concurrent build left INVALID, which IF NOT EXISTS would keep"""
+    row = await conn.fetchrow(
+        """
+        SELECT i.indisvalid AS valid, p.pid IS NOT NULL AS building
+        FROM pg_index i
+        LEFT JOIN pg_stat_progress_create_index p ON p.index_relid = i.indexrelid
+        WHERE i.indexrelid = to_regclass($1)
+        """,
+        name
+    )
+    if row is None or row['valid']:
+        return
+    # A build still running elsewhere is invalid too, until it finishes
+    if row['building']:
+        raise RuntimeError(f"Index {name} is still being built by another session")
+    logger.warning(f"Dropping invalid index {name} left by an interrupted build")
+    await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+async def create_vector_index(
+    method: str = 'hnsw',
+    m: int = 16,
+    ef_construction: int = 64,
+    lists: int = 100,
+    table: str = 'messages',
+    column: str = 'embedding',
+    expression: Optional[str] = None,
+    opclass: Optional[str] = None,
+    maintenance_work_mem: Optional[str] = None,
+    concurrently: bool = True
+) -> str:
+    """Build an ANN index without blocking writes (CREATE INDEX CONCURRENTLY).
+
+    The operator class defaults to cosine distance for the column's storage type:
+    message vectors follow embedding_storage, conversation centroids are float32.
+    An invalid index left by an interrupted build is dropped and built again.
+    """
+    if opclass is None:
+        opclass = embedding_opclass() if table == 'messages' else 'vector_cosine_ops'
+    name = vector_index_name(method, table, column)
+    target = expression or column
+    statement = (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} "
+        f"ON {table} USING {method} (({target}) {opclass}) "
+        f"{_index_options(method, m, ef_construction, lists)}"
+    )
+    # CONCURRENTLY can't run inside a transaction, so use the driver connection directly
+    async with get_raw_connection() as conn:
+        await _drop_invalid_index(conn, name)
+        if maintenance_work_mem:
+            await conn.execute("SELECT set_config('maintenance_work_mem', $1, false)", maintenance_work_mem)
+        try:
+            logger.info(f"Building index: {statement}")
+            await conn.execute(statement)
+        finally:
+            # The connection goes back to the pool, so don't leak the setting
+            if maintenance_work_mem:
+                await conn.execute("RESET maintenance_work_mem")
+    return name
+
+def binary_quantized(expression: Any, dimensions: int) -> Any:
+    """binary_quantize(expression)::bit(dimensions), written exactly as the binary index expression"""
+    return cast(func.binary_quantize(expression), BIT(int(dimensions)))
+
+async def create_binary_index(
+    dimensions: int,
+    method: str = 'hnsw',
+    m: int = 16,
+    ef_construction: int = 64,
+    lists: int = 100,
+    maintenance_work_mem: Optional[str] = None
+) -> str:
+    """Build an ANN index over binary-quantized message embeddings (one bit per dimension)"""
+    return await create_vector_index(
+        method=method,
+        m=m,
+        ef_construction=ef_construction,
+        lists=lists,
+        column=BINARY_INDEX_COLUMN,
+        expression=f"CAST(binary_quantize(embedding) AS bit({int(dimensions)}))",
+        opclass='bit_hamming_ops',
+        maintenance_work_mem=maintenance_work_mem
+    )
+
+async def rebuild_vector_index(method: str = 'hnsw', table: str = 'messages', column: str = 'embedding') -> str:
+    """Rebuild an ANN index in place without blocking writes"""
+    name = vector_index_name(method, table, column)
+    async with get_raw_connection() as conn:
+        await conn.execute(f"REINDEX INDEX CONCURRENTLY {name}")
+    return name
+
+async def drop_vector_index(method: str = 'hnsw', table: str = 'messages', column: str = 'embedding') -> str:
+    """Drop an ANN index without blocking reads or writes"""
+    name = vector_index_name(method, table, column)
+    async with get_raw_connection() as conn:
+        await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    return name
+
+async def create_trigram_index(maintenance_work_mem: Optional[str] = None, concurrently: bool = True) -> str:
+    """Build a pg_trgm GIN index on message content for LIKE/ILIKE and fuzzy matching"""
+    statement = (
+        f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {TRIGRAM_INDEX_NAME} "
+        f"ON messages USING gin (content gin_trgm_ops)"
+    )
+    async with get_raw_connection() as conn:
+        await conn.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        await _drop_invalid_index(conn, TRIGRAM_INDEX_NAME)
+        if maintenance_work_mem:
+            await conn.execute("SELECT set_config('maintenance_work_mem', $1, false)", maintenance_work_mem)
+        try:
+            logger.info(f"Building index: {statement}")
+            await conn.execute(statement)
+        finally:
+            if maintenance_work_mem:
+                await conn.execute("RESET maintenance_work_mem")
+    return TRIGRAM_INDEX_NAME
+
+async def drop_trigram_index() -> str:
+    """Drop the trigram index without blocking reads or writes"""
+    async with get_raw_connection() as conn:
+        await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {TRIGRAM_INDEX_NAME}")
+    return TRIGRAM_INDEX_NAME
+
+async def vector_index_status(
+    table: str = 'messages',
+    methods: Tuple[str, ...] = VECTOR_INDEX_METHODS
+) -> List[Dict[str, Any]]:
+    """Report indexes of the given access methods on a table: definition, size, validity and any build in progress"""
+    async with get_raw_connection() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT c.relname AS name,
+                   am.amname AS method,
+                   pg_get_indexdef(c.oid) AS definition,
+                   pg_relation_size(c.oid) AS bytes,
+                   i.indisvalid AS valid,
+                   p.phase AS build_phase,
+                   p.blocks_done, p.blocks_total, p.tuples_done, p.tuples_total
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            JOIN pg_class t ON t.oid = i.indrelid
+            JOIN pg_am am ON am.oid = c.relam
+            LEFT JOIN pg_stat_progress_create_index p ON p.index_relid = c.oid
+            WHERE t.relname = $1 AND am.amname = ANY($2::text[])
+            ORDER BY c.relname
+            """,
+            table, list(methods)
+        )
+    return [dict(row) for row in rows]
+
+async def create_shadow_indexes(
+    columns: Sequence[str],
+    suffix: str,
+    maintenance_work_mem: Optional[str] = None
+) -> Dict[str, str]:
+    """Copy the ANN indexes on message columns onto their `{column}{suffix}` shadow columns.
+
+    Builds run concurrently, so the live indexes keep serving meanwhile.
+    Returns live index name -> shadow index name.
+    """
+    pattern = re.compile(r'\b(' + '|'.join(re.escape(column) for column in columns) + r')\b')
+    created: Dict[str, str] = {}
+    for index in await vector_index_status('messages'):
+        # pg_get_indexdef: CREATE INDEX <name> ON <table> USING <method> (<key>) WITH (...)
+        _, _, body = index['definition'].partition(' USING ')
+        if not pattern.search(body):
+            continue
+        shadow = f"{index['name']}{suffix}"[:63]
+        statement = (
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {shadow} ON messages USING "
+            + pattern.sub(lambda match: match.group(1) + suffix, body)
+        )
+        async with get_raw_connection() as conn:
+            await _drop_invalid_index(conn, shadow)
+            if maintenance_work_mem:
+                await conn.execute("SELECT set_config('maintenance_work_mem', $1, false)", maintenance_work_mem)
+            try:
+                logger.info(f"Building index: {statement}")
+                await conn.execute(statement)
+            finally:
+                if maintenance_work_mem:
+                    await conn.execute("RESET maintenance_work_mem")
+        created[index['name']] = shadow
+    return created
+
+async def apply_recall_profile(session: Any, recall: str) -> None:
+    """Set ANN search parameters for the current transaction of a session"""
+    try:
+        profile = RECALL_PROFILES[recall]
+    except KeyError:
+        raise ValueError(f"Unknown recall profile: {recall}")
+    # One round trip for all settings of the profile
+    calls = ', '.join(f"set_config(:name{i}, :value{i}, true)" for i in range(len(profile)))
+    params: Dict[str, str] = {}
+    for i, (name, value) in enumerate(profile.items()):
+        params[f'name{i}'] = name
+        params[f'value{i}'] = str(value)
+    await session.execute(text(f"SELECT {calls}"), params)
+
+async def widen_ef_search(session: Any, candidates: int) -> None:
+    """Raise hnsw.ef_search for the current transaction so one HNSW scan can return `candidates` rows"""
+    await session.execute(
+        text("""
+            SELECT set_config(
+                'hnsw.ef_search',
+                CAST(least(greatest(
+                    coalesce(CAST(nullif(current_setting('hnsw.ef_search', true), '') AS int), :default),
+                    :candidates
+                ), :maximum) AS text),
+                true
+            )
+        """),
+        {'default': HNSW_EF_SEARCH_DEFAULT, 'candidates': int(candidates), 'maximum': HNSW_EF_SEARCH_MAX}
+    )
+
+__all__ = [
+    'VECTOR_INDEX_METHODS', 'TRIGRAM_INDEX_NAME', 'RECALL_PROFILES', 'vector_index_name', 'create_vector_index',
+    'rebuild_vector_index', 'drop_vector_index', 'create_trigram_index', 'drop_trigram_index',
+    'vector_index_status', 'apply_recall_profile', 'BINARY_INDEX_COLUMN', 'binary_quantized',
+    'create_binary_index', 'widen_ef_search', 'create_shadow_indexes'
+]
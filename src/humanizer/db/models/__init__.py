@@ -1,5 +1,8 @@
 # src/humanizer/db/models/__init__.py
 from humanizer.db.models.base import Base
 from humanizer.db.models.content import Content, Message
+from humanizer.db.models.imports import ImportCheckpoint, ImportSpan
+from humanizer.db.models.embedding import EmbeddingJob, ConversationEmbedding, EmbeddingModel, ModelEmbedding
 
-__all__ = ['Base', 'Content', 'Message']
+__all__ = ['Base', 'Content', 'Message', 'ImportCheckpoint', 'ImportSpan', 'EmbeddingJob', 'ConversationEmbedding',
+           'EmbeddingModel', 'ModelEmbedding']
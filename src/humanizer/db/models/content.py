@@ -1,31 +1,41 @@
-from sqlalchemy import Column, String, DateTime, Text, JSON, Integer, ForeignKey, event, text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, DateTime, Text, JSON, Integer, ForeignKey, Computed, Index, event, text
+from sqlalchemy.dialects.postgresql import UUID, TSVECTOR
+from sqlalchemy.orm import deferred
 from uuid import uuid4
 from humanizer.db.models.base import Base
 from humanizer.config import get_settings
+from humanizer.db.triggers import embedding_trigger_statements
+from humanizer.db.storage import embedding_column_type
 
-try:
-    from pgvector.sqlalchemy import Vector
-except ImportError:
-    raise ImportError(
-        "pgvector is required. Install it with: pip install pgvector"
-    )
+# Text search configuration baked into the generated tsvector columns
+TEXT_SEARCH_CONFIG = 'english'
 
 class Content(Base):
     __tablename__ = 'content'
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    original_id = Column(String, index=True)  # Source archive id, used by incremental imports
+    content_hash = Column(String)
     title = Column(String)
     create_time = Column(DateTime, nullable=False)
     update_time = Column(DateTime, nullable=False)
     content_type = Column(String, nullable=False)
     meta_info = Column(JSON)  # Changed from metadata to meta_info
+    title_vector = deferred(Column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(title, ''))", persisted=True)
+    ))
+
+    __table_args__ = (
+        Index('ix_content_title_vector', 'title_vector', postgresql_using='gin'),
+    )
 
 class Message(Base):
     __tablename__ = 'messages'
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     conversation_id = Column(UUID(as_uuid=True), ForeignKey('content.id'), nullable=False)
+    original_id = Column(String)
     role = Column(String, nullable=False)
     content = Column(Text, nullable=False)
     name = Column(String)
@@ -34,30 +44,24 @@ class Message(Base):
     tool_call_id = Column(String)
     position = Column(Integer, nullable=False)
     create_time = Column(DateTime, nullable=False)
-    embedding = Column(Vector(get_settings().embedding_dimensions))
+    embedding = Column(embedding_column_type())  # vector or halfvec, per embedding_storage
+    # Whole model output, and a short prefix of it for coarse search; embedding is a prefix too
+    embedding_full = deferred(Column(embedding_column_type(dimensions=0)))
+    embedding_short = deferred(Column(embedding_column_type(dimensions=get_settings().embedding_short_dimensions)))
     embedding_model = Column(String)
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(f"to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(content, ''))", persisted=True)
+    ))
+
+    __table_args__ = (
+        Index('ix_messages_search_vector', 'search_vector', postgresql_using='gin'),
+    )
 
-# Add the vector normalization trigger after table creation
+# Install the optional embedding validation trigger after table creation
 def create_vector_triggers(target, connection, **kw):
-    connection.execute(text("""
-        CREATE OR REPLACE FUNCTION normalize_vector()
-        RETURNS trigger AS $$
-        BEGIN
-            IF NEW.embedding IS NOT NULL THEN
-                NEW.embedding = NEW.embedding / sqrt(NEW.embedding <#> NEW.embedding);
-            END IF;
-            RETURN NEW;
-        END;
-        $$ LANGUAGE plpgsql;
-    """))
-
-    connection.execute(text("""
-        DROP TRIGGER IF EXISTS normalize_embedding ON messages;
-        CREATE TRIGGER normalize_embedding
-            BEFORE INSERT OR UPDATE ON messages
-            FOR EACH ROW
-            EXECUTE FUNCTION normalize_vector();
-    """))
+    for statement in embedding_trigger_statements(get_settings().embedding_trigger_mode):
+        connection.execute(text(statement))
 
 # Register the event listener
 event.listen(Message.__table__, 'after_create', create_vector_triggers)
@@ -0,0 +1,80 @@
+# src/humanizer/db/models/embedding.py
+from sqlalchemy import Column, DateTime, Integer, String, Text, ForeignKey, Index, func
+from sqlalchemy.dialects.postgresql import UUID
+from pgvector.sqlalchemy import Vector
+from humanizer.db.models.base import Base
+from humanizer.config import get_settings
+from humanizer.db.storage import embedding_column_type
+
+JOB_STATES = ('pending', 'in_flight', 'done', 'failed')
+
+MODEL_STATES = ('active', 'backfill', 'retired')
+
+class EmbeddingJob(Base):
+    """Embedding work item for one message.
+
+    pending jobs run once next_attempt_at has passed, highest priority first.
+    in_flight jobs belong to a worker until lease_expires_at, after which any
+    worker may reclaim them. Failures go back to pending with exponential
+    backoff until attempts run out, then stay failed.
+    """
+    __tablename__ = 'embedding_jobs'
+
+    message_id = Column(UUID(as_uuid=True), ForeignKey('messages.id', ondelete='CASCADE'), primary_key=True)
+    state = Column(String, nullable=False, default='pending')
+    priority = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    worker = Column(String)
+    lease_expires_at = Column(DateTime(timezone=True))
+    error_kind = Column(String)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    completed_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index('ix_embedding_jobs_queue', 'state', priority.desc(), 'next_attempt_at'),
+        Index('ix_embedding_jobs_completed_at', 'completed_at'),
+    )
+
+class ConversationEmbedding(Base):
+    """Normalized centroid of a conversation's message embeddings.
+
+    embedding_sum and message_count are kept up to date as messages are
+    embedded, so the centroid never has to be recomputed from every message.
+    """
+    __tablename__ = 'conversation_embeddings'
+
+    conversation_id = Column(UUID(as_uuid=True), ForeignKey('content.id', ondelete='CASCADE'), primary_key=True)
+    embedding = Column(Vector(get_settings().embedding_dimensions), nullable=False)
+    embedding_sum = Column(Vector(get_settings().embedding_dimensions), nullable=False)
+    message_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+
+class EmbeddingModel(Base):
+    """An embedding model the corpus is, was or is being embedded with.
+
+    The one active model produced the vectors in messages and embeds search
+    queries; backfill models are being embedded into model_embeddings ahead
+    of a cutover; retired models were active before.
+    """
+    __tablename__ = 'embedding_models'
+
+    model = Column(String, primary_key=True)
+    state = Column(String, nullable=False, default='backfill')
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    activated_at = Column(DateTime(timezone=True))
+
+class ModelEmbedding(Base):
+    """Full-length vector of a message under a model that is not live yet.
+
+    Backfills write here instead of messages, so search keeps serving the
+    active model's vectors untouched until the cutover.
+    """
+    __tablename__ = 'model_embeddings'
+
+    model = Column(String, ForeignKey('embedding_models.model', ondelete='CASCADE'), primary_key=True)
+    message_id = Column(UUID(as_uuid=True), ForeignKey('messages.id', ondelete='CASCADE'), primary_key=True)
+    embedding = Column(embedding_column_type(dimensions=0), nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
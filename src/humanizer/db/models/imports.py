@@ -0,0 +1,31 @@
+# src/humanizer/db/models/imports.py
+from datetime import datetime
+from sqlalchemy import Column, String, DateTime, Integer, Boolean, ForeignKey
+from humanizer.db.models.base import Base
+
+class ImportCheckpoint(Base):
+    """Durable progress record for a bulk import of one archive"""
+    __tablename__ = 'import_checkpoints'
+
+    fingerprint = Column(String, primary_key=True)
+    source_path = Column(String, nullable=False)
+    position = Column(Integer, nullable=False, default=0)  # Top-level array elements fully committed
+    conversations = Column(Integer, nullable=False, default=0)
+    messages = Column(Integer, nullable=False, default=0)
+    completed = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+class ImportSpan(Base):
+    """Archive elements [span_start, span_end) committed ahead of the checkpoint position.
+
+    Concurrent writers can commit batches out of order; their spans are kept
+    until the position catches up, so a resumed import skips them instead of
+    copying those conversations again.
+    """
+    __tablename__ = 'import_spans'
+
+    fingerprint = Column(
+        String, ForeignKey('import_checkpoints.fingerprint', ondelete='CASCADE'), primary_key=True
+    )
+    span_start = Column(Integer, primary_key=True)
+    span_end = Column(Integer, nullable=False)
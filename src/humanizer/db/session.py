@@ -1,20 +1,84 @@
 # src/humanizer/db/session.py
-from typing import AsyncGenerator
+import asyncio
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, TypeVar
 from contextlib import asynccontextmanager
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.pool import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from humanizer.utils.logging import get_logger
-from humanizer.config import get_settings # This line changed
+from humanizer.config import get_settings
 from humanizer.config.database import DatabaseRole
 
 
 logger = get_logger(__name__)
 
+T = TypeVar("T")
+
+# Process-wide engine registry, one pooled engine per database role
+_engines: Dict[DatabaseRole, AsyncEngine] = {}
+_sessionmakers: Dict[DatabaseRole, async_sessionmaker] = {}
+
+# Async cleanups for other loop-bound shared resources, run by run_async
+_shutdown_hooks: List[Callable[[], Awaitable[None]]] = []
+
+def on_shutdown(hook: Callable[[], Awaitable[None]]) -> Callable[[], Awaitable[None]]:
+    """Register an async cleanup to run before run_async closes its event loop"""
+    _shutdown_hooks.append(hook)
+    return hook
+
+def get_engine(role: DatabaseRole = DatabaseRole.APP) -> AsyncEngine:
+    """Get (lazily creating) the pooled engine for a database role"""
+    engine = _engines.get(role)
+    if engine is None:
+        settings = get_settings()
+        engine = create_async_engine(
+            settings.database_url,
+            pool_size=settings.humanizer_db_pool_size,
+            max_overflow=settings.humanizer_db_max_overflow,
+            pool_recycle=settings.humanizer_db_pool_recycle,
+            pool_pre_ping=settings.humanizer_db_pool_pre_ping,
+            echo=False,
+        )
+        _engines[role] = engine
+        _sessionmakers[role] = async_sessionmaker(
+            bind=engine,
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+        logger.debug(
+            f"Created engine for role {role.value} "
+            f"(pool_size={settings.humanizer_db_pool_size}, "
+            f"max_overflow={settings.humanizer_db_max_overflow})"
+        )
+    return engine
+
+async def dispose_engines() -> None:
+    """Dispose every pooled engine and close their connections"""
+    engines = list(_engines.values())
+    _engines.clear()
+    _sessionmakers.clear()
+    for engine in engines:
+        await engine.dispose()
+
+def run_async(coro: Awaitable[T]) -> T:
+    """Run a coroutine on a fresh event loop, disposing pooled engines before it closes.
+
+    Pooled asyncpg connections (and other pooled clients registered with
+    on_shutdown) are bound to the loop that opened them, so CLI commands should
+    use this instead of asyncio.run.
+    """
+    async def runner() -> T:
+        try:
+            return await coro
+        finally:
+            await dispose_engines()
+            for hook in _shutdown_hooks:
+                await hook()
+
+    return asyncio.run(runner())
+
 async def init_db(force: bool = False) -> None:
     """Initialize database schema"""
     from humanizer.db.models.base import Base
-    settings = get_settings()
-    engine = create_async_engine(settings.database_url)
+    engine = get_engine(DatabaseRole.ADMIN)
 
     async with engine.begin() as conn:
         if force:
@@ -24,20 +88,10 @@ async def init_db(force: bool = False) -> None:
     logger.info("Database initialized successfully")
 
 @asynccontextmanager
-async def get_session(role: DatabaseRole = DatabaseRole.APP) -> AsyncGenerator[AsyncSession, None]: # This line changed
+async def get_session(role: DatabaseRole = DatabaseRole.APP) -> AsyncGenerator[AsyncSession, None]:
     """Get database session with appropriate role"""
-    settings = get_settings() # This line changed
-
-    engine = create_async_engine(
-        settings.database_url, # This line changed
-        poolclass=NullPool,
-        echo=False,
-    )
-    async_session = async_sessionmaker(
-        bind=engine,
-        class_=AsyncSession,
-        expire_on_commit=False
-    )
+    get_engine(role)
+    async_session = _sessionmakers[role]
 
     async with async_session() as session:
         try:
@@ -47,4 +101,13 @@ async def get_session(role: DatabaseRole = DatabaseRole.APP) -> AsyncGenerator[A
             await session.rollback()
             raise
 
-__all__ = ['init_db', 'get_session']
+@asynccontextmanager
+async def get_raw_connection(role: DatabaseRole = DatabaseRole.APP) -> AsyncGenerator[Any, None]:
+    """Borrow the underlying asyncpg connection from the pool (for COPY and other driver-level calls)"""
+    async with get_engine(role).connect() as conn:
+        raw = await conn.get_raw_connection()
+        yield raw.driver_connection
+
+__all__ = [
+    'init_db', 'get_session', 'get_raw_connection', 'get_engine', 'dispose_engines', 'run_async', 'on_shutdown'
+]
@@ -0,0 +1,249 @@
+# src/humanizer/db/storage.py
+from typing import AsyncIterator, Dict, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from pgvector.sqlalchemy import HALFVEC, Vector
+from humanizer.config import get_settings
+from humanizer.db.session import get_session
+from humanizer.db.triggers import embedding_trigger_statements
+from humanizer.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Column types message embeddings can be stored as: float32 (vector) or float16 (halfvec)
+EMBEDDING_STORAGE_TYPES = ('vector', 'halfvec')
+
+# Cosine distance operator class of each storage type, for ANN indexes
+COSINE_OPCLASSES = {'vector': 'vector_cosine_ops', 'halfvec': 'halfvec_cosine_ops'}
+
+# How far from unit length a stored vector can be from component rounding alone
+ROUNDING_TOLERANCE = {'vector': 1e-6, 'halfvec': 1e-3}
+
+# Message vector columns. embedding_full holds the whole (Matryoshka) model
+# output; embedding and embedding_short are normalized prefixes of it, at
+# embedding_dimensions and embedding_short_dimensions.
+FULL_COLUMN = 'embedding_full'
+SHORT_COLUMN = 'embedding_short'
+EMBEDDING_COLUMNS = (FULL_COLUMN, 'embedding', SHORT_COLUMN)
+
+def embedding_storage(storage: Optional[str] = None) -> str:
+    """Validated storage type, defaulting to the embedding_storage setting"""
+    storage = storage or get_settings().embedding_storage
+    if storage not in EMBEDDING_STORAGE_TYPES:
+        raise ValueError(f"Unknown embedding storage: {storage}")
+    return storage
+
+def embedding_column_type(storage: Optional[str] = None, dimensions: Optional[int] = None):
+    """SQLAlchemy type of a message vector column; dimensions=0 leaves the length open"""
+    if dimensions is None:
+        dimensions = get_settings().embedding_dimensions
+    vector_type = HALFVEC if embedding_storage(storage) == 'halfvec' else Vector
+    return vector_type(dimensions or None)
+
+def embedding_sql_type(storage: Optional[str] = None, dimensions: Optional[int] = None) -> str:
+    """SQL type of a message vector column, e.g. halfvec(512), for casts in raw SQL"""
+    if dimensions is None:
+        dimensions = get_settings().embedding_dimensions
+    storage = embedding_storage(storage)
+    return f"{storage}({int(dimensions)})" if dimensions else storage
+
+def embedding_opclass(storage: Optional[str] = None) -> str:
+    return COSINE_OPCLASSES[embedding_storage(storage)]
+
+def matryoshka_sql(source: str, dimensions: int, sql_type: Optional[str] = None) -> str:
+    """SQL for the normalized first `dimensions` components of a vector expression.
+
+    Matryoshka-trained models front-load information, so a re-normalized prefix
+    of the full vector is the embedding the model would give at that size.
+    """
+    sliced = f"l2_normalize(subvector(CAST({source} AS vector), 1, {int(dimensions)}))"
+    return f"CAST({sliced} AS {sql_type})" if sql_type else sliced
+
+def column_targets() -> Dict[str, Tuple[str, int]]:
+    """Configured SQL type and length (0 = any) of each message vector column in use"""
+    settings = get_settings()
+    targets = {
+        FULL_COLUMN: (embedding_sql_type(dimensions=0), 0),
+        'embedding': (embedding_sql_type(), settings.embedding_dimensions),
+    }
+    if settings.embedding_short_dimensions:
+        targets[SHORT_COLUMN] = (
+            embedding_sql_type(dimensions=settings.embedding_short_dimensions),
+            settings.embedding_short_dimensions
+        )
+    return targets
+
+def _column_source(column: str, row: str) -> str:
+    """SQL computing a column's configured value from a row's stored vectors (NULL if they are too short)"""
+    sql_type, dimensions = column_targets()[column]
+    if column == FULL_COLUMN:
+        return f"CAST({row}.{FULL_COLUMN} AS {sql_type})"
+    source = f"coalesce(CAST({row}.{FULL_COLUMN} AS vector), CAST({row}.embedding AS vector))"
+    return (
+        f"CASE WHEN vector_dims({source}) >= {int(dimensions)} "
+        f"THEN {matryoshka_sql(source, dimensions, sql_type)} END"
+    )
+
+async def stored_column_type(
+    session: AsyncSession,
+    column: str = 'embedding',
+    table: str = 'messages'
+) -> Optional[str]:
+    """Type a column actually has in the database, e.g. vector(512)"""
+    return await session.scalar(
+        text("""
+            SELECT format_type(a.atttypid, a.atttypmod)
+            FROM pg_attribute a
+            WHERE a.attrelid = CAST(:table AS regclass) AND a.attname = :column AND NOT a.attisdropped
+        """),
+        {'table': table, 'column': column}
+    )
+
+async def _copy_batches(column: str, target: str, batch_size: int) -> AsyncIterator[Tuple[int, int]]:
+    """Fill `target` from the row's stored vectors in primary-key batches, each its own transaction.
+
+    Yields running totals of (rows scanned, rows written); rows whose vectors are
+    too short for the configured length are left NULL.
+    """
+    source = _column_source(column, 'm')
+    scanned = written = 0
+    last_id = None
+    while True:
+        async with get_session() as session:
+            row = (await session.execute(
+                text(f"""
+                    WITH batch AS (
+                        SELECT id FROM messages
+                        WHERE {target} IS NULL
+                          AND ({FULL_COLUMN} IS NOT NULL OR embedding IS NOT NULL)
+                          {'AND id > :last_id' if last_id else ''}
+                        ORDER BY id
+                        LIMIT :batch_size
+                    ),
+                    filled AS (
+                        UPDATE messages AS m
+                        SET {target} = {source}
+                        FROM batch b
+                        WHERE m.id = b.id
+                        RETURNING m.{target} IS NOT NULL AS written
+                    )
+                    SELECT (SELECT count(*) FROM batch) AS scanned,
+                           (SELECT count(*) FROM filled WHERE written) AS written,
+                           (SELECT id FROM batch ORDER BY id DESC LIMIT 1) AS last_id
+                """),
+                {'last_id': last_id, 'batch_size': batch_size} if last_id else {'batch_size': batch_size}
+            )).one()
+        if not row.scanned:
+            return
+        last_id = row.last_id
+        scanned += row.scanned
+        written += row.written
+        yield scanned, written
+
+async def _convert_column(column: str, batch_size: int, lock_timeout: str) -> AsyncIterator[Tuple[int, int]]:
+    """Rebuild a column with its configured type without a long table lock.
+
+    Values are computed into a shadow column in batches while a temporary
+    trigger keeps rows written meanwhile in step, then the columns are swapped
+    in one short transaction. An interrupted run resumes where it stopped.
+    """
+    target, _ = column_targets()[column]
+    shadow = f"{column}_converted"
+    mirror = f"mirror_{column}_conversion"
+    async with get_session() as session:
+        # Staging ALTERs and triggers lock messages as hard as the swap does
+        await session.execute(text("SELECT set_config('lock_timeout', :timeout, true)"), {'timeout': lock_timeout})
+        if await stored_column_type(session, shadow) not in (None, target):
+            # Left over from an interrupted conversion to a different type
+            await session.execute(text(f"ALTER TABLE messages DROP COLUMN {shadow}"))
+        await session.execute(text(f"ALTER TABLE messages ADD COLUMN IF NOT EXISTS {shadow} {target}"))
+        await session.execute(text(f"""
+            CREATE OR REPLACE FUNCTION {mirror}()
+            RETURNS trigger AS $$
+            BEGIN
+                NEW.{shadow} = {_column_source(column, 'NEW')};
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
+        """))
+        await session.execute(text(f"DROP TRIGGER IF EXISTS {mirror} ON messages"))
+        await session.execute(text(f"""
+            CREATE TRIGGER {mirror}
+                BEFORE INSERT OR UPDATE OF embedding, {FULL_COLUMN} ON messages
+                FOR EACH ROW
+                EXECUTE FUNCTION {mirror}();
+        """))
+
+    async for progress in _copy_batches(column, shadow, batch_size):
+        yield progress
+
+    # Swap the columns; triggers that name the embedding column are dropped and reinstalled around it
+    async with get_session() as session:
+        await session.execute(text("SELECT set_config('lock_timeout', :timeout, true)"), {'timeout': lock_timeout})
+        await session.execute(text(f"DROP TRIGGER IF EXISTS {mirror} ON messages"))
+        await session.execute(text(f"DROP FUNCTION IF EXISTS {mirror}()"))
+        for statement in embedding_trigger_statements('off'):
+            await session.execute(text(statement))
+        await session.execute(text(f"ALTER TABLE messages DROP COLUMN IF EXISTS {column}"))
+        await session.execute(text(f"ALTER TABLE messages RENAME COLUMN {shadow} TO {column}"))
+        for statement in embedding_trigger_statements(get_settings().embedding_trigger_mode):
+            await session.execute(text(statement))
+    logger.info(f"messages.{column} is now {target}")
+
+async def _resize_conversation_embeddings(dimensions: int) -> None:
+    """Give conversation centroids the new embedding length and recompute them"""
+    from humanizer.core.embedding.centroids import refresh_conversation_embeddings
+    async with get_session() as session:
+        if await stored_column_type(session, 'embedding', 'conversation_embeddings') == f"vector({int(dimensions)})":
+            return
+        # One row per conversation, cheap to rebuild from the converted message vectors
+        await session.execute(text("TRUNCATE conversation_embeddings"))
+        await session.execute(text(f"""
+            ALTER TABLE conversation_embeddings
+                ALTER COLUMN embedding TYPE vector({int(dimensions)}),
+                ALTER COLUMN embedding_sum TYPE vector({int(dimensions)})
+        """))
+        await refresh_conversation_embeddings(session)
+
+async def convert_embedding_storage(
+    batch_size: int = 5000,
+    lock_timeout: str = '10s'
+) -> AsyncIterator[Tuple[str, int, int]]:
+    """Bring the message vector columns in line with embedding_storage,
+    embedding_dimensions and embedding_short_dimensions, without model calls.
+
+    A column whose type changes is rebuilt online (see _convert_column) from
+    embedding_full, or from embedding for rows embedded before full vectors
+    were kept; a column that already has its type only gets its missing
+    values filled. ANN indexes on a rebuilt column go with the old one and have
+    to be created again. Rows whose stored vectors are shorter than a new
+    length end up without that vector and are picked up again by `embeddings
+    enqueue`. Yields (column, rows scanned, rows written) as batches finish.
+    """
+    targets = column_targets()
+    for column, (target, _) in targets.items():
+        async with get_session() as session:
+            stored = await stored_column_type(session, column)
+            if column == FULL_COLUMN and stored is None:
+                # Nothing to compute full vectors from; they arrive as messages are embedded
+                await session.execute(
+                    text("SELECT set_config('lock_timeout', :timeout, true)"), {'timeout': lock_timeout}
+                )
+                await session.execute(text(f"ALTER TABLE messages ADD COLUMN {FULL_COLUMN} {target}"))
+                continue
+        if stored != target:
+            progress = _convert_column(column, batch_size, lock_timeout)
+        elif column != FULL_COLUMN:
+            progress = _copy_batches(column, column, batch_size)
+        else:
+            continue
+        async for scanned, written in progress:
+            yield column, scanned, written
+
+    await _resize_conversation_embeddings(targets['embedding'][1])
+
+__all__ = [
+    'EMBEDDING_STORAGE_TYPES', 'COSINE_OPCLASSES', 'ROUNDING_TOLERANCE', 'FULL_COLUMN', 'SHORT_COLUMN',
+    'EMBEDDING_COLUMNS', 'embedding_storage', 'embedding_column_type', 'embedding_sql_type',
+    'embedding_opclass', 'matryoshka_sql', 'column_targets', 'stored_column_type', 'convert_embedding_storage'
+]
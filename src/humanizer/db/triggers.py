@@ -0,0 +1,48 @@
+# src/humanizer/db/triggers.py
+from typing import List
+
+# Embeddings are normalized client-side before they are written; the database
+# can optionally check that, but never rewrites vectors itself.
+EMBEDDING_TRIGGER_MODES = ('off', 'validate')
+
+# Unit-norm tolerance for the validation trigger (float32 and halfvec rounding stay below it)
+NORM_TOLERANCE = 1e-3
+
+DROP_EMBEDDING_TRIGGERS = [
+    "DROP TRIGGER IF EXISTS normalize_embedding ON messages",
+    "DROP TRIGGER IF EXISTS validate_embedding ON messages",
+    "DROP FUNCTION IF EXISTS normalize_vector()",
+]
+
+VALIDATE_EMBEDDING_TRIGGER = [
+    f"""
+    CREATE OR REPLACE FUNCTION validate_embedding_norm()
+    RETURNS trigger AS $$
+    BEGIN
+        IF abs(vector_norm(CAST(NEW.embedding AS vector)) - 1) > {NORM_TOLERANCE} THEN
+            RAISE EXCEPTION 'Embedding of message % is not unit length (norm %)',
+                NEW.id, vector_norm(CAST(NEW.embedding AS vector));
+        END IF;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+    """,
+    """
+    CREATE TRIGGER validate_embedding
+        BEFORE INSERT OR UPDATE OF embedding ON messages
+        FOR EACH ROW
+        WHEN (NEW.embedding IS NOT NULL)
+        EXECUTE FUNCTION validate_embedding_norm();
+    """,
+]
+
+def embedding_trigger_statements(mode: str) -> List[str]:
+    """SQL that puts the messages table into the given embedding trigger mode"""
+    if mode not in EMBEDDING_TRIGGER_MODES:
+        raise ValueError(f"Unknown embedding trigger mode: {mode}")
+    statements = list(DROP_EMBEDDING_TRIGGERS)
+    if mode == 'validate':
+        statements += VALIDATE_EMBEDDING_TRIGGER
+    return statements
+
+__all__ = ['EMBEDDING_TRIGGER_MODES', 'NORM_TOLERANCE', 'embedding_trigger_statements']
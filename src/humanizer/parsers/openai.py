@@ -1,6 +1,12 @@
 # src/humanizer/parsers/openai.py
 import ijson
-from typing import Generator, Dict, Any
+import json
+import mmap
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Generator, Dict, Any, List, Optional, Tuple
 from zipfile import ZipFile
 from decimal import Decimal
 import logging
@@ -8,12 +14,74 @@ from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Strings (with escapes) are matched whole so brackets inside them are skipped;
+# numbers and literals are matched so scalar array elements are counted too
+_JSON_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]|-?[0-9][0-9.eE+\-]*|true|false|null', re.DOTALL)
+
+def index_json_array(path: str | Path) -> List[Tuple[int, int]]:
+    """Return (start, end) byte offsets of each element of a top-level JSON array.
+
+    Scalars count as elements like containers do, so positions agree with the
+    streaming parser's.
+    """
+    offsets: List[Tuple[int, int]] = []
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return offsets
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            depth = 0
+            start = 0
+            for match in _JSON_TOKEN.finditer(data):
+                token = match.group()
+                if token in (b'{', b'['):
+                    depth += 1
+                    if depth == 2:
+                        start = match.start()
+                elif token in (b'}', b']'):
+                    if depth == 2:
+                        offsets.append((start, match.end()))
+                    depth -= 1
+                elif depth == 1:
+                    offsets.append((match.start(), match.end()))
+    return offsets
+
+def _parse_range(path: str, start: int, end: int, first_index: int) -> List[Dict[str, Any]]:
+    """Process-pool worker: parse and normalize the array elements in one byte range"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        chunk = f.read(end - start)
+    parser = OpenAIConversationParser(path, quiet=True)
+    results = []
+    for index, conversation in enumerate(json.loads(b'[' + chunk + b']'), first_index):
+        processed = parser._process_element(conversation, index)
+        if processed is not None:
+            results.append(processed)
+    return results
+
+class _OffsetStream:
+    """Read a JSON array file from an element offset onward, as if the array started there"""
+
+    def __init__(self, f, offset: int):
+        self._f = f
+        self._f.seek(offset)
+        self._prefix = b'['
+
+    def read(self, size: int = -1) -> bytes:
+        # ijson probes with read(0); the prefix must survive until real data is asked for
+        if self._prefix and size != 0:
+            prefix, self._prefix = self._prefix, b''
+            if size is None or size < 0:
+                return prefix + self._f.read()
+            return prefix + self._f.read(max(size - 1, 0))
+        return self._f.read(size)
+
 class OpenAIConversationParser:
     """Enhanced OpenAI conversation parser"""
 
-    def __init__(self, file_path: str | Path):
+    def __init__(self, file_path: str | Path, quiet: bool = False):
         self.file_path = Path(file_path)
-        logger.info(f"Initialized parser for {file_path}")
+        if not quiet:
+            logger.info(f"Initialized parser for {file_path}")
 
     def _safe_float(self, value: Any) -> float:
         """Safely convert various types to float"""
@@ -138,31 +206,103 @@ class OpenAIConversationParser:
             logger.error(f"Error processing conversation: {str(e)}")
             raise
 
-    def parse_file(self) -> Generator[Dict[str, Any], None, None]:
-        """Parse conversations from file (either ZIP or JSON)"""
+    def _process_element(self, conversation: Any, index: int) -> Optional[Dict[str, Any]]:
+        """Process one top-level array element, tagging it with its index in the archive"""
+        try:
+            processed = self._process_conversation(conversation)
+        except Exception as e:
+            logger.error(f"Error processing conversation: {e}")
+            return None
+        if not processed['messages']:
+            return None
+        processed['index'] = index
+        return processed
+
+    def parse_file(self, start_index: int = 0) -> Generator[Dict[str, Any], None, None]:
+        """Parse conversations from file (either ZIP or JSON).
+
+        Each conversation carries an 'index' key: its position among the top-level
+        array elements of the archive. start_index skips elements before it.
+        """
         if self.file_path.suffix == '.zip':
-            yield from self._parse_zip()
+            yield from self._parse_zip(start_index)
         else:
-            yield from self._parse_json()
+            yield from self._parse_json(start_index)
+
+    def parse_file_parallel(
+        self,
+        workers: Optional[int] = None,
+        chunk_bytes: int = 16 * 1024 * 1024,
+        start_index: int = 0
+    ) -> Generator[Dict[str, Any], None, None]:
+        """Parse a conversations.json across a process pool, yielding in file order.
+
+        The file is pre-scanned once for the byte offsets of the top-level array
+        elements; consecutive elements are grouped into ranges of about chunk_bytes
+        and each range is parsed and normalized by a worker process. ZIP archives
+        fall back to the streaming parser.
+        """
+        if self.file_path.suffix == '.zip':
+            yield from self.parse_file(start_index)
+            return
+
+        offsets = index_json_array(self.file_path)
+        ranges: List[Tuple[int, int, int]] = []
+        for index in range(start_index, len(offsets)):
+            start, end = offsets[index]
+            if ranges and end - ranges[-1][0] <= chunk_bytes:
+                ranges[-1] = (ranges[-1][0], end, ranges[-1][2])
+            else:
+                ranges.append((start, end, index))
+        logger.info(f"Indexed {len(offsets)} conversations into {len(ranges)} ranges")
+
+        workers = workers or os.cpu_count() or 1
+        path = str(self.file_path)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Keep a bounded window of ranges in flight so results don't pile up in memory
+            pending: deque = deque()
+            range_iter = iter(ranges)
+            for start, end, first_index in range_iter:
+                pending.append(pool.submit(_parse_range, path, start, end, first_index))
+                if len(pending) >= workers * 2:
+                    break
+            while pending:
+                yield from pending.popleft().result()
+                next_range = next(range_iter, None)
+                if next_range is not None:
+                    pending.append(pool.submit(_parse_range, path, *next_range))
 
-    def _parse_zip(self) -> Generator[Dict[str, Any], None, None]:
+    def _parse_zip(self, start_index: int = 0) -> Generator[Dict[str, Any], None, None]:
+        # Compressed members can't be seeked, so earlier elements are skipped unprocessed
+        index = 0
         with ZipFile(self.file_path, 'r') as zip_ref:
             for file_name in zip_ref.namelist():
                 if file_name.endswith('.json'):
                     with zip_ref.open(file_name) as f:
-                        yield from self._parse_json_stream(f)
+                        for conversation in ijson.items(f, 'item'):
+                            if index >= start_index:
+                                processed = self._process_element(conversation, index)
+                                if processed is not None:
+                                    yield processed
+                            index += 1
 
-    def _parse_json(self) -> Generator[Dict[str, Any], None, None]:
+    def _parse_json(self, start_index: int = 0) -> Generator[Dict[str, Any], None, None]:
         with open(self.file_path, 'rb') as f:
-            yield from self._parse_json_stream(f)
+            if start_index <= 0:
+                yield from self._parse_json_stream(f)
+                return
+            # Seek straight to the first unprocessed element
+            offsets = index_json_array(self.file_path)
+            if start_index >= len(offsets):
+                return
+            yield from self._parse_json_stream(
+                _OffsetStream(f, offsets[start_index][0]),
+                first_index=start_index
+            )
 
-    def _parse_json_stream(self, stream) -> Generator[Dict[str, Any], None, None]:
+    def _parse_json_stream(self, stream, first_index: int = 0) -> Generator[Dict[str, Any], None, None]:
         parser = ijson.items(stream, 'item')
-        for conversation in parser:
-            try:
-                processed = self._process_conversation(conversation)
-                if processed['messages']:
-                    yield processed
-            except Exception as e:
-                logger.error(f"Error processing conversation: {e}")
-                continue
+        for index, conversation in enumerate(parser, first_index):
+            processed = self._process_element(conversation, index)
+            if processed is not None:
+                yield processed
@@ -0,0 +1,15 @@
+# tests/conftest.py
+import pytest
+import humanizer.config
+import humanizer.core.embedding.cache
+import humanizer.core.search.cache
+from humanizer.config import Settings
+
+@pytest.fixture(autouse=True)
+def settings(monkeypatch, tmp_path):
+    """Fresh settings per test, with the on-disk embedding cache in a temporary directory"""
+    settings = Settings(embedding_cache_path=tmp_path / 'embedding_cache.sqlite3')
+    monkeypatch.setattr(humanizer.config, '_settings', settings)
+    monkeypatch.setattr(humanizer.core.embedding.cache, '_cache', None)
+    monkeypatch.setattr(humanizer.core.search.cache, '_query_cache', None)
+    return settings
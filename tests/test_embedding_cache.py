@@ -0,0 +1,48 @@
+# tests/test_embedding_cache.py
+import sqlite3
+from humanizer.core.embedding.cache import EmbeddingCache, cache_key
+
+def _key(i: int) -> bytes:
+    return cache_key('model', 0, 'prefix: ', f"text {i}")
+
+def test_round_trip_and_counters(tmp_path):
+    cache = EmbeddingCache(tmp_path / 'cache.sqlite3', max_bytes=10 * 1024 * 1024)
+    cache.put_many([(_key(1), [0.5, -0.25, 1.0])])
+    assert cache.get_many([_key(1), _key(2)]) == {_key(1): [0.5, -0.25, 1.0]}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_size_is_shared_between_processes(tmp_path):
+    path = tmp_path / 'cache.sqlite3'
+    first = EmbeddingCache(path, max_bytes=100 * 1024 * 1024)
+    second = EmbeddingCache(path, max_bytes=100 * 1024 * 1024)
+    before = second.stats['bytes']
+    first.put_many((_key(i), [float(i)] * 256) for i in range(500))
+    assert second.stats['bytes'] > before + 500 * 1024
+    assert second.stats['bytes'] == first.stats['bytes']
+
+def test_eviction_keeps_the_file_within_bound(tmp_path):
+    cache = EmbeddingCache(tmp_path / 'cache.sqlite3', max_bytes=512 * 1024)
+    for batch in range(10):
+        cache.put_many((_key(batch * 100 + i), [float(i)] * 256) for i in range(100))
+    assert cache.evictions > 0
+    assert cache.stats['bytes'] <= cache.max_bytes
+    # Least recently used entries go first
+    assert _key(999) in cache.get_many([_key(999)])
+    assert cache.get_many([_key(0)]) == {}
+
+def test_locked_file_is_not_fatal(tmp_path):
+    path = tmp_path / 'cache.sqlite3'
+    cache = EmbeddingCache(path, max_bytes=10 * 1024 * 1024, busy_timeout=0.05)
+    cache.put_many([(_key(1), [1.0])])
+
+    other = sqlite3.connect(str(path), isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        cache.put_many([(_key(2), [2.0])])
+        assert _key(1) in cache.get_many([_key(1), _key(2)])
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+
+    cache.put_many([(_key(2), [2.0])])
+    assert cache.get_many([_key(2)]) == {_key(2): [2.0]}
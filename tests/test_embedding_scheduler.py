@@ -0,0 +1,136 @@
+# tests/test_embedding_scheduler.py
+import asyncio
+import json
+import httpx
+import pytest
+from humanizer.core.embedding import scheduler as scheduler_module
+from humanizer.core.embedding.scheduler import ConcurrencyLimiter, EmbeddingScheduler, error_kind
+from humanizer.core.embedding.service import DOCUMENT_PREFIX, EmbeddingService
+
+class FakeOllama:
+    """Stands in for Ollama's /api/embed: fixed vectors, or the status code a test asks for"""
+
+    def __init__(self, dimensions: int, status: int = 200, reject: str = None):
+        self.dimensions = dimensions
+        self.status = status
+        self.reject = reject
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        inputs = [text.removeprefix(DOCUMENT_PREFIX) for text in json.loads(request.content)['input']]
+        self.requests.append(inputs)
+        if self.status != 200:
+            return httpx.Response(self.status, json={'error': 'busy'})
+        if self.reject and any(self.reject in text for text in inputs):
+            return httpx.Response(400, json={'error': 'bad input'})
+        return httpx.Response(200, json={'embeddings': [[1.0] * self.dimensions for _ in inputs]})
+
+def _service(settings, ollama: FakeOllama) -> EmbeddingService:
+    settings.embedding_cache_enabled = False
+    return EmbeddingService(client=httpx.AsyncClient(transport=httpx.MockTransport(ollama)))
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    sleep = asyncio.sleep
+    monkeypatch.setattr(scheduler_module.asyncio, 'sleep', lambda delay: sleep(0))
+
+def test_limiter_grows_by_one_after_a_full_window():
+    limiter = ConcurrencyLimiter(2, maximum=4, adaptive=True)
+    limiter.record_success(0.1)
+    assert limiter.limit == 2
+    limiter.record_success(0.1)
+    assert limiter.limit == 3
+    for _ in range(3):
+        limiter.record_success(0.1)
+    assert limiter.limit == 4
+    for _ in range(10):
+        limiter.record_success(0.1)
+    assert limiter.limit == 4
+
+def test_limiter_halves_on_overload_once_per_cooldown(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(scheduler_module.time, 'monotonic', lambda: clock[0])
+    limiter = ConcurrencyLimiter(16, adaptive=True)
+    limiter.record_overload()
+    assert limiter.limit == 8
+    limiter.record_overload()
+    assert limiter.limit == 8
+    clock[0] += 1.5
+    limiter.record_overload()
+    assert limiter.limit == 4
+
+def test_limiter_treats_slow_requests_as_overload(monkeypatch):
+    monkeypatch.setattr(scheduler_module.time, 'monotonic', lambda: 100.0)
+    limiter = ConcurrencyLimiter(8, adaptive=True)
+    limiter.record_success(0.1)
+    limiter.record_success(0.5)
+    assert limiter.limit == 4
+
+def test_fixed_limiter_ignores_feedback():
+    limiter = ConcurrencyLimiter(4, adaptive=False)
+    limiter.record_overload()
+    for _ in range(10):
+        limiter.record_success(0.1)
+    assert limiter.limit == 4
+
+async def test_limiter_bounds_in_flight():
+    limiter = ConcurrencyLimiter(2)
+    peak = 0
+
+    async def work():
+        nonlocal peak
+        await limiter.acquire()
+        peak = max(peak, limiter.in_flight)
+        await asyncio.sleep(0)
+        await limiter.release()
+
+    await asyncio.gather(*(work() for _ in range(10)))
+    assert peak == 2 and limiter.in_flight == 0
+
+async def test_overloaded_batch_is_deferred_not_split(settings, no_backoff):
+    ollama = FakeOllama(settings.embedding_dimensions, status=503)
+    scheduler = EmbeddingScheduler(_service(settings, ollama), concurrency=1, adaptive=False, max_retries=2)
+
+    texts = ['one', 'two', 'three', 'four']
+    assert await scheduler._run_request(texts) == [None] * 4
+    # The first attempt and two retries, each with the whole batch
+    assert ollama.requests == [texts] * 3
+    assert {text: error_kind(error) for text, error in scheduler.service.failures.items()} == {
+        text: 'overload' for text in texts
+    }
+    assert scheduler.limiter.in_flight == 0
+
+async def test_bad_input_is_isolated(settings):
+    ollama = FakeOllama(settings.embedding_dimensions, reject='bad')
+    scheduler = EmbeddingScheduler(_service(settings, ollama), concurrency=1, adaptive=False)
+
+    results = await scheduler._run_request(['a', 'b', 'bad', 'c'])
+    assert [result is None for result in results] == [False, False, True, False]
+    assert list(scheduler.service.failures) == ['bad']
+    assert error_kind(scheduler.service.failures['bad']) == 'http'
+
+async def test_embed_aligns_results_and_skips_empty_texts(settings):
+    ollama = FakeOllama(settings.embedding_dimensions)
+    scheduler = EmbeddingScheduler(_service(settings, ollama), concurrency=2, adaptive=False)
+
+    results = await scheduler.embed(['a', '', 'b', '   ', 'c'])
+    assert [result is None for result in results] == [False, True, False, True, False]
+    assert sorted(text for request in ollama.requests for text in request) == ['a', 'b', 'c']
+
+def test_request_chunks_respect_item_and_character_caps(settings):
+    settings.embedding_cache_enabled = False
+    service = EmbeddingService()
+    service.batch_max_items = 3
+    service.batch_max_chars = 10
+    texts = ['aaaa', 'bbbb', 'cc', 'd', 'e', 'f', 'g' * 20, 'h']
+    indexes = list(range(len(texts)))
+
+    chunks = service._request_chunks(indexes, texts)
+    assert chunks == [[0, 1, 2], [3, 4, 5], [6], [7]]
+    for chunk in chunks:
+        # An oversized text still goes out, on its own
+        assert len(chunk) <= 3
+        assert len(chunk) == 1 or sum(len(texts[i]) for i in chunk) <= 10
+
+    assert service._request_chunks(indexes, texts, max_items=1) == [[i] for i in indexes]
+    assert service._request_chunks([], texts) == []
@@ -0,0 +1,31 @@
+# tests/test_import_checkpoint.py
+import pytest
+from humanizer.core.content.importer import ConversationImporter, _advance_position, _merge_spans
+
+def test_merge_spans_joins_touching_and_overlapping():
+    assert _merge_spans([]) == []
+    assert _merge_spans([(5, 10), (0, 3), (3, 5), (20, 30), (25, 40), (50, 60)]) == [(0, 10), (20, 40), (50, 60)]
+    assert _merge_spans([(0, 100), (10, 20)]) == [(0, 100)]
+
+@pytest.mark.parametrize('position, spans, expected', [
+    (0, [], 0),
+    (0, [(100, 200)], 0),
+    (100, [(100, 200), (200, 300), (400, 500)], 300),
+    # Spans committed out of order still chain once the gap fills
+    (0, [(200, 300), (0, 100), (100, 200)], 300),
+    # A resumed run's span may start inside an earlier one
+    (100, [(100, 250), (150, 400)], 400),
+    # Spans already behind the position don't move it back
+    (500, [(0, 100), (100, 200)], 500),
+])
+def test_advance_position(position, spans, expected):
+    assert _advance_position(position, spans) == expected
+
+def test_already_committed_skips_spans_ahead_of_the_position():
+    importer = ConversationImporter()
+    importer._committed_spans = _merge_spans([(300, 400), (100, 200), (150, 250)])
+    committed = [i for i in range(0, 450) if importer._already_committed(i)]
+    assert committed == list(range(100, 250)) + list(range(300, 400))
+
+def test_nothing_committed_by_default():
+    assert not ConversationImporter()._already_committed(0)
@@ -0,0 +1,55 @@
+# tests/test_openai_parser.py
+import json
+import pytest
+from humanizer.parsers.openai import OpenAIConversationParser, index_json_array
+
+def _conversation(i: int) -> dict:
+    return {
+        'id': f"conv-{i}",
+        'title': f"Conversation [{i}] {{brackets}} \"quoted\"",
+        'create_time': 1700000000 + i,
+        'update_time': 1700000100 + i,
+        'mapping': {
+            f"msg-{i}-{j}": {
+                'message': {
+                    'id': f"msg-{i}-{j}",
+                    'author': {'role': 'user' if j % 2 == 0 else 'assistant'},
+                    'content': {'parts': [f"message {j} of {i}: ]}}["]},
+                    'create_time': 1700000000 + i + j
+                }
+            }
+            for j in range(3)
+        }
+    }
+
+@pytest.fixture
+def export(tmp_path):
+    path = tmp_path / 'conversations.json'
+    path.write_text(json.dumps([_conversation(i) for i in range(250)], indent=2))
+    return path
+
+@pytest.mark.parametrize('start_index', [0, 1, 100, 249, 250])
+def test_sequential_resume_matches_full_parse(export, start_index):
+    parser = OpenAIConversationParser(export, quiet=True)
+    expected = list(parser.parse_file())[start_index:]
+    assert list(parser.parse_file(start_index=start_index)) == expected
+
+def test_parallel_resume_matches_sequential(export):
+    parser = OpenAIConversationParser(export, quiet=True)
+    expected = list(parser.parse_file(start_index=100))
+    assert list(parser.parse_file_parallel(workers=2, chunk_bytes=4096, start_index=100)) == expected
+
+def test_scalar_elements_keep_indexes_aligned(tmp_path):
+    # Scalars are skipped by both parsers but still take up an index
+    elements = [_conversation(0), 7, "text [with] {brackets}", _conversation(3), None, -1.5e3, True,
+                _conversation(7), [1, 2], _conversation(9)]
+    path = tmp_path / 'conversations.json'
+    path.write_text(json.dumps(elements))
+    parser = OpenAIConversationParser(path, quiet=True)
+
+    assert len(index_json_array(path)) == len(elements)
+    sequential = list(parser.parse_file())
+    assert [c['index'] for c in sequential] == [0, 3, 7, 9]
+    assert list(parser.parse_file_parallel(workers=2, chunk_bytes=256)) == sequential
+    assert list(parser.parse_file(start_index=4)) == sequential[2:]
+    assert list(parser.parse_file_parallel(workers=2, chunk_bytes=256, start_index=4)) == sequential[2:]
@@ -0,0 +1,51 @@
+# tests/test_query_cache.py
+from humanizer.core.embedding.cache import EmbeddingCache
+from humanizer.core.search import cache as cache_module
+from humanizer.core.search.cache import QueryEmbeddingCache, normalize_query
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_normalize_query_collapses_whitespace_and_case():
+    assert normalize_query("  Vector\tINDEX \n tuning ") == "vector index tuning"
+    cache = QueryEmbeddingCache(max_size=8, ttl=60)
+    assert cache.key('m', 512, "Vector  index") == cache.key('m', 512, " vector INDEX ")
+    assert cache.key('m', 512, "vector index") != cache.key('m', 256, "vector index")
+    assert cache.key('m', 512, "vector index") != cache.key('other', 512, "vector index")
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, 'monotonic', clock)
+    cache = QueryEmbeddingCache(max_size=8, ttl=60)
+    cache.put(b'k', [1.0])
+
+    clock.now += 59
+    assert cache.get(b'k') == [1.0]
+    clock.now += 2
+    assert cache.get(b'k') is None
+    assert (cache.hits, cache.expired, cache.misses) == (1, 1, 1)
+    assert cache.stats['size'] == 0
+
+def test_least_recently_used_entry_is_dropped_at_the_bound():
+    cache = QueryEmbeddingCache(max_size=2, ttl=60)
+    cache.put(b'a', [1.0])
+    cache.put(b'b', [2.0])
+    assert cache.get(b'a') == [1.0]
+    cache.put(b'c', [3.0])
+
+    assert cache.get(b'b') is None
+    assert cache.get(b'a') == [1.0] and cache.get(b'c') == [3.0]
+    assert cache.stats['size'] == 2
+
+def test_disk_hits_are_promoted_into_memory(tmp_path):
+    backing = EmbeddingCache(tmp_path / 'cache.sqlite3', max_bytes=1024 * 1024)
+    QueryEmbeddingCache(max_size=8, ttl=60, backing=backing).put(b'k' * 32, [0.5])
+
+    fresh = QueryEmbeddingCache(max_size=8, ttl=60, backing=backing)
+    assert fresh.get(b'k' * 32) == [0.5]
+    assert fresh.get(b'k' * 32) == [0.5]
+    assert (fresh.persistent_hits, fresh.hits, fresh.misses) == (1, 1, 0)
@@ -0,0 +1,17 @@
+# tests/test_text_search.py
+from uuid import uuid4
+import pytest
+from humanizer.core.search.text import decode_cursor, encode_cursor, escape_like
+
+@pytest.mark.parametrize('rank', [0.0, 0.1, 1 / 3, 1e-20, 123456.789])
+def test_cursor_round_trip_is_exact(rank):
+    message_id = uuid4()
+    assert decode_cursor(encode_cursor(rank, message_id)) == (rank, message_id)
+
+@pytest.mark.parametrize('cursor', ['', 'nonsense', '0.5', f"rank:{uuid4()}", '0.5:not-a-uuid'])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError, match='Invalid search cursor'):
+        decode_cursor(cursor)
+
+def test_escape_like_matches_wildcards_literally():
+    assert escape_like(r"100%_done\now") == r"100\%\_done\\now"
@@ -0,0 +1,29 @@
+# tests/test_vector_search.py
+from humanizer.core.search.vector import VectorSearch
+
+def _vector_search(settings, monkeypatch) -> VectorSearch:
+    settings.embedding_cache_enabled = False
+    search = VectorSearch()
+
+    async def use_active_model():
+        return search.embedding_service.embedding_model
+
+    async def embed_request(texts):
+        if any('bad' in text for text in texts):
+            raise ValueError("model rejected input")
+        return [[1.0] * settings.embedding_dimensions for _ in texts]
+
+    monkeypatch.setattr(search, 'use_active_model', use_active_model)
+    monkeypatch.setattr(search.embedding_service, '_embed_request', embed_request)
+    return search
+
+async def test_embed_queries_does_not_accumulate_failures(settings, monkeypatch):
+    search = _vector_search(settings, monkeypatch)
+
+    first = await search.embed_queries(['good one', 'bad one'])
+    assert first[0] is not None and first[1] is None
+    assert search.embedding_service.failures == {}
+
+    second = await search.embed_queries(['bad two', 'good two', 'bad three'])
+    assert [embedding is None for embedding in second] == [True, False, True]
+    assert search.embedding_service.failures == {}